@@ -0,0 +1,186 @@
+import os
+import sys
+
+from board import CELL_DOOR
+from camera import VIEW_COLS, VIEW_ROWS
+
+
+class RenderBackend:
+    """
+    Where the game screen is drawn. The game logic never imports a backend, and only the
+    pygame backend loads pygame, the first time it is opened. main.GameLoop (the game
+    window) uses pygame directly as well and only runs on the pygame backend.
+    open() returns the screen size; draw() shows one frame of the board with the player,
+    HUD text, highlighted cells and the other players' tokens; close() releases the display.
+    """
+
+    name = None
+
+    def open(self, width=0, height=0, fullscreen=True):
+        raise NotImplementedError
+
+    def draw(self, board, player, hud=(), highlights=(), others=()):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class NullBackend(RenderBackend):
+    # Draws nothing; counts frames. For headless runs, tests and load harnesses.
+    name = "null"
+
+    def __init__(self):
+        self.frames = 0
+        self.size = (0, 0)
+
+    def open(self, width=0, height=0, fullscreen=True):
+        self.size = (width or 1280, height or 720)
+        return self.size
+
+    def draw(self, board, player, hud=(), highlights=(), others=()):
+        self.frames += 1
+
+
+class TextBackend(RenderBackend):
+    """
+    Draws the board as characters around the player, one screen per changed frame:
+    # wall, . path, + door, 1-9 rooms, ? hint spot, * highlighted cell, @ player, and the
+    other players by the first letter of their color.
+    """
+
+    name = "text"
+
+    def __init__(self, stream=None, view_rows=VIEW_ROWS, view_cols=VIEW_COLS):
+        self.stream = stream or sys.stdout
+        self.view_rows = view_rows
+        self.view_cols = view_cols
+        self.previous_frame = None
+        self.frames = 0
+
+    def open(self, width=0, height=0, fullscreen=True):
+        return self.view_cols, self.view_rows
+
+    def draw(self, board, player, hud=(), highlights=(), others=()):
+        tokens = {other.position: str(other.color)[0].lower() for other in others}
+        frame = (player.position, tuple(text for text, *_ in hud), tuple(highlights), tuple(tokens.items()))
+        if frame == self.previous_frame:
+            return
+        self.previous_frame = frame
+        self.frames += 1
+
+        rows, cols = min(board.rows, self.view_rows), min(board.cols, self.view_cols)
+        top = min(max(player.position[0] - rows // 2, 0), board.rows - rows)
+        left = min(max(player.position[1] - cols // 2, 0), board.cols - cols)
+        highlighted = set(highlights)
+        lines = []
+        for row in range(top, top + rows):
+            line = []
+            for col in range(left, left + cols):
+                index = row * board.cols + col
+                if (row, col) == player.position:
+                    line.append("@")
+                elif (row, col) in tokens:
+                    line.append(tokens[row, col])
+                elif (row, col) in highlighted:
+                    line.append("*")
+                elif index in board.room_index:
+                    line.append(str(board.room_index[index] + 1))
+                elif index in board.hint_index:
+                    line.append("?")
+                elif board.cells[index] == CELL_DOOR:
+                    line.append("+")
+                else:
+                    line.append("." if board.walkable[index] else "#")
+            lines.append("".join(line))
+        lines += [text for text, *_ in hud]
+        self.stream.write("\n".join(lines) + "\n\n")
+
+
+class PygameBackend(RenderBackend):
+    # The real display, drawn through BoardView. pygame is imported by open().
+    name = "pygame"
+
+    def __init__(self):
+        self.pygame = None
+        self.screen = None
+        self.size = (0, 0)
+        self.view = None
+
+    def open(self, width=0, height=0, fullscreen=True):
+        os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+        import pygame
+
+        self.pygame = pygame
+        pygame.init()
+        flags = pygame.FULLSCREEN if fullscreen else 0
+        self.screen = pygame.display.set_mode((width, height), flags)
+        self.size = self.screen.get_size()
+        return self.size
+
+    # The BoardView for a board, made again when a new board is drawn.
+    def board_view(self, board):
+        if self.view is None or self.view.board is not board:
+            from board_view import BoardView
+
+            self.view = BoardView(board)
+        return self.view
+
+    def draw(self, board, player, hud=(), highlights=(), others=()):
+        self.board_view(board).draw(self.screen, player, list(hud), *self.size, highlights, others)
+        # Keep the window responsive when the caller is not reading pygame events itself.
+        self.pygame.event.pump()
+
+    def close(self):
+        if self.pygame is not None:
+            self.pygame.quit()
+
+
+BACKENDS = {backend.name: backend for backend in (PygameBackend, NullBackend, TextBackend)}
+
+
+def create_backend(name, **kwargs):
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown render backend {name!r}; choose from {', '.join(BACKENDS)}")
+    return BACKENDS[name](**kwargs)
+
+
+# Watch a simulated game through any backend, e.g. in a terminal with --backend text.
+def main():
+    import argparse
+    import random
+    import time
+
+    from engine import GameSession
+    from simulation import deductive_suggestion, room_seeker
+
+    parser = argparse.ArgumentParser(description="Watch a simulated Cluedo game through a render backend.")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="text")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-turns", type=int, default=100)
+    parser.add_argument("--delay", type=float, default=0.0, help="Seconds to wait after each frame.")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    backend = create_backend(args.backend)
+    backend.open(800, 600, fullscreen=False)
+    session = GameSession(rng=random.Random(args.seed))
+    backend.draw(session.board, session.player)
+    print(f"First frame after {(time.perf_counter() - start) * 1000:.1f} ms", file=sys.stderr)
+
+    while not session.solved and session.rolls < args.max_turns:
+        session.roll()
+        while session.spaces_left_to_move > 0:
+            session.move(room_seeker(session))
+            hud = [(f"Turn {session.rolls}, spaces left: {session.spaces_left_to_move}", 28, (0, 0, 0), (10, 10))]
+            backend.draw(session.board, session.player, hud, session.legal_destinations())
+            time.sleep(args.delay)
+        suggestion = session.can_suggest() and deductive_suggestion(session)
+        if suggestion:
+            session.suggest(*suggestion)
+    backend.close()
+    print(f"{'Solved' if session.solved else 'Gave up'} after {session.rolls} turns", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+import numpy as np
+
+from board import DEFAULT_LAYOUT
+from characters import characters as CHARACTER_INFO, weapons as WEAPONS, rooms as ROOMS
+from deduction import HINT_WAS_IN_ROOM, HINT_LOUD_NOISE, HINT_HEADING_TO, HINT_SEEN_TALKING, Hint, hint_text
+
+CHARACTERS = list(CHARACTER_INFO)
+
+NUM_HINTS = 4
+
+# Room slots and pathway cells of the layout, in row-major order.
+ROOM_SLOTS = np.array(
+    [(r, c) for r, row in enumerate(DEFAULT_LAYOUT) for c, cell in enumerate(row) if cell.startswith('R')],
+    dtype=np.int8,
+)
+PATH_CELLS = np.array(
+    [(r, c) for r, row in enumerate(DEFAULT_LAYOUT) for c, cell in enumerate(row) if cell == 'P'],
+    dtype=np.int8,
+)
+
+
+# Random permutation of range(width) for every row, shape (n, width).
+def _permutations(rng, n, width):
+    return np.argsort(rng.random((n, width)), axis=1)
+
+
+# Random value in range(count) that skips the excluded index in each row.
+def _choice_excluding(rng, excluded, count, size=None):
+    size = size or excluded.shape
+    values = rng.integers(0, count - 1, size=size)
+    return values + (values >= excluded.reshape(excluded.shape + (1,) * (len(size) - excluded.ndim)))
+
+
+class GameBatch:
+    # N games stored as parallel NumPy arrays (one row per game) instead of N board objects.
+    #   murderer, weapon, room:   solution indexes into CHARACTERS, WEAPONS, ROOMS     (n,)
+    #   room_slot:                slot index in ROOM_SLOTS for each room               (n, 9)
+    #   room_weapon:              weapon index in each room, -1 for an empty room      (n, 9)
+    #   hint_kind:                HINT_* kind of each hint spot                        (n, 4)
+    #   hint_character:           character named by the hint, -1 if none             (n, 4)
+    #   hint_room:                room named by the hint, -1 if none                   (n, 4)
+    #   hint_cell:                index into PATH_CELLS of each hint spot              (n, 4)
+    def __init__(self, n, seed=None):
+        rng = np.random.default_rng(seed)
+        self.size = n
+        self.generate_solutions(rng)
+        self.assign_random_positions(rng)
+        self.setup_weapons(rng)
+        self.generate_hints(rng)
+
+    def generate_solutions(self, rng):
+        self.murderer = rng.integers(0, len(CHARACTERS), self.size, dtype=np.int8)
+        self.weapon = rng.integers(0, len(WEAPONS), self.size, dtype=np.int8)
+        self.room = rng.integers(0, len(ROOMS), self.size, dtype=np.int8)
+
+    def assign_random_positions(self, rng):
+        self.room_slot = _permutations(rng, self.size, len(ROOMS)).astype(np.int8)
+
+    # Murder weapon goes in the murder room, the other five go to five of the remaining rooms.
+    def setup_weapons(self, rng):
+        n = self.size
+        rows = np.arange(n)[:, None]
+        self.room_weapon = np.full((n, len(ROOMS)), -1, dtype=np.int8)
+        self.room_weapon[np.arange(n), self.room] = self.weapon
+
+        other_weapons = np.arange(len(WEAPONS) - 1)[None, :]
+        other_weapons = other_weapons + (other_weapons >= self.weapon[:, None])
+
+        keys = rng.random((n, len(ROOMS)))
+        keys[np.arange(n), self.room] = np.inf
+        other_rooms = np.argsort(keys, axis=1)[:, :len(WEAPONS) - 1]
+        self.room_weapon[rows, other_rooms] = other_weapons
+
+    def generate_hints(self, rng):
+        n = self.size
+        self.hint_kind = _permutations(rng, n, NUM_HINTS).astype(np.int8)
+        self.hint_character = np.full((n, NUM_HINTS), -1, dtype=np.int8)
+        self.hint_room = np.full((n, NUM_HINTS), -1, dtype=np.int8)
+
+        innocent = _choice_excluding(rng, self.murderer, len(CHARACTERS), (n, NUM_HINTS)).astype(np.int8)
+        other_room = _choice_excluding(rng, self.room, len(ROOMS), (n,)).astype(np.int8)
+        solution_room = np.broadcast_to(self.room[:, None], (n, NUM_HINTS))
+        kind = self.hint_kind
+
+        names_character = (kind == HINT_WAS_IN_ROOM) | (kind == HINT_HEADING_TO) | (kind == HINT_SEEN_TALKING)
+        self.hint_character[names_character] = innocent[names_character]
+        self.hint_room[kind == HINT_WAS_IN_ROOM] = np.broadcast_to(other_room[:, None], (n, NUM_HINTS))[kind == HINT_WAS_IN_ROOM]
+        names_solution_room = (kind == HINT_LOUD_NOISE) | (kind == HINT_HEADING_TO)
+        self.hint_room[names_solution_room] = solution_room[names_solution_room]
+
+        self.hint_cell = _permutations(rng, n, len(PATH_CELLS))[:, :NUM_HINTS].astype(np.int16)
+
+    # Vectorized Game.make_suggestion: True where the suggestion matches the solution.
+    def check_suggestions(self, murderer, weapon, room, games=None):
+        if games is None:
+            return (murderer == self.murderer) & (weapon == self.weapon) & (room == self.room)
+        return (murderer == self.murderer[games]) & (weapon == self.weapon[games]) & (room == self.room[games])
+
+    # Grid (row, col) of every room, shape (n, 9, 2).
+    def room_positions(self):
+        return ROOM_SLOTS[self.room_slot]
+
+    # Grid (row, col) of every hint spot, shape (n, 4, 2).
+    def hint_positions(self):
+        return PATH_CELLS[self.hint_cell]
+
+    # The solution of one game in the dict form used by Game.
+    def solution(self, index):
+        return {
+            "murderer": CHARACTERS[self.murderer[index]],
+            "weapon": WEAPONS[self.weapon[index]],
+            "room": ROOMS[self.room[index]],
+        }
+
+    # The hints of one game as deduction.Hint values.
+    def hints(self, index):
+        murderer = CHARACTERS[self.murderer[index]]
+        hints = []
+        for kind, character, room in zip(self.hint_kind[index], self.hint_character[index], self.hint_room[index]):
+            if kind == HINT_WAS_IN_ROOM:
+                hints.append(Hint(HINT_WAS_IN_ROOM, CHARACTERS[character], ROOMS[room]))
+            elif kind == HINT_LOUD_NOISE:
+                hints.append(Hint(HINT_LOUD_NOISE, room=ROOMS[room]))
+            elif kind == HINT_HEADING_TO:
+                hints.append(Hint(HINT_HEADING_TO, CHARACTERS[character], ROOMS[room]))
+            else:
+                hints.append(Hint(HINT_SEEN_TALKING, CHARACTERS[character], partner=murderer))
+        return hints
+
+    # The hint texts of one game, worded like MansionBoard.generate_hints.
+    def hint_texts(self, index):
+        return [hint_text(hint) for hint in self.hints(index)]
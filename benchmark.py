@@ -0,0 +1,442 @@
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+# Run without a display.
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame
+
+from board import MansionBoard, make_layout
+from camera import Camera
+from characters import characters as CHARACTERS, weapons as WEAPONS, rooms as ROOMS
+from engine import GameSession
+from game_logic import Game
+from player import Player
+
+# Baselines are times on the machine that recorded them. Before each benchmark a run also
+# times bench_calibration, plain Python that no game code changes, and saves the median of
+# those times as CALIBRATION. Results are compared against the baseline scaled by how much
+# faster or slower this machine ran the calibration. That evens out most of the difference
+# between machines; for a strict gate, record a baseline with --save-baseline on the machine
+# that runs the comparison and compare against that.
+BASELINE_FILE = "benchmark_baseline.json"
+CALIBRATION = "calibration"
+RESOLUTIONS = [(800, 600), (1920, 1080), (3840, 2160)]
+SOLUTION = {"murderer": "Mrs. White", "weapon": "Rope", "room": "Study"}
+
+
+def new_board():
+    board = MansionBoard()
+    board.setup_rooms()
+    board.setup_weapons(SOLUTION)
+    board.generate_hints(SOLUTION)
+    return board
+
+
+# Each benchmark is set up once and returns the function that gets timed.
+# Sorting, arithmetic and a dict build over a fixed list: the machine's speed, not the game's.
+def bench_calibration():
+    data = [random.Random(0).random() for _ in range(1000)]
+
+    def run():
+        total = 0.0
+        for i, x in enumerate(sorted(data)):
+            total += i * x
+        return {i: x for i, x in enumerate(data)}, total
+    return run
+
+
+def bench_board_init():
+    return MansionBoard
+
+
+def bench_assign_random_positions():
+    return MansionBoard().assign_random_positions
+
+
+def bench_generate_hints():
+    board = new_board()
+    return lambda: board.generate_hints(SOLUTION)
+
+
+def bench_pick_hint_set():
+    from hint_analysis import pick_hint_set
+
+    rng = random.Random(0)
+    return lambda: pick_hint_set(SOLUTION, rng, 4.0)
+
+
+def bench_setup_weapons():
+    board = new_board()
+    return lambda: board.setup_weapons(SOLUTION)
+
+
+def bench_player_move():
+    board = new_board()
+    player = Player("Detective", (3, 4))
+    moves = [(0, 1), (0, 1), (0, -1), (0, -1), (1, 0), (-1, 0), (0, -1), (0, 1)]
+    state = {"i": 0}
+
+    def run():
+        player.move(moves[state["i"] % len(moves)], board)
+        state["i"] += 1
+    return run
+
+
+def bench_make_suggestion():
+    board = new_board()
+    game = Game(board, Player("Detective", (3, 4)))
+    guesses = [(c, w, r) for c in CHARACTERS for w in WEAPONS for r in ROOMS]
+    state = {"i": 0}
+
+    def run():
+        game.make_suggestion(*guesses[state["i"] % len(guesses)])
+        state["i"] += 1
+    return run
+
+
+# Logging one event to the structured event log (the writer thread formats and writes it).
+def bench_event_log_emit():
+    from event_log import MOVED, EventLog
+
+    log = EventLog(os.devnull)
+    return lambda: log.emit(MOVED, 1, 3, 4)
+
+
+# Planning one opponent's turn, as the planner's worker does it.
+def bench_plan_turn():
+    from opponents import Opponents, TurnPlanner, plan_turn
+
+    planner = TurnPlanner("inline")
+    Opponents(GameSession(rng=random.Random(0)).board, rng=random.Random(0), planner=planner).start_round()
+    requests = [planner.results.get()[0] for _ in range(planner.results.qsize())]
+    state = {"i": 0}
+
+    def run():
+        plan_turn(requests[state["i"] % len(requests)])
+        state["i"] += 1
+    return run
+
+
+# The "which room is the player in" lookup that the main loop does every frame.
+def bench_room_lookup():
+    session = GameSession(rng=random.Random(0))
+    positions = [(r, c) for r in range(session.board.rows) for c in range(session.board.cols)]
+    state = {"i": 0}
+
+    def run():
+        session.room_at(positions[state["i"] % len(positions)])
+        state["i"] += 1
+    return run
+
+
+# Starting a new game: generating a random puzzle, or taking one from a puzzle catalogue.
+def bench_new_session():
+    rng = random.Random(0)
+    return lambda: GameSession(rng=rng)
+
+
+def bench_new_session_from_catalogue():
+    import tempfile
+    from puzzles import Catalogue, build_catalogue
+
+    path = os.path.join(tempfile.mkdtemp(), "puzzles.bin")
+    build_catalogue(path, 50, plays=1, workers=1)
+    catalogue = Catalogue(path)
+    rng = random.Random(0)
+    return lambda: catalogue.new_session("medium", rng)
+
+
+# Generating and validating a 21x21 mansion layout, and starting a game on one taken from
+# a layout library, which skips both.
+def bench_generate_layout():
+    from layouts import generate_layout
+
+    rng = random.Random(0)
+    return lambda: generate_layout(21, 21, rng)
+
+
+def bench_new_session_from_layout_library():
+    import tempfile
+    from layouts import LayoutLibrary, build_library
+
+    path = os.path.join(tempfile.mkdtemp(), "layouts.bin")
+    build_library(path, 50, workers=1)
+    library = LayoutLibrary(path)
+    rng = random.Random(0)
+    return lambda: library.new_session(rng)
+
+
+# Handing a finished game to the results store; the database is written by its own thread.
+def bench_results_record():
+    import tempfile
+    from results import SOLVED, GameRecord, ResultsStore
+
+    store = ResultsStore(os.path.join(tempfile.mkdtemp(), "results.db"))
+    result = GameRecord(time.time(), SOLVED, "Miss Scarlet", "Rope", "Study", "0" * 16, 7, 9, 12, 300.0, 5,
+                        ["Miss Scarlet with Rope in Study"], ["A loud noise was heard in the Study."])
+    return lambda: store.record(result)
+
+
+# Saving and restoring a mid-game session, and rebuilding a whole game from its action log.
+def bench_snapshot_dumps():
+    from snapshot import dumps
+
+    session = GameSession(rng=random.Random(0))
+    return lambda: dumps(session)
+
+
+def bench_snapshot_loads():
+    from snapshot import dumps, loads
+
+    data = dumps(GameSession(rng=random.Random(0)))
+    return lambda: loads(data)
+
+
+def bench_replay_game():
+    from simulation import deductive_suggestion, room_seeker
+    from snapshot import ActionLog, replay
+
+    log = ActionLog(0)
+    session = log.new_session()
+    while not session.solved:
+        session.roll()
+        while session.spaces_left_to_move > 0:
+            session.move(room_seeker(session))
+        suggestion = session.can_suggest() and deductive_suggestion(session)
+        if suggestion:
+            session.suggest(*suggestion)
+    return lambda: replay(log)
+
+
+def bench_render(size):
+    def setup():
+        board = new_board()
+        surface = pygame.Surface(size)
+        return lambda: board.render(surface, *size)
+    return setup
+
+
+def bench_render_labels(size):
+    def setup():
+        board = new_board()
+        surface = pygame.Surface(size)
+        return lambda: board.render_labels(surface, *size)
+    return setup
+
+
+# A scrolled view into a large mansion; should cost the same whatever the board size.
+def bench_render_camera(rows, cols, size=(1920, 1080)):
+    def setup():
+        board = MansionBoard(layout=make_layout(rows, cols))
+        board.setup_rooms()
+        board.generate_hints(SOLUTION)
+        surface = pygame.Surface(size)
+        camera = Camera(rows, cols, *size)
+        camera.follow((rows // 2, cols // 2))
+        return lambda: board.render(surface, *size, camera)
+    return setup
+
+
+# recompose: scroll a row each call so the list is drawn again and put on screen every
+# time; otherwise the sheet is unchanged, as in most frames while it is open.
+def bench_note_sheet(entries, recompose=True):
+    def setup():
+        from screens import NoteSheetScreen
+
+        screen = pygame.display.get_surface()
+        width, height = screen.get_size()
+        suggestions = [f"{c} with {w} in {r}" for c in CHARACTERS for w in WEAPONS for r in ROOMS][:entries]
+        hints = [f"Hint number {i}." for i in range(entries)]
+        room_weapons = dict(zip(ROOMS, WEAPONS))
+        note_sheet = NoteSheetScreen()
+        note_sheet.update(suggestions, room_weapons, hints)
+        note_sheet.draw(screen, width, height)
+
+        def run():
+            if recompose:
+                note_sheet.scroll = (note_sheet.scroll + 1) % (note_sheet.max_scroll() + 1)
+            note_sheet.draw(screen, width, height)
+        return run
+    return setup
+
+
+# One frame of the whole main loop (events, game update and drawing) on fuzzed input,
+# starting a new game whenever one ends.
+def bench_main_loop_frame():
+    from backends import PygameBackend
+    from main import FRAME_MS, GameLoop, new_game
+    from ui_driver import FuzzInput
+
+    backend = PygameBackend()
+    backend.open(1280, 720, fullscreen=False)
+    rng = random.Random(0)
+    source = FuzzInput(random.Random(0), backend.size)
+    state = {"loop": None}
+
+    def run():
+        loop = state["loop"]
+        if loop is None or not loop.running:
+            loop = state["loop"] = GameLoop(backend, *new_game(rng=rng), rng=rng)
+        loop.step(source.events(loop.frames), now=loop.frames * FRAME_MS)
+    return run
+
+
+# Whole-process startup: a fresh interpreter that runs code and exits. The logic-only
+# path must not load pygame; the first-frame paths open a backend and draw the board once.
+STARTUP_SCRIPTS = {
+    "startup_logic": "import engine; engine.GameSession()",
+    "startup_first_frame_null": (
+        "import backends, engine; s = engine.GameSession(); b = backends.NullBackend(); "
+        "b.open(800, 600); b.draw(s.board, s.player)"
+    ),
+    "startup_first_frame_pygame": (
+        "import backends, engine; s = engine.GameSession(); b = backends.PygameBackend(); "
+        "b.open(800, 600, fullscreen=False); b.draw(s.board, s.player); b.close()"
+    ),
+}
+
+
+def bench_startup(code):
+    def setup():
+        return lambda: subprocess.run([sys.executable, "-c", code], check=True)
+    return setup
+
+
+BENCHMARKS = {
+    "board_init": bench_board_init,
+    "assign_random_positions": bench_assign_random_positions,
+    "generate_hints": bench_generate_hints,
+    "pick_hint_set": bench_pick_hint_set,
+    "setup_weapons": bench_setup_weapons,
+    "player_move": bench_player_move,
+    "make_suggestion": bench_make_suggestion,
+    "event_log_emit": bench_event_log_emit,
+    "plan_turn": bench_plan_turn,
+    "room_lookup": bench_room_lookup,
+    "new_session": bench_new_session,
+    "new_session_from_catalogue": bench_new_session_from_catalogue,
+    "generate_layout": bench_generate_layout,
+    "new_session_from_layout_library": bench_new_session_from_layout_library,
+    "results_record": bench_results_record,
+    "snapshot_dumps": bench_snapshot_dumps,
+    "snapshot_loads": bench_snapshot_loads,
+    "replay_game": bench_replay_game,
+    "main_loop_frame": bench_main_loop_frame,
+}
+for width, height in RESOLUTIONS:
+    BENCHMARKS[f"render_{width}x{height}"] = bench_render((width, height))
+    BENCHMARKS[f"render_labels_{width}x{height}"] = bench_render_labels((width, height))
+for rows, cols in [(7, 9), (100, 100), (2000, 2000)]:
+    BENCHMARKS[f"render_camera_{rows}x{cols}"] = bench_render_camera(rows, cols)
+for name, code in STARTUP_SCRIPTS.items():
+    BENCHMARKS[name] = bench_startup(code)
+for entries in (10, 100, 300):
+    BENCHMARKS[f"render_note_sheet_{entries}"] = bench_note_sheet(entries)
+BENCHMARKS["render_note_sheet_unchanged"] = bench_note_sheet(300, recompose=False)
+
+
+# Best time per call in microseconds over several repeats of about min_time seconds each.
+def measure(func, repeats=5, min_time=0.05):
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        number *= 2
+
+    best = elapsed / number
+    for _ in range(repeats - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best * 1e6
+
+
+def run(names, repeats):
+    pygame.init()
+    pygame.display.set_mode((1280, 720))
+    random.seed(0)
+    results = {}
+    calibrate = bench_calibration()
+    calibrations = []
+    for name in names:
+        # Timed next to each benchmark, so the median follows the machine through the run
+        calibrations.append(measure(calibrate, repeats=repeats))
+        results[name] = measure(BENCHMARKS[name](), repeats=repeats)
+        print(f"{name:32s} {results[name]:12.2f} us")
+    pygame.quit()
+    if calibrations:
+        results[CALIBRATION] = sorted(calibrations)[len(calibrations) // 2]
+        print(f"{CALIBRATION:32s} {results[CALIBRATION]:12.2f} us")
+    return results
+
+
+# Returns the names of benchmarks that are slower than baseline by more than threshold,
+# after scaling the baseline by the calibration times when both runs have one.
+def compare(results, baseline, threshold):
+    scale = 1.0
+    if CALIBRATION in results and CALIBRATION in baseline:
+        scale = results[CALIBRATION] / baseline[CALIBRATION]
+        print(f"The calibration took {scale:.2f}x the baseline's time here; baseline times are scaled by that")
+    regressions = []
+    for name, value in results.items():
+        if name not in baseline or name == CALIBRATION:
+            continue
+        expected = baseline[name] * scale
+        change = value / expected - 1
+        status = "REGRESSION" if change > threshold else "ok"
+        print(f"{name:32s} {expected:12.2f} -> {value:12.2f} us  {change:+7.1%}  {status}")
+        if change > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Cluedo engine and render paths.")
+    parser.add_argument("--output", default="benchmark_results.json", help="Where to save the results.")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="Baseline results to compare against.")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline.")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown before failing (0.25 = 25%%).")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--filter", default="", help="Only run benchmarks whose name contains this text.")
+    args = parser.parse_args()
+
+    names = [name for name in BENCHMARKS if args.filter in name]
+    results = run(names, args.repeats)
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"Saved baseline to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one.")
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    print()
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,179 +1,426 @@
 import random
-import pygame
+from array import array
+from collections.abc import Mapping
+from functools import lru_cache
+from itertools import compress
+from types import MappingProxyType
+
+from characters import characters as CHARACTERS, rooms as ROOMS, weapons as WEAPONS
+from deduction import (
+    HINT_WAS_IN_ROOM, HINT_LOUD_NOISE, HINT_HEADING_TO, HINT_SEEN_TALKING, Hint, hint_text, shared_hint_text,
+)
+
+# Cell type codes used by the compact grid. Doors are the walkable cells between a room
+# and the corridors in generated layouts (see layouts.py).
+CELL_WALL = 0
+CELL_PATH = 1
+CELL_ROOM = 2
+CELL_DOOR = 3
+# Maps cell codes to 1 for walkable cells and 0 for walls (used with bytearray.translate).
+WALKABLE_CODES = bytes([0, 1, 1, 1]) + bytes(252)
+
+# Rooms and weapons are stored on a board as small integer codes: their index here.
+CHARACTER_NAMES = tuple(CHARACTERS)
+ROOM_NAMES = tuple(ROOMS)
+ROOM_CODES = {name: code for code, name in enumerate(ROOM_NAMES)}
+WEAPON_NAMES = tuple(WEAPONS)
+WEAPON_CODES = {name: code for code, name in enumerate(WEAPON_NAMES)}
+NO_WEAPON = 255
+
+# Pictures shown when entering each room; one table shared by every board.
+ROOM_IMAGES = MappingProxyType({
+    "Bedroom": "room_images/Bedroom.webp",
+    "Bathroom": "room_images/Bath.webp",
+    "Study": "room_images/Study.webp",
+    "Kitchen": "room_images/Kitchen.webp",
+    "Game Room": "room_images/GameRoom.webp",
+    "Dining Room": "room_images/DiningRoom.webp",
+    "Garage": "room_images/Garage.webp",
+    "Courtyard": "room_images/Courtyard.webp",
+    "Living Room": "room_images/LivingRoom.webp",
+})
+
+# Grid Game Layout: W = wall, P = pathway, D = door, R1-R9 = room slots.
+DEFAULT_LAYOUT = [
+    ['W', 'W', 'W', 'W', 'W', 'W', 'W', 'W', 'W'],
+    ['W', 'R1', 'P', 'R2', 'P', 'R3', 'P', 'R4', 'W'],
+    ['W', 'P', 'P', 'P', 'P', 'P', 'P', 'P', 'W'],
+    ['W', 'R5', 'P', 'P', 'P', 'P', 'P', 'R6', 'W'],
+    ['W', 'P', 'P', 'P', 'P', 'P', 'P', 'P', 'W'],
+    ['W', 'R7', 'P', 'P', 'R8', 'P', 'P', 'R9', 'W'],
+    ['W', 'W', 'W', 'W', 'W', 'W', 'W', 'W', 'W'],
+]
+
+# Layout tables are kept for this many layouts.
+MAX_CACHED_LAYOUTS = 16
+_layout_tables = {}
+
+
+# A mansion of any size (at least 5x5): outer walls, open pathways and the nine
+# room slots spread over a 3x3 pattern. 7x9 gives the standard layout.
+@lru_cache(maxsize=MAX_CACHED_LAYOUTS)
+def make_layout(rows, cols):
+    if (rows, cols) == (len(DEFAULT_LAYOUT), len(DEFAULT_LAYOUT[0])):
+        return DEFAULT_LAYOUT
+    if rows < 5 or cols < 5:
+        raise ValueError(f"A mansion needs at least 5x5 cells, got {rows}x{cols}")
+
+    layout = [['W'] * cols]
+    layout += [['W'] + ['P'] * (cols - 2) + ['W'] for _ in range(rows - 2)]
+    layout += [['W'] * cols]
+    for i in range(3):
+        for j in range(3):
+            row = 1 + (rows - 3) * i // 2
+            col = 1 + (cols - 3) * j // 2
+            layout[row][col] = f"R{3 * i + j + 1}"
+    return layout
+
+
+# For each cell code, a bytes.translate table mapping it to 1 and every other code to 0.
+_CODE_MASKS = [bytes(value == code for value in range(256)) for code in range(CELL_DOOR + 1)]
+
+
+# Flat indexes of the cells with a given code, in order.
+def cells_with_code(cells, code):
+    return list(compress(range(len(cells)), cells.translate(_CODE_MASKS[code])))
+
+
+# Cell codes, walkable map, room slots, pathway cells and the player's start position of a
+# layout, computed once per layout. Pathway cells are stored as flat (row * cols + col)
+# indexes so huge boards stay small. cells: the layout's cell codes if they are already
+# known (e.g. read from a layout library), so the layout's text is not scanned.
+def layout_tables(layout, cells=None):
+    cached = _layout_tables.get(id(layout))
+    if cached is not None and cached[0] is layout:
+        return cached[1]
+
+    cols = len(layout[0])
+    if cells is not None:
+        room_slots = [divmod(cell, cols) for cell in cells_with_code(cells, CELL_ROOM)]
+        path_cells = cells_with_code(cells, CELL_PATH)
+    else:
+        cells = bytearray(len(layout) * cols)
+        room_slots = []
+        path_cells = []
+        for row_idx, row in enumerate(layout):
+            for col_idx, cell in enumerate(row):
+                if cell == 'W':
+                    code = CELL_WALL
+                elif cell == 'P':
+                    code = CELL_PATH
+                    path_cells.append(row_idx * cols + col_idx)
+                elif cell == 'D':
+                    code = CELL_DOOR
+                else:
+                    code = CELL_ROOM
+                    room_slots.append((row_idx, col_idx))
+                cells[row_idx * cols + col_idx] = code
+
+    walkable = bytes(cells.translate(WALKABLE_CODES))
+    # The player starts in the middle of the mansion, or on the first pathway if that is a wall.
+    start_position = (len(layout) // 2, cols // 2)
+    if not walkable[start_position[0] * cols + start_position[1]]:
+        start_position = divmod(path_cells[0], cols)
+    tables = (bytes(cells), walkable, tuple(room_slots), array('i', path_cells), start_position)
+    if len(_layout_tables) >= MAX_CACHED_LAYOUTS:
+        del _layout_tables[next(iter(_layout_tables))]
+    _layout_tables[id(layout)] = (layout, tables)
+    return tables
+
+
+class RoomInfo(Mapping):
+    """
+    One room of a board, read and written like a {"position": ..., "weapon": ...} dict.
+    The board stores rooms as integer codes; these views are made when asked for.
+    """
+
+    __slots__ = ("board", "code")
+    KEYS = ("position", "weapon")
+
+    def __init__(self, board, code):
+        self.board = board
+        self.code = code
+
+    def __getitem__(self, key):
+        board = self.board
+        if key == "position":
+            cell = board.room_cells[self.code]
+            return None if cell < 0 else divmod(cell, board.cols)
+        if key == "weapon":
+            weapon = board.room_weapons[self.code]
+            return None if weapon == NO_WEAPON else WEAPON_NAMES[weapon]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        board = self.board
+        if key == "position":
+            board.room_cells[self.code] = -1 if value is None else value[0] * board.cols + value[1]
+            board.index_rooms()
+        elif key == "weapon":
+            board.room_weapons[self.code] = NO_WEAPON if value is None else WEAPON_CODES[value]
+        else:
+            raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self.KEYS)
+
+    def __len__(self):
+        return len(self.KEYS)
+
+
+class RoomTable(Mapping):
+    # board.rooms: room name -> RoomInfo, in ROOM_NAMES order.
+    __slots__ = ("board",)
+
+    def __init__(self, board):
+        self.board = board
+
+    def __getitem__(self, room_name):
+        return RoomInfo(self.board, ROOM_CODES[room_name])
+
+    def __iter__(self):
+        return iter(ROOM_NAMES)
+
+    def __len__(self):
+        return len(ROOM_NAMES)
 
 
 class MansionBoard:
-    def __init__(self):
-        # Grid Game Layout
-        self.grid = [
-            ['W', 'W', 'W', 'W', 'W', 'W', 'W', 'W', 'W'],
-            ['W', 'R1', 'P', 'R2', 'P', 'R3', 'P', 'R4', 'W'],
-            ['W', 'P', 'P', 'P', 'P', 'P', 'P', 'P', 'W'],
-            ['W', 'R5', 'P', 'P', 'P', 'P', 'P', 'R6', 'W'],
-            ['W', 'P', 'P', 'P', 'P', 'P', 'P', 'P', 'W'],
-            ['W', 'R7', 'P', 'P', 'R8', 'P', 'P', 'R9', 'W'],
-            ['W', 'W', 'W', 'W', 'W', 'W', 'W', 'W', 'W'],
-        ]
-
-        # Positions of Rooms
-        self.rooms = {
-            "Bedroom": {"position": None, "weapon": None},
-            "Bathroom": {"position": None, "weapon": None},
-            "Study": {"position": None, "weapon": None},
-            "Kitchen": {"position": None, "weapon": None},
-            "Game Room": {"position": None, "weapon": None},
-            "Dining Room": {"position": None, "weapon": None},
-            "Garage": {"position": None, "weapon": None},
-            "Courtyard": {"position": None, "weapon": None},
-            "Living Room": {"position": None, "weapon": None},
-        }
+    """
+    The mansion: layout, room positions, the weapon in each room and the hint spots.
+    Everything that depends only on the layout is shared between boards (see
+    layout_tables); a board itself holds just its rooms and hints as small integer
+    codes and flat (row * cols + col) cells, so idle games take little memory, plus small
+    cell -> room and cell -> hint dicts so room_at and get_hint are O(1) on any board size.
+    """
 
-        self.room_images = {
-            "Bedroom": "room_images/Bedroom.webp",
-            "Bathroom": "room_images/Bath.webp",
-            "Study": "room_images/Study.webp",
-            "Kitchen": "room_images/Kitchen.webp",
-            "Game Room": "room_images/GameRoom.webp",
-            "Dining Room": "room_images/DiningRoom.webp",
-            "Garage": "room_images/Garage.webp",
-            "Courtyard": "room_images/Courtyard.webp",
-            "Living Room": "room_images/LivingRoom.webp",
-        }
+    __slots__ = (
+        "rng", "layout", "rows", "cols", "cells", "walkable", "room_slots", "path_cells", "start_position",
+        "room_cells", "room_weapons", "hint_cells", "generated_hints", "room_index", "hint_index",
+        "layout_version",
+    )
+
+    room_names = ROOM_NAMES
+    room_images = ROOM_IMAGES
+
+    # puzzle: optional puzzles.Puzzle whose room positions are used instead of random ones.
+    def __init__(self, rng=None, layout=None, puzzle=None):
+        # Random source for layout, weapons and hints (a random.Random for simulations)
+        self.rng = rng or random
+
+        # Room cells (-1 while unplaced) and weapon codes, by room code
+        self.room_cells = array('i', [-1]) * len(ROOM_NAMES)
+        self.room_weapons = bytearray([NO_WEAPON]) * len(ROOM_NAMES)
+        # Hint spot cells; hint i is at hint_cells[i]
+        self.hint_cells = array('i')
+        self.generated_hints = []
+        # Room code and hint number by cell, for the rooms and hints that are placed
+        self.room_index = {}
+        self.hint_index = {}
+        # Bumped whenever something drawn on the static board changes (rooms, labels, hint spots)
+        self.layout_version = 0
+        # Grid Game Layout (the standard mansion unless another layout, e.g. make_layout(), is given)
+        self.build_indexes(layout or DEFAULT_LAYOUT)
+        if puzzle is None:
+            self.assign_random_positions()
+        else:
+            for code, (row, col) in enumerate(puzzle.room_positions):
+                self.room_cells[code] = row * self.cols + col
+            self.index_rooms()
+            self.layout_version += 1
+
+    # Point the board at the shared tables of its layout: cell type codes, a walkable map,
+    # the lists of room slots and pathway cells, and the start position.
+    def build_indexes(self, layout=DEFAULT_LAYOUT):
+        self.layout = layout
+        self.rows = len(layout)
+        self.cols = len(layout[0])
+        self.cells, self.walkable, self.room_slots, self.path_cells, self.start_position = layout_tables(layout)
+
+    # Positions and weapons of the rooms, by name: board.rooms[room]["position"].
+    @property
+    def rooms(self):
+        return RoomTable(self)
+
+    # The layout as rows of cell names, with room names in the cells rooms are placed on.
+    # Built when asked for; the board itself only keeps the shared layout.
+    @property
+    def grid(self):
+        grid = [row[:] for row in self.layout]
+        for code, cell in enumerate(self.room_cells):
+            if cell >= 0:
+                row, col = divmod(cell, self.cols)
+                grid[row][col] = ROOM_NAMES[code]
+        return grid
+
+    # Position of a room, by name.
+    def room_position(self, room_name):
+        return divmod(self.room_cells[ROOM_CODES[room_name]], self.cols)
 
-        self.hint_spots = {}  
-        self.generated_hints = []  
-        self.assign_random_positions()
+    # Point the cell -> room index at the current room positions.
+    def index_rooms(self):
+        self.room_index = {cell: code for code, cell in enumerate(self.room_cells) if cell >= 0}
+
+    # Name of the room at this position, or None.
+    def room_at(self, position):
+        row, col = position
+        if 0 <= row < self.rows and 0 <= col < self.cols:
+            code = self.room_index.get(row * self.cols + col)
+            if code is not None:
+                return ROOM_NAMES[code]
+        return None
+
+    def is_walkable(self, row, col):
+        return 0 <= row < self.rows and 0 <= col < self.cols and self.walkable[row * self.cols + col] == 1
 
     # Assign random unique positions to the rooms.
     def assign_random_positions(self):
-        rows = len(self.grid)
-        cols = len(self.grid[0])
+        valid_positions = list(self.room_slots)  # Room slots only
 
-        valid_positions = [
-            (row_idx, col_idx)
-            for row_idx, row in enumerate(self.grid)
-            for col_idx, cell in enumerate(row)
-            if cell.startswith('R')  # Room slots only
-        ]
+        self.rng.shuffle(valid_positions)
+        for code, (row, col) in zip(range(len(ROOM_NAMES)), valid_positions):
+            self.room_cells[code] = row * self.cols + col
+        self.index_rooms()
+        self.layout_version += 1
 
-        random.shuffle(valid_positions)
-        for room, position in zip(self.rooms.keys(), valid_positions):
-            self.rooms[room]["position"] = position
-
-    # Replace room IDs with the actual room names.
+    # Show the room names on the board and index where they are (the grid property and
+    # rendering read room_cells directly).
     def setup_rooms(self):
-        for room_name, info in self.rooms.items():
-            row, col = info["position"]
-            self.grid[row][col] = room_name
+        self.index_rooms()
+        self.layout_version += 1
 
     # Place murder weapon in the murder room and assign other weapons to the remaining rooms.
     def setup_weapons(self, solution):
-        weapons = ["Candlestick", "Dagger", "Lead Pipe", "Revolver", "Rope", "Wrench"]
+        weapons = list(WEAPON_NAMES)
         weapons.remove(solution["weapon"])
         solution_room = solution["room"]
-        self.rooms[solution_room]["weapon"] = solution["weapon"]
-        remaining_rooms = [room for room in self.rooms.keys() if room != solution_room]
-        random.shuffle(remaining_rooms)
+        self.room_weapons[ROOM_CODES[solution_room]] = WEAPON_CODES[solution["weapon"]]
+        remaining_rooms = [room for room in ROOM_NAMES if room != solution_room]
+        self.rng.shuffle(remaining_rooms)
         for room, weapon in zip(remaining_rooms, weapons):
-            self.rooms[room]["weapon"] = weapon
+            self.room_weapons[ROOM_CODES[room]] = WEAPON_CODES[weapon]
 
     # Generate random hints and place them at random positions on the grid.
-    def generate_hints(self, solution):
-        characters = [
-            "Miss Scarlet", "Professor Plum", "Mrs. Peacock",
-            "Reverend Green", "Colonel Mustard", "Mrs. White"
-        ]
-        non_solution_characters = [char for char in characters if char != solution["murderer"]]
-        non_solution_rooms = [room for room in self.rooms.keys() if room != solution["room"]]
-
-        # Hints
-        self.generated_hints = [
-            f"{random.choice(non_solution_characters)} was in the {random.choice(non_solution_rooms)} during the murder.",
-            f"A loud noise was heard in the {solution['room']}.",  
-            f"Someone saw {random.choice(non_solution_characters)} heading to the {solution['room']}.",
-            f"{random.choice(non_solution_characters)} and {solution['murderer']} were seen talking.", 
-        ]
-
-        random.shuffle(self.generated_hints)  
-        all_positions = [
-            (row_idx, col_idx)
-            for row_idx, row in enumerate(self.grid)
-            for col_idx, cell in enumerate(row)
-            if cell == 'P'  
-        ]
-        random.shuffle(all_positions)
-
-        self.hint_spots = {
-            all_positions[i]: self.generated_hints[i]
-            for i in range(min(len(all_positions), len(self.generated_hints)))
-        }
+    # With target_bits the hint set is chosen so that together the hints rule out about
+    # that many bits of the 324 possible solutions (see hint_analysis.pick_hint_set).
+    def generate_hints(self, solution, target_bits=None):
+        if target_bits is not None:
+            from hint_analysis import pick_hint_set
+
+            hints = pick_hint_set(solution, self.rng, target_bits)
+        else:
+            non_solution_characters = [char for char in CHARACTER_NAMES if char != solution["murderer"]]
+            non_solution_rooms = [room for room in ROOM_NAMES if room != solution["room"]]
+
+            # Hints
+            hints = [
+                Hint(HINT_WAS_IN_ROOM, self.rng.choice(non_solution_characters), self.rng.choice(non_solution_rooms)),
+                Hint(HINT_LOUD_NOISE, room=solution["room"]),
+                Hint(HINT_HEADING_TO, self.rng.choice(non_solution_characters), solution["room"]),
+                Hint(HINT_SEEN_TALKING, self.rng.choice(non_solution_characters), partner=solution["murderer"]),
+            ]
+        generated_hints = [hint_text(hint) for hint in hints]
+
+        self.rng.shuffle(generated_hints)  
+        picked = self.rng.sample(range(len(self.path_cells)), min(len(self.path_cells), len(generated_hints)))
+        self.place_hints(generated_hints, [divmod(self.path_cells[i], self.cols) for i in picked])
+
+    # Place the weapons and hints of a pre-generated puzzle (see puzzles.py).
+    def apply_puzzle(self, puzzle):
+        for code, weapon in enumerate(puzzle.room_weapons):
+            self.room_weapons[code] = NO_WEAPON if weapon is None else WEAPON_CODES[weapon]
+        self.place_hints([hint_text(hint) for hint in puzzle.hints], list(puzzle.hint_spots))
+
+    # Put hint texts on the given cells (the first hint on the first cell, and so on).
+    def place_hints(self, hints, positions):
+        self.generated_hints = [shared_hint_text(text) for text in hints]
+        count = min(len(positions), len(hints))
+        self.hint_cells = array('i', (row * self.cols + col for row, col in positions[:count]))
+        self.hint_index = {cell: i for i, cell in enumerate(self.hint_cells)}
+        self.layout_version += 1
+
+    # Hint spot positions and their hint texts, built when asked for.
+    @property
+    def hint_spots(self):
+        return {divmod(cell, self.cols): self.generated_hints[i] for i, cell in enumerate(self.hint_cells)}
 
     def get_hint(self, position):
-        return self.hint_spots.get(position, None)
+        row, col = position
+        if 0 <= row < self.rows and 0 <= col < self.cols:
+            i = self.hint_index.get(row * self.cols + col)
+            if i is not None:
+                return self.generated_hints[i]
+        return None
 
-    # Render the mansion grid on the pygame screen
-    def render(self, screen, screen_width, screen_height):
-        rows = len(self.grid)
-        cols = len(self.grid[0])
-        cell_width = screen_width // cols
-        cell_height = screen_height // rows
+    # Render the mansion grid on the pygame screen. Only the cells inside the camera's view
+    # are drawn; without a camera the whole board is scaled to the screen.
+    def render(self, screen, screen_width, screen_height, camera=None):
+        import pygame
+        from camera import Camera
+        from fonts import render_text
 
+        if camera is None:
+            camera = Camera.fit(self.rows, self.cols, screen_width, screen_height)
+        cell_width = camera.cell_width
+        cell_height = camera.cell_height
+
+        # Colours by cell code; a room slot with no room on it is drawn black
         colors = {
-            "W": (210, 180, 140),  # Walls
-            "P": (240, 234, 214),  # Pathways
-            "Bedroom": (173, 216, 230),  # Room colors
-            "Bathroom": (173, 216, 230),
-            "Study": (173, 216, 230),
-            "Kitchen": (173, 216, 230),
-            "Game Room": (173, 216, 230),
-            "Dining Room": (173, 216, 230),
-            "Garage": (173, 216, 230),
-            "Courtyard": (173, 216, 230),
-            "Living Room": (173, 216, 230),
+            CELL_WALL: (210, 180, 140),  # Walls
+            CELL_PATH: (240, 234, 214),  # Pathways
+            CELL_ROOM: (173, 216, 230),  # Rooms
+            CELL_DOOR: (181, 140, 95),   # Doors
         }
+        room_index = self.room_index
 
-        # Draw the grid
-        for row_idx, row in enumerate(self.grid):
-            for col_idx, cell in enumerate(row):
-                color = colors.get(cell, (0, 0, 0))  
-                pygame.draw.rect(
-                    screen,
-                    color,
-                    (col_idx * cell_width, row_idx * cell_height, cell_width, cell_height),
-                )
-                pygame.draw.rect(
-                    screen,
-                    (0, 0, 0),
-                    (col_idx * cell_width, row_idx * cell_height, cell_width, cell_height),
-                    1,
-                )
+        # Draw the visible part of the grid
+        first_row, last_row, first_col, last_col = camera.visible_cells()
+        for row_idx in range(first_row, last_row):
+            y = row_idx * cell_height - camera.y
+            for col_idx in range(first_col, last_col):
+                cell = row_idx * self.cols + col_idx
+                code = self.cells[cell]
+                if code == CELL_ROOM and cell not in room_index:
+                    code = None
+                color = colors.get(code, (0, 0, 0))
+                cell_rect = (col_idx * cell_width - camera.x, y, cell_width, cell_height)
+                pygame.draw.rect(screen, color, cell_rect)
+                pygame.draw.rect(screen, (0, 0, 0), cell_rect, 1)
 
         # Format Hint spots as " ? " on the grid.
-        font = pygame.font.Font(None, int(min(cell_width, cell_height) // 1.5)) 
+        font_size = int(min(cell_width, cell_height) // 1.5)
         question_mark_color = (0, 104, 0)  
+        question_mark = render_text("?", font_size, question_mark_color)
 
-        for (row, col), _ in self.hint_spots.items():
-            x = col * cell_width + cell_width // 2
-            y = row * cell_height + cell_height // 2
-            question_mark = font.render("?", True, question_mark_color)
-            question_mark_rect = question_mark.get_rect(center=(x, y))
-            screen.blit(question_mark, question_mark_rect)
+        for cell in self.hint_cells:
+            row, col = divmod(cell, self.cols)
+            if first_row <= row < last_row and first_col <= col < last_col:
+                question_mark_rect = question_mark.get_rect(center=camera.cell_center(row, col))
+                screen.blit(question_mark, question_mark_rect)
 
     # Render the room name labels.
-    def render_labels(self, screen, screen_width, screen_height):
-        rows = len(self.grid)
-        cols = len(self.grid[0])
-        cell_width = screen_width // cols
-        cell_height = screen_height // rows
+    def render_labels(self, screen, screen_width, screen_height, camera=None):
+        from fonts import render_text
+
+        # Without a camera the whole board is scaled to the screen, as Camera.fit does
+        if camera is None:
+            cell_width, cell_height = screen_width // self.cols, screen_height // self.rows
+            x = y = 0
+            first_row, last_row, first_col, last_col = 0, self.rows, 0, self.cols
+        else:
+            cell_width, cell_height = camera.cell_width, camera.cell_height
+            x, y = camera.x, camera.y
+            first_row, last_row, first_col, last_col = camera.visible
 
-        font = pygame.font.Font(None, int(min(cell_width, cell_height) // 4))  
+        font_size = int(min(cell_width, cell_height) // 4)
         text_color = (0, 0, 0)  # Black text
 
-        for room_name, info in self.rooms.items():
-            row, col = info["position"]
-            x = col * cell_width + cell_width // 2
-            y = row * cell_height + cell_height // 2
+        cols = self.cols
+        for code, cell in enumerate(self.room_cells):
+            row, col = divmod(cell, cols)
+            if cell < 0 or not (first_row <= row < last_row and first_col <= col < last_col):
+                continue
 
-            text = font.render(room_name, True, text_color)
-            text_rect = text.get_rect(center=(x, y))
-            screen.blit(text, text_rect)
+            text = render_text(ROOM_NAMES[code], font_size, text_color)
+            center = (col * cell_width - x + cell_width // 2, row * cell_height - y + cell_height // 2)
+            screen.blit(text, text.get_rect(center=center))
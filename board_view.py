@@ -0,0 +1,102 @@
+import pygame
+
+from camera import Camera
+from fonts import render_text
+from profiler import profiler
+
+# Outline of the cells the current move can end on.
+HIGHLIGHT_COLOR = (0, 160, 0)
+
+
+class BoardView:
+    """
+    Draws the main game screen in layers.
+    The static board (walls, paths, rooms, labels and hint spots) is composited once into a
+    background surface and only rebuilt when the screen size or board layout changes. The
+    player token and HUD text are drawn on top each frame, and only the rectangles they
+    cover (this frame and last frame) are pushed to the display.
+    Boards larger than the screen scroll with the player; the background then holds only
+    the visible cells and is rebuilt when the camera moves.
+    """
+
+    def __init__(self, board):
+        self.board = board
+        self.camera = None
+        self.background = None
+        self.background_key = None
+        self.previous_rects = []
+        self.previous_frame = None
+        self.needs_full_update = True
+
+    def get_camera(self, screen_width, screen_height):
+        camera = self.camera
+        if camera is None or (camera.screen_width, camera.screen_height) != (screen_width, screen_height):
+            camera = self.camera = Camera(self.board.rows, self.board.cols, screen_width, screen_height)
+        return camera
+
+    # The pre-composited static board for this screen size and camera position.
+    def get_background(self, screen_width, screen_height):
+        camera = self.get_camera(screen_width, screen_height)
+        key = (screen_width, screen_height, self.board.layout_version, camera.x, camera.y)
+        if key != self.background_key:
+            self.background = pygame.Surface((screen_width, screen_height))
+            self.background.fill((0, 0, 0))
+            self.board.render(self.background, screen_width, screen_height, camera)
+            self.board.render_labels(self.background, screen_width, screen_height, camera)
+            self.background_key = key
+            self.needs_full_update = True
+        return self.background
+
+    # Call when something else has been drawn over the board so the next frame redraws it all.
+    def invalidate(self):
+        self.needs_full_update = True
+
+    def draw(self, screen, player, hud, screen_width, screen_height, highlights=(), others=()):
+        """
+        Draws one frame of the game screen and updates the changed parts of the display.
+        Args:
+            screen: The display surface.
+            player: The Player whose token is drawn.
+            hud: List of (text, font size, color, position) tuples drawn over the board.
+            screen_width, screen_height: Size of the display.
+            highlights: Cells to outline, e.g. where the current move can end.
+            others: Other players (e.g. opponents.Opponent) whose tokens are drawn too.
+        """
+        self.get_camera(screen_width, screen_height).follow(player.position)
+        background = self.get_background(screen_width, screen_height)
+        profiler.mark("board")
+        frame = (player.position, tuple(hud), tuple(highlights), tuple(other.position for other in others))
+        if frame == self.previous_frame and not self.needs_full_update:
+            return
+
+        if self.needs_full_update:
+            screen.blit(background, (0, 0))
+        else:
+            # Put the background back where last frame's token and text were.
+            for rect in self.previous_rects:
+                screen.blit(background, rect, rect)
+
+        camera = self.camera
+        rects = []
+        for row, col in highlights:
+            if camera.is_visible(row, col):
+                cell_rect = pygame.Rect(camera.cell_to_screen(row, col), (camera.cell_width, camera.cell_height))
+                rects.append(pygame.draw.rect(screen, HIGHLIGHT_COLOR, cell_rect, 4))
+        for other in others:
+            if camera.is_visible(*other.position):
+                rects.append(other.render(screen, camera))
+        rects.append(player.render(screen, camera))
+        profiler.mark("player")
+        for text, size, color, position in hud:
+            rects.append(screen.blit(render_text(text, size, color), position))
+        profiler.mark("hud")
+
+        if self.needs_full_update:
+            pygame.display.flip()
+        else:
+            pygame.display.update(self.previous_rects + rects)
+        profiler.mark("display")
+
+        self.previous_rects = rects
+        self.previous_frame = frame
+        self.needs_full_update = False
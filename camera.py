@@ -0,0 +1,76 @@
+# Number of cells shown across and down the screen; boards this size or smaller fit on screen.
+VIEW_ROWS = 7
+VIEW_COLS = 9
+
+
+class Camera:
+    """
+    The part of the board visible on screen.
+    Cells are sized so that VIEW_ROWS x VIEW_COLS cells fill the screen, which makes the
+    standard 7x9 mansion fit exactly as before. Larger boards scroll: x and y are the
+    board pixel shown at the top left of the screen, kept centred on the player.
+    """
+
+    def __init__(self, board_rows, board_cols, screen_width, screen_height):
+        self.board_rows = board_rows
+        self.board_cols = board_cols
+        self.screen_width = screen_width
+        self.screen_height = screen_height
+        self.cell_width = screen_width // min(board_cols, VIEW_COLS)
+        self.cell_height = screen_height // min(board_rows, VIEW_ROWS)
+        self.x = 0
+        self.y = 0
+        # visible_cells() for the current view, kept up to date for is_visible()
+        self.visible = self.visible_cells()
+
+    # Camera that shows the whole board scaled to the screen (used when rendering without one).
+    @classmethod
+    def fit(cls, board_rows, board_cols, screen_width, screen_height):
+        camera = cls(board_rows, board_cols, screen_width, screen_height)
+        camera.cell_width = screen_width // board_cols
+        camera.cell_height = screen_height // board_rows
+        camera.visible = camera.visible_cells()
+        return camera
+
+    # Centre the view on a cell, staying inside the board. Returns True if the view moved.
+    def follow(self, position):
+        max_x = max(0, self.board_cols * self.cell_width - self.screen_width)
+        max_y = max(0, self.board_rows * self.cell_height - self.screen_height)
+        x = (position[1] * self.cell_width + self.cell_width // 2) - self.screen_width // 2
+        y = (position[0] * self.cell_height + self.cell_height // 2) - self.screen_height // 2
+        x = min(max(x, 0), max_x)
+        y = min(max(y, 0), max_y)
+        moved = (x, y) != (self.x, self.y)
+        if moved:
+            self.x, self.y = x, y
+            self.visible = self.visible_cells()
+        return moved
+
+    # First and last+1 rows and columns that intersect the screen.
+    def visible_cells(self):
+        first_row = self.y // self.cell_height
+        first_col = self.x // self.cell_width
+        last_row = min(self.board_rows, (self.y + self.screen_height - 1) // self.cell_height + 1)
+        last_col = min(self.board_cols, (self.x + self.screen_width - 1) // self.cell_width + 1)
+        return first_row, last_row, first_col, last_col
+
+    def is_visible(self, row, col):
+        first_row, last_row, first_col, last_col = self.visible
+        return first_row <= row < last_row and first_col <= col < last_col
+
+    # Screen position of a cell's top left corner.
+    def cell_to_screen(self, row, col):
+        return col * self.cell_width - self.x, row * self.cell_height - self.y
+
+    # Screen position of a cell's centre.
+    def cell_center(self, row, col):
+        return (col * self.cell_width - self.x + self.cell_width // 2,
+                row * self.cell_height - self.y + self.cell_height // 2)
+
+    # Cell under a screen position, or None if it is off the board.
+    def screen_to_cell(self, x, y):
+        row = (y + self.y) // self.cell_height
+        col = (x + self.x) // self.cell_width
+        if 0 <= row < self.board_rows and 0 <= col < self.board_cols:
+            return row, col
+        return None
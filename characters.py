@@ -10,3 +10,7 @@ characters = {
 
 # Potential Murder Weapons
 weapons = ["Candlestick", "Dagger", "Lead Pipe", "Revolver", "Rope", "Wrench"]
+
+
+# Rooms of the mansion
+rooms = ["Bedroom", "Bathroom", "Study", "Kitchen", "Game Room", "Dining Room", "Garage", "Courtyard", "Living Room"]
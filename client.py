@@ -0,0 +1,106 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from characters import characters as CHARACTERS, weapons as WEAPONS
+
+DIRECTION_NAMES = ["up", "down", "left", "right"]
+
+
+class ServerError(Exception):
+    pass
+
+
+class GameClient:
+    # Reference client for server.py: one connection, requests answered in order.
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect(cls, host="127.0.0.1", port=8765, unix_path=None):
+        if unix_path:
+            reader, writer = await asyncio.open_unix_connection(unix_path)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def request(self, action, **params):
+        self.writer.write(json.dumps(dict(params, action=action)).encode() + b"\n")
+        await self.writer.drain()
+        reply = json.loads(await self.reader.readline())
+        if not reply.pop("ok"):
+            raise ServerError(reply["error"])
+        return reply
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+# Play one game with random moves and suggestions. Returns the request latencies in seconds.
+async def play_random_game(client, seed, max_turns=200):
+    rng = random.Random(seed)
+    latencies = []
+
+    async def timed(action, **params):
+        start = time.perf_counter()
+        reply = await client.request(action, **params)
+        latencies.append(time.perf_counter() - start)
+        return reply
+
+    session = (await timed("new", seed=seed))["session"]
+    state = {"solved": False, "rolls": 0}
+    while not state["solved"] and state["rolls"] < max_turns:
+        state = (await timed("roll", session=session))["state"]
+        while state["spaces_left"] > 0:
+            state = (await timed("move", session=session, direction=rng.choice(DIRECTION_NAMES)))["state"]
+        if state["current_room"]:
+            state = (await timed("suggest", session=session, murderer=rng.choice(list(CHARACTERS)),
+                                 weapon=rng.choice(WEAPONS)))["state"]
+    await timed("close", session=session)
+    return latencies
+
+
+# Play many games at once over several connections and report throughput and latency.
+async def load_test(games, connections, host, port, unix_path):
+    clients = [await GameClient.connect(host, port, unix_path) for _ in range(connections)]
+
+    async def worker(client, seeds):
+        latencies = []
+        for seed in seeds:
+            latencies += await play_random_game(client, seed)
+        return latencies
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(
+        worker(client, range(i, games, connections)) for i, client in enumerate(clients)
+    ))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for result in results for latency in result)
+    stats = await clients[0].request("stats")
+    for client in clients:
+        await client.close()
+
+    print(f"{games} games, {len(latencies)} requests in {elapsed:.2f}s ({len(latencies) / elapsed:.0f} requests/s)")
+    print(f"round trip p50 {latencies[len(latencies) // 2] * 1e6:.0f} us, "
+          f"p99 {latencies[int(len(latencies) * 0.99)] * 1e6:.0f} us")
+    print(f"server: {json.dumps(stats, indent=2)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reference client for the Cluedo game server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="Connect to this Unix socket path instead of TCP.")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--connections", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(load_test(args.games, args.connections, args.host, args.port, args.unix))
+
+
+if __name__ == "__main__":
+    main()
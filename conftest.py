@@ -0,0 +1 @@
+# Lets the tests in tests/ import the game modules, which live at the top of the repository.
@@ -0,0 +1,167 @@
+from collections import namedtuple
+
+from characters import characters as CHARACTER_INFO, weapons as WEAPONS, rooms as ROOMS
+
+CHARACTERS = list(CHARACTER_INFO)
+CHARACTER_INDEX = {name: i for i, name in enumerate(CHARACTERS)}
+WEAPON_INDEX = {name: i for i, name in enumerate(WEAPONS)}
+ROOM_INDEX = {name: i for i, name in enumerate(ROOMS)}
+
+# Every (murderer, weapon, room) candidate is one bit: ((character * 6) + weapon) * 9 + room.
+NUM_CANDIDATES = len(CHARACTERS) * len(WEAPONS) * len(ROOMS)
+ALL_CANDIDATES = (1 << NUM_CANDIDATES) - 1
+
+
+def candidate_bit(character, weapon, room):
+    return ((character * len(WEAPONS)) + weapon) * len(ROOMS) + room
+
+
+# Candidates with a given murderer, weapon or room, built by shifting whole blocks of bits
+# rather than looping over all 324 candidates (this module is imported by every tool).
+_ROOM_BLOCK = (1 << len(ROOMS)) - 1
+_WEAPON_BLOCK = (1 << len(WEAPONS) * len(ROOMS)) - 1
+_EVERY_ROOM_BLOCK = sum(1 << (i * len(ROOMS)) for i in range(len(CHARACTERS) * len(WEAPONS)))
+_EVERY_WEAPON_BLOCK = sum(1 << (i * len(WEAPONS) * len(ROOMS)) for i in range(len(CHARACTERS)))
+CHARACTER_MASKS = [_WEAPON_BLOCK << (i * len(WEAPONS) * len(ROOMS)) for i in range(len(CHARACTERS))]
+WEAPON_MASKS = [(_ROOM_BLOCK << (i * len(ROOMS))) * _EVERY_WEAPON_BLOCK for i in range(len(WEAPONS))]
+ROOM_MASKS = [_EVERY_ROOM_BLOCK << i for i in range(len(ROOMS))]
+
+# Hint kinds, in the same order as the templates in MansionBoard.generate_hints.
+HINT_WAS_IN_ROOM = 0       # "{character} was in the {room} during the murder."
+HINT_LOUD_NOISE = 1        # "A loud noise was heard in the {room}."
+HINT_HEADING_TO = 2        # "Someone saw {character} heading to the {room}."
+HINT_SEEN_TALKING = 3      # "{character} and {partner} were seen talking."
+
+# A hint as data rather than text. Fields a kind does not use are None.
+Hint = namedtuple("Hint", ["kind", "character", "room", "partner"], defaults=(None, None, None))
+
+HINT_TEMPLATES = {
+    HINT_WAS_IN_ROOM: "{character} was in the {room} during the murder.",
+    HINT_LOUD_NOISE: "A loud noise was heard in the {room}.",
+    HINT_HEADING_TO: "Someone saw {character} heading to the {room}.",
+    HINT_SEEN_TALKING: "{character} and {partner} were seen talking.",
+}
+
+def _format_hint(hint):
+    return HINT_TEMPLATES[hint.kind].format(character=hint.character, room=hint.room, partner=hint.partner)
+
+
+# Every hint that can be written, by its text. Parsing is a dict lookup.
+_HINTS_BY_TEXT = {
+    _format_hint(hint): hint
+    for hint in (
+        [Hint(HINT_WAS_IN_ROOM, c, r) for c in CHARACTERS for r in ROOMS]
+        + [Hint(HINT_LOUD_NOISE, room=r) for r in ROOMS]
+        + [Hint(HINT_HEADING_TO, c, r) for c in CHARACTERS for r in ROOMS]
+        + [Hint(HINT_SEEN_TALKING, c, partner=p) for c in CHARACTERS for p in CHARACTERS if c != p]
+    )
+}
+_TEXTS_BY_HINT = {hint: text for text, hint in _HINTS_BY_TEXT.items()}
+
+
+# The text of a hint. Known hints always get the same string object, so boards holding
+# the same hint share one copy.
+def hint_text(hint):
+    text = _TEXTS_BY_HINT.get(hint)
+    return text if text is not None else _format_hint(hint)
+
+
+# The shared copy of a hint text (e.g. one decoded from a snapshot), or the text itself.
+def shared_hint_text(text):
+    hint = _HINTS_BY_TEXT.get(text)
+    return text if hint is None else _TEXTS_BY_HINT[hint]
+
+
+# The Hint a hint text was written from, or None if it is not a known hint.
+def parse_hint(text):
+    return _HINTS_BY_TEXT.get(text)
+
+
+# The candidates a hint leaves possible, as a mask to keep.
+def hint_mask(hint):
+    if hint.kind == HINT_WAS_IN_ROOM:
+        # The character was elsewhere (innocent), and that room was not the murder room
+        return ALL_CANDIDATES & ~(CHARACTER_MASKS[CHARACTER_INDEX[hint.character]] | ROOM_MASKS[ROOM_INDEX[hint.room]])
+    if hint.kind == HINT_LOUD_NOISE:
+        return ROOM_MASKS[ROOM_INDEX[hint.room]]
+    if hint.kind == HINT_HEADING_TO:
+        return ROOM_MASKS[ROOM_INDEX[hint.room]] & ~CHARACTER_MASKS[CHARACTER_INDEX[hint.character]]
+    return CHARACTER_MASKS[CHARACTER_INDEX[hint.character]] | CHARACTER_MASKS[CHARACTER_INDEX[hint.partner]]
+
+
+class Deduction:
+    """
+    The set of solutions still possible, stored as one bit per (murderer, weapon, room).
+    Each clue is applied as a single mask operation, and counting what is left is a popcount.
+    """
+
+    __slots__ = ("candidates",)
+
+    def __init__(self):
+        self.candidates = ALL_CANDIDATES
+
+    def keep(self, mask):
+        self.candidates &= mask
+
+    def remove(self, mask):
+        self.candidates &= ~mask
+
+    # A suggestion that was wrong rules out exactly that combination.
+    def failed_suggestion(self, murderer, weapon, room):
+        self.remove(1 << candidate_bit(CHARACTER_INDEX[murderer], WEAPON_INDEX[weapon], ROOM_INDEX[room]))
+
+    # The murder weapon is always in the murder room, and the other weapons are in other rooms.
+    # So a weapon seen in a room means: that room and that weapon are both in the solution, or neither is.
+    # An empty room cannot be the murder room.
+    def room_weapon(self, room, weapon):
+        room_mask = ROOM_MASKS[ROOM_INDEX[room]]
+        if weapon is None:
+            self.remove(room_mask)
+        else:
+            self.remove(room_mask ^ WEAPON_MASKS[WEAPON_INDEX[weapon]])
+
+    # Apply a hint found on a hint spot. Returns False if the text is not a known hint.
+    def hint(self, text):
+        hint = parse_hint(text)
+        if hint is None:
+            return False
+        self.keep(hint_mask(hint))
+        return True
+
+    def count(self):
+        return self.candidates.bit_count()
+
+    def is_possible(self, murderer, weapon, room):
+        bit = candidate_bit(CHARACTER_INDEX[murderer], WEAPON_INDEX[weapon], ROOM_INDEX[room])
+        return bool(self.candidates >> bit & 1)
+
+    # How many remaining candidates have each murderer, weapon and room.
+    def marginals(self):
+        candidates = self.candidates
+        return {
+            "characters": {name: (candidates & mask).bit_count() for name, mask in zip(CHARACTERS, CHARACTER_MASKS)},
+            "weapons": {name: (candidates & mask).bit_count() for name, mask in zip(WEAPONS, WEAPON_MASKS)},
+            "rooms": {name: (candidates & mask).bit_count() for name, mask in zip(ROOMS, ROOM_MASKS)},
+        }
+
+    # The remaining candidates as (murderer, weapon, room) names, optionally only for one room.
+    def remaining(self, room=None):
+        result = []
+        candidates = self.candidates
+        if room is not None:
+            candidates &= ROOM_MASKS[ROOM_INDEX[room]]
+        while candidates:
+            low = candidates & -candidates
+            bit = low.bit_length() - 1
+            character_weapon, room_index = divmod(bit, len(ROOMS))
+            character, weapon = divmod(character_weapon, len(WEAPONS))
+            result.append((CHARACTERS[character], WEAPONS[weapon], ROOMS[room_index]))
+            candidates ^= low
+        return result
+
+    # The solution once only one candidate is left, otherwise None.
+    def solution(self):
+        if self.count() != 1:
+            return None
+        murderer, weapon, room = self.remaining()[0]
+        return {"murderer": murderer, "weapon": weapon, "room": room}
@@ -0,0 +1,109 @@
+import random
+from board import MansionBoard
+from deduction import Deduction
+from event_log import HINT_FOUND, MOVED, ROOM_ENTERED
+from game_logic import Game
+from player import Player
+from reachability import reachability_for
+
+
+class GameSession:
+    # One game without any display: the board, the player and the state main() tracks while playing.
+    # events: optional event_log.EventLog the game's events (moves, hints, suggestions) are logged to.
+    # log: optional snapshot.ActionLog that every roll, move and suggestion is recorded to.
+    # puzzle: optional puzzles.Puzzle to play instead of a randomly generated one.
+    __slots__ = (
+        "rng", "log", "board", "player", "game", "spaces_left_to_move", "current_room", "last_room",
+        "hints_gathered", "suggestions_made", "room_weapons", "deduction", "rolls", "moves", "solved",
+    )
+
+    def __init__(self, rng=None, events=None, layout=None, log=None, hint_bits=None, puzzle=None):
+        self.rng = rng or random
+        self.log = log
+        self.board = MansionBoard(rng=self.rng, layout=layout, puzzle=puzzle)
+        self.board.setup_rooms()
+        if log is not None:
+            log.check_session(self.board, hint_bits, puzzle)
+        self.player = Player("Detective", self.board.start_position)
+        self.game = Game(self.board, self.player, rng=self.rng, events=events, hint_bits=hint_bits, puzzle=puzzle)
+
+        self.spaces_left_to_move = 0
+        self.current_room = None
+        self.last_room = None
+        self.hints_gathered = []
+        self.suggestions_made = []
+        self.room_weapons = {}
+        # What the clues found so far rule out
+        self.deduction = Deduction()
+        self.rolls = 0
+        self.moves = 0
+        self.solved = False
+
+    # Roll the dice at the start of a turn. Returns 0 if the player still has spaces to move.
+    # A known result (from a replayed log) can be passed in instead of rolling.
+    def roll(self, result=None):
+        if self.spaces_left_to_move > 0 or self.solved:
+            return 0
+        roll_result = result or self.rng.randint(1, 6)
+        self.spaces_left_to_move = roll_result
+        self.rolls += 1
+        if self.log is not None:
+            self.log.record_roll(roll_result)
+        return roll_result
+
+    # Move one space. Returns True if the player moved.
+    def move(self, direction):
+        if self.spaces_left_to_move == 0 or not self.player.move(direction, self.board):
+            return False
+        self.spaces_left_to_move -= 1
+        self.moves += 1
+        if self.log is not None:
+            self.log.record_move(direction)
+        if self.game.events is not None:
+            self.game.events.emit(MOVED, self.game.game_id, *self.player.position)
+        self.current_room = self.room_at(self.player.position)
+        if self.spaces_left_to_move == 0:
+            self.end_movement()
+        return True
+
+    # Called when the last space has been moved: pick up hints and reveal the room weapon.
+    def end_movement(self):
+        hint = self.board.get_hint(self.player.position)
+        if hint and hint not in self.hints_gathered:
+            self.hints_gathered.append(hint)
+            self.deduction.hint(hint)
+            if self.game.events is not None:
+                self.game.events.emit(HINT_FOUND, self.game.game_id, hint)
+
+        if self.current_room and self.current_room != self.last_room:
+            self.last_room = self.current_room
+            weapon = self.board.rooms[self.current_room]["weapon"]
+            self.room_weapons[self.current_room] = weapon
+            self.deduction.room_weapon(self.current_room, weapon)
+            if self.game.events is not None:
+                self.game.events.emit(ROOM_ENTERED, self.game.game_id, self.current_room, weapon)
+
+    def room_at(self, position):
+        return self.board.room_at(position)
+
+    # Cells where the current move can end (empty when there is nothing left to move).
+    def legal_destinations(self):
+        if self.spaces_left_to_move == 0:
+            return []
+        return reachability_for(self.board).exactly(self.player.position, self.spaces_left_to_move)
+
+    # Suggestions can only be made about the room the player is standing in, after moving.
+    def can_suggest(self):
+        return self.spaces_left_to_move == 0 and self.current_room is not None and not self.solved
+
+    # Make a suggestion about the current room. Returns True if it solves the mystery.
+    def suggest(self, murderer, weapon):
+        if not self.can_suggest():
+            return False
+        if self.log is not None:
+            self.log.record_suggestion(murderer, weapon)
+        self.suggestions_made.append(f"{murderer} with {weapon} in {self.current_room}")
+        self.solved = self.game.make_suggestion(murderer, weapon, self.current_room)
+        if not self.solved:
+            self.deduction.failed_suggestion(murderer, weapon, self.current_room)
+        return self.solved
@@ -0,0 +1,157 @@
+import json
+import os
+import sys
+import threading
+import time
+
+# Turn the event log on with CLUEDO_EVENTS=<file> (or "-" for stdout). CLUEDO_EVENT_SAMPLE
+# keeps only some events of a type, e.g. "moved=0.1,room_entered=0.5"; rates are between
+# 0 and 1, and 0 turns that type off.
+EVENTS_FILE = os.environ.get("CLUEDO_EVENTS")
+EVENT_SAMPLE = os.environ.get("CLUEDO_EVENT_SAMPLE", "")
+
+# Event types, and the fields each one is written with after "t", "event" and "game".
+# The log may go to stdout, so no event gives away a game's solution.
+GAME_STARTED = 0
+MOVED = 1
+ROOM_ENTERED = 2
+HINT_FOUND = 3
+HINT_PROVIDED = 4
+SUGGESTION_MADE = 5
+EVENT_NAMES = ("game_started", "moved", "room_entered", "hint_found", "hint_provided", "suggestion_made")
+EVENT_FIELDS = (
+    ("rows", "cols"),
+    ("row", "col"),
+    ("room", "weapon"),
+    ("hint",),
+    ("hint",),
+    ("murderer", "weapon", "room", "correct"),
+)
+EVENT_TYPES = {name: event for event, name in enumerate(EVENT_NAMES)}
+
+
+# Sampling rates from text such as "moved=0.1,room_entered=0.5".
+def parse_sampling(text):
+    rates = {}
+    for item in filter(None, (part.strip() for part in text.split(","))):
+        name, _, rate = item.partition("=")
+        if name not in EVENT_TYPES:
+            raise ValueError(f"Unknown event type {name!r}; expected one of {', '.join(EVENT_NAMES)}")
+        rates[name] = float(rate)
+    return rates
+
+
+class EventLog:
+    """
+    Game events (a game started, the player moved, found a hint, ...) as JSON lines.
+    emit() only puts a tuple in a preallocated ring buffer; a background thread turns
+    batches of them into JSON and writes them out, so logging costs the game loop well
+    under a microsecond per event. Objects that log hold None instead of an EventLog
+    when logging is off and check for it before building an event, which costs nothing.
+
+    One thread emits and the writer thread reads, so the buffer needs no lock. When the
+    writer falls behind and the buffer is full, new events are dropped and counted.
+    """
+
+    def __init__(self, path, capacity=8192, sample=None, flush_interval=0.5):
+        """
+        Args:
+            path: File to append the events to, or "-" for stdout.
+            capacity: Number of events the buffer holds before events are dropped.
+            sample: Optional dict of event name to the fraction of those events to keep, from 0
+                to 1, e.g. {"moved": 0.1} writes every tenth move. Types not named are all kept.
+            flush_interval: Seconds the writer waits before writing a part-filled batch.
+        """
+        # Each event of a type adds its rate to the type's credit, and is kept when the
+        # credit reaches 1, so exactly that fraction of the events is kept.
+        self.sample_rate = [1.0] * len(EVENT_NAMES)
+        for name, rate in (sample or {}).items():
+            if not 0 <= rate <= 1:
+                raise ValueError(f"Sampling rate for {name} must be between 0 and 1, not {rate}")
+            self.sample_rate[EVENT_TYPES[name]] = rate
+        self.credit = [0.0] * len(EVENT_NAMES)
+        self.file = sys.stdout if path == "-" else open(path, "a")
+        self.capacity = capacity
+        self.buffer = [None] * capacity
+        # Events emitted (head) and written (tail) so far; slot i % capacity holds event i.
+        self.head = 0
+        self.tail = 0
+        # Events dropped so far, and how many of those the writer has reported
+        self.dropped = 0
+        self.reported_dropped = 0
+        self.batch_size = capacity // 4
+        self.flush_interval = flush_interval
+        self.game_ids = 0
+
+        self.closing = False
+        self.wake = threading.Event()
+        self.writer = threading.Thread(target=self.run, name="event-log-writer", daemon=True)
+        self.writer.start()
+
+    # An EventLog configured by CLUEDO_EVENTS and CLUEDO_EVENT_SAMPLE, or None when it is off.
+    @classmethod
+    def from_environment(cls):
+        if not EVENTS_FILE:
+            return None
+        return cls(EVENTS_FILE, sample=parse_sampling(EVENT_SAMPLE))
+
+    # A number for a new game, so the events of games logged together can be told apart.
+    def new_game_id(self):
+        self.game_ids += 1
+        return self.game_ids
+
+    # Record an event: its type, the game's id and the values of its EVENT_FIELDS.
+    def emit(self, event, game, *values):
+        rate = self.sample_rate[event]
+        if rate != 1:
+            credit = self.credit[event] + rate
+            if credit < 1:
+                self.credit[event] = credit
+                return
+            self.credit[event] = credit - 1
+        head = self.head
+        pending = head - self.tail
+        if pending >= self.capacity:
+            self.dropped += 1
+            self.wake.set()
+            return
+        self.buffer[head % self.capacity] = (time.time(), event, game, values)
+        self.head = head + 1
+        if pending == self.batch_size:
+            self.wake.set()
+
+    def run(self):
+        while not self.closing:
+            self.wake.wait(self.flush_interval)
+            self.wake.clear()
+            self.flush()
+        self.flush()
+
+    # Write out everything emitted so far. Only called from the writer thread.
+    def flush(self):
+        head, tail = self.head, self.tail
+        dropped = self.dropped
+        if head == tail and dropped == self.reported_dropped:
+            return
+        lines = []
+        for i in range(tail, head):
+            t, event, game, values = self.buffer[i % self.capacity]
+            record = {"t": round(t, 6), "event": EVENT_NAMES[event], "game": game}
+            record.update(zip(EVENT_FIELDS[event], values))
+            lines.append(json.dumps(record) + "\n")
+            self.buffer[i % self.capacity] = None
+        self.tail = head
+        if dropped != self.reported_dropped:
+            count = dropped - self.reported_dropped
+            self.reported_dropped = dropped
+            lines.append(json.dumps({"t": round(time.time(), 6), "event": "dropped", "count": count}) + "\n")
+        self.file.write("".join(lines))
+        self.file.flush()
+
+    # Write out what is left and stop the writer.
+    def close(self):
+        self.closing = True
+        self.wake.set()
+        self.writer.join()
+        if self.file is not sys.stdout:
+            self.file.close()
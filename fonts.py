@@ -0,0 +1,74 @@
+from collections import OrderedDict
+
+import pygame
+
+# Text surfaces are kept until they use more than this many bytes of pixel data.
+DEFAULT_CACHE_BYTES = 16 * 1024 * 1024
+
+_fonts = {}
+
+
+# One pygame Font per size for the whole process.
+def get_font(size):
+    size = int(size)
+    font = _fonts.get(size)
+    if font is None:
+        if not pygame.font.get_init():
+            pygame.font.init()
+        font = pygame.font.Font(None, size)
+        _fonts[size] = font
+    return font
+
+
+class TextCache:
+    # Least-recently-used cache of rendered text surfaces keyed by (text, size, color).
+    def __init__(self, max_bytes=DEFAULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.surfaces = OrderedDict()
+        self.bytes_used = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def render(self, text, size, color):
+        key = (text, int(size), tuple(color))
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        surface = get_font(size).render(text, True, color)
+        self.surfaces[key] = surface
+        self.bytes_used += _surface_bytes(surface)
+        while self.bytes_used > self.max_bytes and len(self.surfaces) > 1:
+            _, evicted = self.surfaces.popitem(last=False)
+            self.bytes_used -= _surface_bytes(evicted)
+            self.evictions += 1
+        return surface
+
+    def clear(self):
+        self.surfaces.clear()
+        self.bytes_used = 0
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self.surfaces),
+            "bytes": self.bytes_used,
+        }
+
+
+def _surface_bytes(surface):
+    return surface.get_width() * surface.get_height() * surface.get_bytesize()
+
+
+text_cache = TextCache()
+
+
+# Rendered text from the shared cache. The returned surface is shared, so do not draw on it.
+def render_text(text, size, color):
+    return text_cache.render(text, size, color)
@@ -1,40 +1,53 @@
 import random
 
+from board import CHARACTER_NAMES, ROOM_NAMES, WEAPON_NAMES
+from event_log import GAME_STARTED, HINT_FOUND, HINT_PROVIDED, SUGGESTION_MADE
+
 
 class Game:
-    def __init__(self, board, player):
+    __slots__ = (
+        "board", "player", "rng", "events", "game_id", "solution", "game_clues",
+        "feedback_message", "feedback_color", "hint_used", "hint_spot_feedback",
+    )
+
+    def __init__(self, board, player, rng=None, events=None, hint_bits=None, puzzle=None):
         """
         Initializes the Cluedo game logic.
         Args:
             board: The MansionBoard object representing the game board.
             player: The Player object representing the player.
+            rng: Optional random.Random used for the solution (defaults to the random module).
+            events: Optional event_log.EventLog the game's events are recorded to.
+            hint_bits: Optional information (in bits) the hints should give together; see MansionBoard.generate_hints.
+            puzzle: Optional puzzles.Puzzle to play instead of generating a solution, weapons and hints.
+                The board must have been created with the same puzzle.
         """
         self.board = board
         self.player = player
-        self.solution = self.generate_solution()
-        self.game_clues = []
+        self.rng = rng or random
+        self.events = events
+        self.game_id = events.new_game_id() if events is not None else 0
+        self.solution = self.generate_solution() if puzzle is None else dict(puzzle.solution)
+        if events is not None:
+            events.emit(GAME_STARTED, self.game_id, board.rows, board.cols)
+        self.game_clues = ()
         self.feedback_message = ""
         self.feedback_color = (255, 255, 255) 
         self.hint_used = False
         self.hint_spot_feedback = ""
+        if puzzle is not None:
+            self.board.apply_puzzle(puzzle)
+            return
         self.board.setup_weapons(self.solution)  
-        self.board.generate_hints(self.solution)  
+        self.board.generate_hints(self.solution, target_bits=hint_bits)  
 
     # Generate solution for the game randomly.
     def generate_solution(self):
-        characters = [
-            "Miss Scarlet", "Professor Plum", "Mrs. Peacock",
-            "Reverend Green", "Colonel Mustard", "Mrs. White"
-        ]
-        weapons = ["Candlestick", "Dagger", "Lead Pipe", "Revolver", "Rope", "Wrench"]
-        rooms = list(self.board.rooms.keys())
-
         solution = {
-            "murderer": random.choice(characters),
-            "weapon": random.choice(weapons),
-            "room": random.choice(rooms),
+            "murderer": self.rng.choice(CHARACTER_NAMES),
+            "weapon": self.rng.choice(WEAPON_NAMES),
+            "room": self.rng.choice(ROOM_NAMES),
         }
-        print(f"DEBUG: Solution - {solution}")
         return solution
       
     # Handling Player's Suggestions: Returns True if correct and False otherwise
@@ -44,23 +57,24 @@ class Game:
             and weapon == self.solution["weapon"]
             and room == self.solution["room"]
         )
+        if self.events is not None:
+            self.events.emit(SUGGESTION_MADE, self.game_id, murderer, weapon, room, is_correct)
         if is_correct:
             self.feedback_message = f"{murderer} with {weapon} in {room} is CORRECT!"
             self.feedback_color = (0, 255, 0)  
-            print("DEBUG: Suggestion is correct!")  
             return True 
         else:
             self.feedback_message = f"{murderer} with {weapon} in {room} is INCORRECT."
             self.feedback_color = (255, 0, 0)  
-            print("DEBUG: Suggestion is incorrect!")  
             return False  
 
     # Provides a random hint to the player based on the game clues
     def provide_hint(self):
         if not self.game_clues:
             return "No more hints available."
-        hint = random.choice(self.game_clues)
-        print(f"DEBUG: Hint Provided - {hint}")
+        hint = self.rng.choice(self.game_clues)
+        if self.events is not None:
+            self.events.emit(HINT_PROVIDED, self.game_id, hint)
         return f"Hint: {hint}"
 
     # Checks if the player's current position matches a hint spot and provides the hint.
@@ -70,7 +84,8 @@ class Game:
         if hint:
             self.hint_used = True
             self.hint_spot_feedback = hint
-            print(f"DEBUG: Hint Spot Found - {hint}")
+            if self.events is not None:
+                self.events.emit(HINT_FOUND, self.game_id, hint)
         else:
             self.hint_spot_feedback = ""
 
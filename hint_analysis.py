@@ -0,0 +1,123 @@
+import math
+import random
+import time
+
+import numpy as np
+
+from characters import weapons as WEAPONS, rooms as ROOMS
+from deduction import (
+    ALL_CANDIDATES, CHARACTERS, NUM_CANDIDATES,
+    HINT_WAS_IN_ROOM, HINT_LOUD_NOISE, HINT_HEADING_TO, HINT_SEEN_TALKING,
+    Hint, hint_mask, parse_hint,
+)
+
+# Candidate bitsets as rows of 64-bit words, so a hint set is a bitwise AND over rows
+# and the candidates left are a popcount.
+WORDS = (NUM_CANDIDATES + 63) // 64
+TOTAL_BITS = math.log2(NUM_CANDIDATES)
+HINTS_PER_BOARD = 4
+# How many random hint sets pick_hint_set scores for each board.
+CANDIDATE_SETS = 4096
+
+
+def pack_masks(masks):
+    data = b"".join(mask.to_bytes(WORDS * 8, "little") for mask in masks)
+    return np.frombuffer(data, dtype="<u8").reshape(len(masks), WORDS)
+
+
+ALL_WORDS = pack_masks([ALL_CANDIDATES])[0]
+
+
+# Every hint that is true for a solution, in the forms MansionBoard.generate_hints writes.
+def true_hints(solution):
+    murderer, room = solution["murderer"], solution["room"]
+    innocent = [character for character in CHARACTERS if character != murderer]
+    hints = [Hint(HINT_WAS_IN_ROOM, character, other) for character in innocent for other in ROOMS if other != room]
+    hints.append(Hint(HINT_LOUD_NOISE, room=room))
+    hints += [Hint(HINT_HEADING_TO, character, room) for character in innocent]
+    hints += [Hint(HINT_SEEN_TALKING, character, partner=murderer) for character in innocent]
+    return hints
+
+
+def _bits_left(words):
+    return np.log2(np.bitwise_count(words).sum(axis=-1, dtype=np.int64))
+
+
+# Bits of information each hint gives on its own, starting from known (all candidates by default).
+def information_gain(hints, known=ALL_WORDS):
+    words = pack_masks([hint_mask(hint) for hint in hints])
+    return _bits_left(known) - _bits_left(words & known)
+
+
+# Bits of information given by each hint set together. sets is an (n, k) array of
+# indexes into hints; every row is scored at once.
+def hint_set_gains(hints, sets, known=ALL_WORDS):
+    words = pack_masks([hint_mask(hint) for hint in hints])
+    combined = np.bitwise_and.reduce(words[np.asarray(sets)], axis=1) & known
+    return _bits_left(known) - _bits_left(combined)
+
+
+# Per-hint and combined information gain for the hints placed on a board.
+def analyze_board(board):
+    hints = [parse_hint(text) for text in board.generated_hints]
+    return {
+        "hints": dict(zip(board.generated_hints, information_gain(hints).tolist())),
+        "combined": float(hint_set_gains(hints, [range(len(hints))])[0]),
+        "total": TOTAL_BITS,
+    }
+
+
+# Pick a set of true hints whose combined gain is as close to target_bits as possible.
+# Scores CANDIDATE_SETS random sets at once and picks randomly among those within
+# tolerance of the target (or among the closest if none are).
+def pick_hint_set(solution, rng, target_bits, tolerance=0.25, size=HINTS_PER_BOARD, samples=CANDIDATE_SETS):
+    hints = true_hints(solution)
+    sample_rng = np.random.default_rng(rng.getrandbits(64))
+    sets = np.sort(sample_rng.integers(0, len(hints), (samples, size)), axis=1)
+    sets = sets[(np.diff(sets, axis=1) > 0).all(axis=1)]
+    error = np.abs(hint_set_gains(hints, sets) - target_bits)
+    close = np.flatnonzero(error <= tolerance)
+    if len(close) == 0:
+        close = np.flatnonzero(error == error.min())
+    return [hints[i] for i in sets[rng.choice(close.tolist())]]
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Measure how much the generated hints narrow down the solution.")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--target-bits", type=float, help="Generate hints for this combined gain instead.")
+    args = parser.parse_args()
+
+    from engine import GameSession
+
+    rng = random.Random(args.seed)
+    start = time.perf_counter()
+    gains = []
+    for _ in range(args.games):
+        session = GameSession(rng=rng)
+        if args.target_bits is not None:
+            session.board.generate_hints(session.game.solution, target_bits=args.target_bits)
+        gains.append(analyze_board(session.board)["combined"])
+    elapsed = time.perf_counter() - start
+
+    gains = np.array(gains)
+    print(f"{args.games} boards in {elapsed:.2f}s; hints rule out {gains.mean():.2f} of {TOTAL_BITS:.2f} bits "
+          f"on average (min {gains.min():.2f}, max {gains.max():.2f})")
+    counts, edges = np.histogram(gains, bins=8, range=(0, TOTAL_BITS))
+    for count, low, high in zip(counts, edges, edges[1:]):
+        print(f"  {low:4.1f}-{high:4.1f} bits  {count:6d}  {'#' * int(60 * count / args.games)}")
+
+    # Throughput of scoring hint sets for one board.
+    hints = true_hints({"murderer": CHARACTERS[0], "weapon": WEAPONS[0], "room": ROOMS[0]})
+    sets = np.argsort(np.random.default_rng(0).random((100000, len(hints))), axis=1)[:, :HINTS_PER_BOARD]
+    start = time.perf_counter()
+    hint_set_gains(hints, sets)
+    elapsed = time.perf_counter() - start
+    print(f"Scored {len(sets)} hint sets in {elapsed * 1000:.1f} ms ({len(sets) / elapsed:,.0f} sets/s)")
+
+
+if __name__ == "__main__":
+    main()
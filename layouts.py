@@ -0,0 +1,266 @@
+import mmap
+import os
+import random
+import struct
+import time
+
+from board import CELL_DOOR, CELL_PATH, CELL_ROOM, CELL_WALL, ROOM_NAMES, WALKABLE_CODES, layout_tables
+from engine import GameSession
+
+# Layout library file layout (little endian):
+#   header: magic, version, rows, cols, number of layouts
+#   the layouts, each rows * cols bytes of cell codes (board.CELL_*) in row-major order.
+# Every layout in a library has been validated when it was generated.
+LIBRARY_MAGIC = b"CLLY"
+LIBRARY_VERSION = 1
+LIBRARY_HEADER = struct.Struct("<4sBHHI")
+
+# The letter of each cell code in a layout (see board.DEFAULT_LAYOUT), as a bytes.translate table.
+CELL_LETTERS = bytes.maketrans(bytes([CELL_WALL, CELL_PATH, CELL_ROOM, CELL_DOOR]), b"WPRD")
+# Hint spots a layout has to have room for (see MansionBoard.generate_hints).
+MIN_HINT_SPOTS = 4
+MAX_ATTEMPTS = 100
+
+
+class LayoutError(ValueError):
+    pass
+
+
+class DisjointSet:
+    # Union-find over the integers 0..size-1, with path halving and union by size.
+    __slots__ = ("parent", "size")
+
+    def __init__(self, size):
+        self.parent = list(range(size))
+        self.size = [1] * size
+
+    def find(self, item):
+        parent = self.parent
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    # Join the sets of a and b. Returns False if they were already the same set.
+    def union(self, a, b):
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return False
+        if self.size[a] < self.size[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.size[a] += self.size[b]
+        return True
+
+
+# True if every walkable cell (pathways, doors and rooms, so every room and every place a
+# hint can go) can be reached from every other, and so from wherever the player starts.
+def is_connected(cells, cols):
+    walkable = cells.translate(WALKABLE_CODES)
+    sets = DisjointSet(len(cells))
+    components = walkable.count(1)
+    for cell in range(len(cells)):
+        if not walkable[cell]:
+            continue
+        if (cell + 1) % cols and walkable[cell + 1] and sets.union(cell, cell + 1):
+            components -= 1
+        if cell + cols < len(cells) and walkable[cell + cols] and sets.union(cell, cell + cols):
+            components -= 1
+    return components == 1
+
+
+def _generate_once(rows, cols, rng, loops):
+    # Corridor junctions sit on every other row and column, lined up so the middle of the
+    # mansion (where the player starts) is one; the cells between them are walls or passages.
+    node_rows = list(range(1 if rows // 2 % 2 else 2, rows - 1, 2))
+    node_cols = list(range(1 if cols // 2 % 2 else 2, cols - 1, 2))
+    start = (rows // 2, cols // 2)
+
+    # One room in each ninth of the mansion, never on the start
+    rooms = set()
+    for i in range(3):
+        for j in range(3):
+            region = [
+                (row, col)
+                for row in node_rows[len(node_rows) * i // 3:len(node_rows) * (i + 1) // 3]
+                for col in node_cols[len(node_cols) * j // 3:len(node_cols) * (j + 1) // 3]
+                if (row, col) != start
+            ]
+            rooms.add(rng.choice(region))
+
+    cells = bytearray(rows * cols)
+    nodes = [(row, col) for row in node_rows for col in node_cols if (row, col) not in rooms]
+    for row, col in nodes:
+        cells[row * cols + col] = CELL_PATH
+
+    # Randomized Kruskal: open the wall between two junctions when it joins two parts of the
+    # corridors, and otherwise now and then anyway, so there are loops and not just a maze.
+    edges = [
+        (row * cols + col, (row + d_row) * cols + col + d_col)
+        for row, col in nodes for d_row, d_col in ((0, 2), (2, 0))
+        if row + d_row < rows - 1 and col + d_col < cols - 1
+        and cells[(row + d_row) * cols + col + d_col] == CELL_PATH
+    ]
+    rng.shuffle(edges)
+    sets = DisjointSet(rows * cols)
+    for a, b in edges:
+        if sets.union(a, b) or rng.random() < loops:
+            cells[(a + b) // 2] = CELL_PATH
+
+    # Each room gets one door, to a neighbouring corridor junction
+    for row, col in rooms:
+        cell = row * cols + col
+        cells[cell] = CELL_ROOM
+        neighbours = [
+            neighbour for neighbour in (cell - 2 * cols, cell + 2 * cols, cell - 2, cell + 2)
+            if 0 <= neighbour < len(cells) and abs(neighbour % cols - col) <= 2 and cells[neighbour] == CELL_PATH
+        ]
+        if not neighbours:
+            return None
+        cells[(cell + rng.choice(neighbours)) // 2] = CELL_DOOR
+
+    if cells.count(CELL_PATH) < MIN_HINT_SPOTS or not is_connected(cells, cols):
+        return None
+    return bytes(cells)
+
+
+def generate_layout(rows, cols, rng=random, loops=0.1):
+    """
+    Generates a new mansion: walls, corridors, nine room slots each with a door, and the
+    start in the middle. Returns its cell codes (board.CELL_*), row by row, as bytes;
+    layout_from_cells turns them into a layout for MansionBoard.
+    Every room and every pathway cell (where hints go) can be reached from the start.
+    Args:
+        rows, cols: Mansion size, at least 11x11.
+        rng: Random source.
+        loops: Chance that a wall which would only make a second way round is opened anyway.
+    """
+    if rows < 11 or cols < 11:
+        raise LayoutError(f"A generated mansion needs at least 11x11 cells, got {rows}x{cols}")
+    for _ in range(MAX_ATTEMPTS):
+        cells = _generate_once(rows, cols, rng, loops)
+        if cells is not None:
+            return cells
+    raise LayoutError(f"No valid {rows}x{cols} layout in {MAX_ATTEMPTS} attempts")
+
+
+# A layout (rows of W, P, D and R cells) from cell codes. The board's tables are built
+# from the codes directly, without reading the layout's text again.
+def layout_from_cells(cells, cols):
+    rooms = cells.count(CELL_ROOM)
+    if rooms != len(ROOM_NAMES):
+        raise LayoutError(f"A layout needs {len(ROOM_NAMES)} room slots, found {rooms}")
+    letters = bytes(cells).translate(CELL_LETTERS).decode()
+    layout = [list(letters[start:start + cols]) for start in range(0, len(letters), cols)]
+    layout_tables(layout, cells)
+    return layout
+
+
+# Generate one chunk of layouts; each chunk has its own RNG stream like puzzles.py.
+def _build_chunk(args):
+    seed, chunk_index, count, rows, cols, loops = args
+    rng = random.Random(f"{seed}:{chunk_index}")
+    return b"".join(generate_layout(rows, cols, rng, loops) for _ in range(count))
+
+
+def build_library(path, count, seed=0, rows=23, cols=23, loops=0.1, workers=None, chunk_size=500):
+    """
+    Generates count layouts and writes them to a layout library file.
+    Args:
+        path: File to write.
+        count: Number of layouts.
+        seed: Base seed; the same seed always gives the same library.
+        rows, cols: Mansion size of every layout in the library.
+        loops: See generate_layout.
+        workers: Number of processes (defaults to the CPU count, 1 runs in this process).
+    """
+    chunks = [
+        (seed, index, min(chunk_size, count - start), rows, cols, loops)
+        for index, start in enumerate(range(0, count, chunk_size))
+    ]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        chunk_results = list(map(_build_chunk, chunks))
+    else:
+        from multiprocessing import Pool
+
+        with Pool(workers) as pool:
+            chunk_results = pool.map(_build_chunk, chunks)
+    with open(path, "wb") as f:
+        f.write(LIBRARY_HEADER.pack(LIBRARY_MAGIC, LIBRARY_VERSION, rows, cols, count))
+        f.writelines(chunk_results)
+
+
+class LayoutLibrary:
+    """
+    A layout library file mapped into memory. Every layout is a fixed-size record of
+    cell codes that was validated when it was generated, so loading one is a slice and
+    costs the same however large the library is.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            # An empty file cannot be mapped
+            if os.fstat(f.fileno()).st_size < LIBRARY_HEADER.size:
+                raise LayoutError(f"{path} is not a layout library")
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.rows, self.cols, self.count = LIBRARY_HEADER.unpack_from(self.data)
+        if magic != LIBRARY_MAGIC:
+            raise LayoutError(f"{path} is not a layout library")
+        if version != LIBRARY_VERSION:
+            raise LayoutError(f"{path} has unsupported layout library version {version}")
+        self.record_size = self.rows * self.cols
+        if len(self.data) != LIBRARY_HEADER.size + self.count * self.record_size:
+            raise LayoutError(f"{path} is truncated")
+
+    def __len__(self):
+        return self.count
+
+    def cells(self, index):
+        start = LIBRARY_HEADER.size + index * self.record_size
+        return self.data[start:start + self.record_size]
+
+    def layout(self, index):
+        return layout_from_cells(self.cells(index), self.cols)
+
+    # A random layout from the library.
+    def pick(self, rng=random):
+        return self.layout(rng.randrange(self.count))
+
+    # A GameSession on a random layout from the library.
+    def new_session(self, rng=None, **kwargs):
+        return GameSession(rng=rng, layout=self.pick(rng or random), **kwargs)
+
+    def close(self):
+        self.data.close()
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build a library of generated mansion layouts.")
+    parser.add_argument("output", help="Layout library file to write.")
+    parser.add_argument("--layouts", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--size", default="23x23", help="Mansion size as ROWSxCOLS.")
+    parser.add_argument("--loops", type=float, default=0.1, help="Chance of opening a wall that makes a loop.")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--show", action="store_true", help="Print the first layout.")
+    args = parser.parse_args()
+    rows, cols = (int(n) for n in args.size.lower().split("x"))
+
+    start = time.perf_counter()
+    build_library(args.output, args.layouts, args.seed, rows, cols, args.loops, args.workers)
+    elapsed = time.perf_counter() - start
+
+    library = LayoutLibrary(args.output)
+    print(f"{len(library)} {rows}x{cols} layouts in {os.path.getsize(args.output)} bytes, "
+          f"built in {elapsed:.1f}s ({len(library) / elapsed:,.0f} layouts/s)")
+    if args.show and len(library):
+        for row in library.layout(0):
+            print("".join(row).translate(str.maketrans("WPD", "#.+")))
+    library.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,393 +1,616 @@
-import pygame
+import os
 import random
-from board import MansionBoard
-from game_logic import Game
-from player import Player
-
-
-def roll_dice():
-    return random.randint(1, 6)
-
-def show_intro(screen, screen_width, screen_height):
-    pygame.font.init()
-    font = pygame.font.Font(None, 40)
-    small_font = pygame.font.Font(None, 28)
+import time
+from collections import Counter
+from functools import partial
 
-    intro_text = [
-        "Welcome to Cluedo! The murder mystery game...",
-        "A murder has been committed in the mansion.",
-        "Your task: Find out who the murderer is, where the crime took place, and the weapon used.",
-        "But be careful - TIME IS RUNNING OUT!"
-    ]
-
-    screen.fill((0, 0, 0))
-
-    for i, line in enumerate(intro_text):
-        text = font.render(line, True, (254, 254, 254))
-        text_rect = text.get_rect(center=(screen_width // 2, screen_height // 2 - 100 + i * 60))
-        screen.blit(text, text_rect)
+# The game window is drawn and driven with pygame, so main imports it before the backend
+# does; the support prompt setting only works if it is made before that first import.
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+import pygame
 
-    hint_text = small_font.render("Press ENTER to begin", True, (255, 255, 255))
-    hint_rect = hint_text.get_rect(center=(screen_width // 2, screen_height - 100))
-    screen.blit(hint_text, hint_rect)
+from backends import PygameBackend
+from board import MansionBoard, make_layout
+from deduction import Deduction
+from event_log import HINT_FOUND, MOVED, ROOM_ENTERED, EventLog
+from fonts import render_text
+from game_logic import Game
+from overlays import OverlayQueue
+from player import Player
+from profiler import profiler
+from reachability import reachability_for
+from results import ABANDONED, LOST, SOLVED, GameRecord, ResultsStore, layout_key
+from room_images import room_image_cache
+from scheduler import FrameScheduler
+from screens import CHARACTERS, WEAPONS, InstructionsScreen, IntroScreen, NoteSheetScreen, SuggestionScreen
 
-    pygame.display.flip()
 
-    waiting = True
-    while waiting:
-        for event in pygame.event.get():
-            if event.type == pygame.KEYDOWN and event.key == pygame.K_RETURN:
-                waiting = False
+def roll_dice(rng=random):
+    return rng.randint(1, 6)
 
 
-def render_hint(screen, hint, screen_width, screen_height):
+# Overlay drawn when the player lands on a hint spot.
+def render_hint(hint, screen, screen_width, screen_height):
     screen.fill((0, 0, 0))
-    font = pygame.font.Font(None, 40)
-    hint_text = font.render(hint, True, (255, 255, 0))  # Yellow text for hints
+    hint_text = render_text(hint, 40, (255, 255, 0))  # Yellow text for hints
     hint_rect = hint_text.get_rect(center=(screen_width // 2, screen_height // 2))
     screen.blit(hint_text, hint_rect)
-    pygame.display.flip()
-    pygame.time.delay(3000)
 
 # Displays image of the room and a hint about the weapon in the room, every time player lands on it.
-def render_room_image(screen, room_name, weapon_hint, board, screen_width, screen_height):
-    room_image_path = board.room_images.get(room_name)
-    try:
-        room_image = pygame.image.load(room_image_path)
-        room_image = pygame.transform.scale(room_image, (screen_width // 2, screen_height // 2))
-    except FileNotFoundError:
-        print(f"Error: Image file {room_image_path} not found.")
-        room_image = pygame.Surface((screen_width // 2, screen_height // 2))
-        room_image.fill((255, 0, 0))
+def render_room_image(room_name, weapon_hint, board, screen, screen_width, screen_height):
+    # Images are loaded in the background at startup; a placeholder is shown if one is not ready yet.
+    room_image = room_image_cache.get(
+        room_name, board.room_images.get(room_name), (screen_width // 2, screen_height // 2)
+    )
 
     room_image_rect = room_image.get_rect(center=(screen_width // 2, screen_height // 3))
 
     screen.fill((0, 0, 0))
     screen.blit(room_image, room_image_rect)
 
-    font = pygame.font.Font(None, 36)
-    hint_text = font.render(f"Hint: {weapon_hint} weapon is in this room.", True, (255, 255, 255))
+    hint_text = render_text(f"Hint: {weapon_hint} weapon is in this room.", 36, (255, 255, 255))
     hint_text_rect = hint_text.get_rect(center=(screen_width // 2, screen_height // 1.2))
     screen.blit(hint_text, hint_text_rect)
 
-    pygame.display.flip()
-    pygame.time.delay(3000)
-
-# Render the suggestion options during the suggestion phase.
-def render_suggestions(
-    screen, font, suggestion_font, suggestion_phase, selected_character, selected_weapon,
-    characters, weapons, screen_width, screen_height
-):
-    screen.fill((0, 0, 0))  
-    # Selecting a Character
-    if suggestion_phase == 0:  
-        suggestion_text = font.render("Select Character", True, (255, 255, 255))
-        screen.blit(suggestion_text, (screen_width // 2 - 150, screen_height // 2 - 200))
-        for i, character in enumerate(characters):
-            color = (255, 255, 255) if i == selected_character else (100, 100, 100)
-            option_text = suggestion_font.render(character, True, color)
-            screen.blit(option_text, (screen_width // 2 - 100, screen_height // 2 - 150 + i * 40))
-    elif suggestion_phase == 1:  
-        suggestion_text = font.render("Select Weapon", True, (255, 255, 255))
-        screen.blit(suggestion_text, (screen_width // 2 - 150, screen_height // 2 - 200))
-        for i, weapon in enumerate(weapons):
-            color = (255, 255, 255) if i == selected_weapon else (100, 100, 100)
-            option_text = suggestion_font.render(weapon, True, color)
-            screen.blit(option_text, (screen_width // 2 - 100, screen_height // 2 - 150 + i * 40))
-
-    pygame.display.flip()
-
-#Render Detective's Note Sheet.
-def render_note_sheet(screen, suggestions_made, room_weapons, hints_gathered, screen_width, screen_height):
+# Overlay with the result of a suggestion.
+def render_feedback(game, screen, screen_width, screen_height):
+    feedback_message, feedback_color = game.get_feedback()
     screen.fill((0, 0, 0))
+    feedback_text = render_text(feedback_message, 40, feedback_color)  # Use a smaller font size
+    feedback_rect = feedback_text.get_rect(center=(screen_width // 2, screen_height // 2))
+    screen.blit(feedback_text, feedback_rect)
 
-    font = pygame.font.Font(None, 50)
-    small_font = pygame.font.Font(None, 28)
-    title = font.render("Detective's Note Sheet", True, (255, 255, 255))
-    screen.blit(title, (screen_width // 2 - 200, 50))
-
-    # Reference list
-    reference_title = small_font.render("Reference:", True, (255, 255, 255))
-    screen.blit(reference_title, (100, 120))
-
-    characters = ["Miss Scarlet", "Professor Plum", "Mrs. Peacock", "Reverend Green", "Colonel Mustard", "Mrs. White"]
-    weapons = ["Candlestick", "Dagger", "Lead Pipe", "Revolver", "Rope", "Wrench"]
-    rooms = ["Bedroom", "Bathroom", "Study", "Kitchen", "Game Room", "Dining Room", "Garage", "Courtyard", "Living Room"]
-
-    y_offset = 150
-    screen.blit(small_font.render("Characters:", True, (255, 255, 255)), (100, y_offset))
-    for character in characters:
-        screen.blit(small_font.render(character, True, (255, 255, 255)), (120, y_offset + 30))
-        y_offset += 30
-    y_offset += 40
-
-    screen.blit(small_font.render("Weapons:", True, (255, 255, 255)), (100, y_offset))
-    for weapon in weapons:
-        screen.blit(small_font.render(weapon, True, (255, 255, 255)), (120, y_offset + 30))
-        y_offset += 30
-    y_offset += 40
-
-    screen.blit(small_font.render("Locations:", True, (255, 255, 255)), (100, y_offset))
-    for room in rooms:
-        screen.blit(small_font.render(room, True, (255, 255, 255)), (120, y_offset + 30))
-        y_offset += 30
-
-    # Suggestions Section
-    suggestion_title = small_font.render("Suggestions Made:", True, (255, 255, 255))
-    screen.blit(suggestion_title, (screen_width // 2 + 50, 120))
-    suggestion_y_offset = 150
-    if suggestions_made:
-        for suggestion in suggestions_made:
-            suggestion_text = small_font.render(suggestion, True, (255, 255, 255))
-            screen.blit(suggestion_text, (screen_width // 2 + 50, suggestion_y_offset))
-            suggestion_y_offset += 30
-    else:
-        no_suggestions = small_font.render("No suggestions made yet.", True, (255, 255, 255))
-        screen.blit(no_suggestions, (screen_width // 2 + 50, suggestion_y_offset))
-
-    suggestion_y_offset += 40
-
-    # Hints Section
-    hints_title = small_font.render("Hints Gathered:", True, (255, 255, 255))
-    screen.blit(hints_title, (screen_width // 2 + 50, suggestion_y_offset))
-    suggestion_y_offset += 40
+def render_victory(screen, screen_width, screen_height):
+    screen.fill((0, 0, 0))
+    victory_text = render_text("Congratulations! You solved the mystery!", 60, (0, 255, 0))
+    victory_rect = victory_text.get_rect(center=(screen_width // 2, screen_height // 2))
+    screen.blit(victory_text, victory_rect)
 
-    # Combine room hints and hints gathered from hint spots
-    all_hints = [f"The {weapon} is in the {room}." for room, weapon in room_weapons.items()] + hints_gathered
 
-    if all_hints:
-        for hint in all_hints:
-            hint_text = small_font.render(hint, True, (255, 255, 255))
-            screen.blit(hint_text, (screen_width // 2 + 50, suggestion_y_offset))
-            suggestion_y_offset += 30
+# Overlay shown when an opponent solves the mystery first.
+def render_defeat(name, suggestion, screen, screen_width, screen_height):
+    screen.fill((0, 0, 0))
+    defeat_text = render_text(f"{name} solved the mystery first!", 60, (255, 0, 0))
+    screen.blit(defeat_text, defeat_text.get_rect(center=(screen_width // 2, screen_height // 2 - 40)))
+    answer_text = render_text(f"It was {suggestion}.", 40, (255, 255, 255))
+    screen.blit(answer_text, answer_text.get_rect(center=(screen_width // 2, screen_height // 2 + 40)))
+
+
+
+
+# States of the main loop, as reported by GameLoop.state, and the states each one can
+# move to on a single input event. ui_driver.py measures how much of this a run covers.
+# A click-to-move walk carries on under the note sheet and instructions, so an overlay
+# can open over them. Opponents play their turns when the detective rolls, so an
+# opponent solving the mystery opens an overlay from the roll states.
+STATES = [
+    "intro", "roll", "roll_in_room", "move", "pick_character", "pick_weapon",
+    "note_sheet", "instructions", "overlay", "over",
+]
+PAGES = {"note_sheet", "instructions"}
+TRANSITIONS = {
+    "intro": {"roll"},
+    "roll": {"move", "overlay"} | PAGES,
+    "roll_in_room": {"move", "pick_character", "overlay"} | PAGES,
+    "move": {"roll", "roll_in_room", "overlay"} | PAGES,
+    "pick_character": {"pick_weapon"} | PAGES,
+    "pick_weapon": {"overlay"} | PAGES,
+    "note_sheet": {"roll", "roll_in_room", "move", "pick_character", "pick_weapon", "instructions", "overlay"},
+    "instructions": {"roll", "roll_in_room", "move", "pick_character", "pick_weapon", "note_sheet", "overlay"},
+    "overlay": {"roll", "roll_in_room", "over"} | PAGES,
+    "over": set(),
+}
+
+# The game runs at this many frames per second; ui_driver.py advances its clock by the same step.
+FPS = 30
+FRAME_MS = 1000 // FPS
+# While nothing moves the game waits for input, waking this many times a second.
+IDLE_FPS = 1
+
+# Event that plays the opponents' turns once they have been planned (see GameLoop.opponent_events).
+OPPONENTS_READY = pygame.event.custom_type()
+
+
+# Board, player and game logic for a new game. catalogue: optional puzzle catalogue file
+# (see puzzles.py) to take the game from, and difficulty the band to pick it from; the
+# mansion size then comes from the catalogue. layouts: optional layout library (see
+# layouts.py) to play a random generated mansion from, in which case its size is used.
+def new_game(rows=7, cols=9, catalogue=None, difficulty="medium", rng=None, events=None, layouts=None):
+    puzzle = None
+    if catalogue and layouts:
+        raise ValueError("Catalogue puzzles are for the standard mansions and cannot be played on generated layouts")
+    if catalogue:
+        from puzzles import Catalogue
+
+        puzzles = Catalogue(catalogue)
+        rows, cols = puzzles.rows, puzzles.cols
+        puzzle = puzzles.pick(difficulty, rng or random)
+        puzzles.close()
+    if layouts:
+        from layouts import LayoutLibrary
+
+        library = LayoutLibrary(layouts)
+        layout = library.pick(rng or random)
+        library.close()
     else:
-        no_hints_text = "No hints gathered yet."
-        screen.blit(small_font.render(no_hints_text, True, (255, 255, 255)), (screen_width // 2 + 50, suggestion_y_offset))
-
-    exit_message = small_font.render("Press L to return to the game", True, (255, 255, 255))
-    screen.blit(exit_message, (screen_width // 2 - 150, screen_height - 50))
-
-    pygame.display.flip()
-
-
-#Render game instructions screen
-def render_instructions(screen, screen_width, screen_height):
-    screen.fill((0, 0, 0))  # Black background
+        layout = make_layout(rows, cols)
 
-    font = pygame.font.Font(None, 50)
-    small_font = pygame.font.Font(None, 28)
-    title = font.render("Game Instructions", True, (255, 255, 255))
-    screen.blit(title, (screen_width // 2 - 150, 50))
-
-    instructions = [
-        "1. Roll the dice to move around the mansion.",
-        "2. Move using Arrow Keys on keyboard.",
-        "3. Investigate rooms to gather clues.",
-        "\t\t Clues are given when you land on a Question Mark tile and when you enter a room.",
-        "4. Make suggestions to narrow down suspects, weapons, and locations.",
-        "\t\t You may only make suggestions once you enter a room about that room specifically.",
-        "5. Use the Detective's Note Sheet to track your deductions.",
-        "6. Solve the mystery before time runs out!",
-    ]
-
-    for i, instruction in enumerate(instructions):
-        text = small_font.render(instruction, True, (255, 255, 255))
-        screen.blit(text, (100, 150 + i * 40))
-
-    exit_message = small_font.render("Press I to return to the game", True, (255, 255, 255))
-    screen.blit(exit_message, (screen_width // 2 - 150, screen_height - 50))
-
-    pygame.display.flip()
-
-
-def main():
-    pygame.init()
-
-    screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
-    pygame.display.set_caption("Cluedo Game")
-    clock = pygame.time.Clock()
-
-    info = pygame.display.Info()
-    screen_width = info.current_w
-    screen_height = info.current_h
-
-    show_intro(screen, screen_width, screen_height)
-
-    board = MansionBoard()
+    board = MansionBoard(rng=rng, layout=layout, puzzle=puzzle)
     board.setup_rooms()
-    player = Player("Detective", (3, 4))
-    game = Game(board, player)
-    board.generate_hints(game.solution)  # Ensure hints are generated
-
-    font = pygame.font.Font(None, 50)
-    small_font = pygame.font.Font(None, 28)
-    suggestion_font = pygame.font.Font(None, 36)
-
-    running = True
-    game_over = False
-    instructions_active = False
-    note_sheet_active = False
-    dice_visible = True
-    roll_result = None
-    spaces_left_to_move = 0
-    current_room = None
-    last_room = None
-    hints_gathered = []  
-    suggestions_made = []
-    room_weapons = {}
-    suggestion_active = False
-    suggestion_phase = 0
-    selected_character = 0
-    selected_weapon = 0
-    feedback_timer = 0
-
-    characters = ["Miss Scarlet", "Professor Plum", "Mrs. Peacock", "Reverend Green", "Colonel Mustard", "Mrs. White"]
-    weapons = ["Candlestick", "Dagger", "Lead Pipe", "Revolver", "Rope", "Wrench"]
-
-    while running:
-        if game_over:  
-            break
-
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_ESCAPE:
-                    running = False
-                elif event.key == pygame.K_i:
-                    instructions_active = not instructions_active
-                elif event.key == pygame.K_l:
-                    note_sheet_active = not note_sheet_active
-                elif not instructions_active and not note_sheet_active:
-                    if event.key == pygame.K_SPACE and dice_visible:
-                        roll_result = roll_dice()
-                        spaces_left_to_move = roll_result
-                        dice_visible = False
-                    elif spaces_left_to_move > 0:
-                        direction_map = {
-                            pygame.K_UP: (-1, 0),
-                            pygame.K_DOWN: (1, 0),
-                            pygame.K_LEFT: (0, -1),
-                            pygame.K_RIGHT: (0, 1),
-                        }
-                        direction = direction_map.get(event.key)
-                        if direction and player.move(direction, board):
-                            spaces_left_to_move -= 1
-                        if spaces_left_to_move == 0:
-                            dice_visible = True
-                            # Check for hints
-                            hint = board.get_hint(player.position)
-                            if hint and hint not in hints_gathered:
-                                hints_gathered.append(hint)
-                                render_hint(screen, hint, screen_width, screen_height)
-                    elif spaces_left_to_move == 0 and current_room and event.key == pygame.K_s:
-                        suggestion_active = True
-                        suggestion_phase = 0
-                        selected_character = 0
-                        selected_weapon = 0
-                    elif suggestion_active:
-                        if suggestion_phase == 0:
-                            if event.key == pygame.K_UP:
-                                selected_character = (selected_character - 1) % len(characters)
-                            elif event.key == pygame.K_DOWN:
-                                selected_character = (selected_character + 1) % len(characters)
-                            elif event.key == pygame.K_RETURN:
-                                suggestion_phase = 1
-                        elif suggestion_phase == 1:
-                            if event.key == pygame.K_UP:
-                                selected_weapon = (selected_weapon - 1) % len(weapons)
-                            elif event.key == pygame.K_DOWN:
-                                selected_weapon = (selected_weapon + 1) % len(weapons)
-                            elif event.key == pygame.K_RETURN:
-                                suggestion = f"{characters[selected_character]} with {weapons[selected_weapon]} in {current_room}"
-                                suggestions_made.append(suggestion)
-                                suggestion_active = False
-
-                                # Check if the suggestion is correct
-                                if game.make_suggestion(
-                                    characters[selected_character],
-                                    weapons[selected_weapon],
-                                    current_room
-                                ):
-                                    # Display victory message and exit
-                                    screen.fill((0, 0, 0))
-                                    font = pygame.font.Font(None, 60)
-                                    victory_text = font.render("Congratulations! You solved the mystery!", True, (0, 255, 0))
-                                    victory_rect = victory_text.get_rect(center=(screen_width // 2, screen_height // 2))
-                                    screen.blit(victory_text, victory_rect)
-                                    pygame.display.flip()
-                                    pygame.time.delay(5000)  # Pause for 5 seconds to display the message
-                                    running = False
-                                    break
-
-                                feedback_timer = pygame.time.get_ticks()
-
-        # Update the current room based on the player's position
-        for room_name, info in board.rooms.items():
-            if info["position"] == player.position:
-                current_room = room_name
+    player = Player("Detective", board.start_position)
+    game = Game(board, player, rng=rng, events=events, puzzle=puzzle)
+    return board, player, game
+
+
+class GameLoop:
+    """
+    Everything the game screen does, one frame per call to step(events). The keyboard
+    drives it in main(); ui_driver.py drives it from a recorded script or a fuzzer.
+    Which screen is showing is reported by state (one of STATES), and every change of
+    state is counted in transitions. The loop keeps its own game state rather than
+    an engine.GameSession, so a game played here cannot be saved with snapshot.py.
+    It draws its screens and overlays with pygame, so it needs a PygameBackend; the null
+    and text backends are for headless GameSessions (see backends.main).
+    """
+
+    def __init__(self, backend, board, player, game, rng=random, opponents=None):
+        """
+        Args:
+            backend: An open PygameBackend to draw on.
+            board, player, game: The game to play, as returned by new_game.
+            rng: Random source for the dice (defaults to the random module).
+            opponents: Optional opponents.Opponents, the suspects the computer plays.
+        """
+        if not isinstance(backend, PygameBackend):
+            raise TypeError(f"GameLoop draws with pygame and cannot use the {backend.name} backend")
+        self.backend = backend
+        self.screen = backend.screen
+        self.screen_width, self.screen_height = backend.size
+        self.board = board
+        self.player = player
+        self.game = game
+        self.rng = rng
+        self.opponents = opponents
+        # The detective has rolled and the roll waits for the opponents' turns to come back
+        self.waiting_for_opponents = False
+        # What the opponents suggested in their last turns, shown on the game screen
+        self.opponent_news = []
+        self.board_view = backend.board_view(board)
+        room_image_cache.preload(board.room_images, (self.screen_width // 2, self.screen_height // 2))
+
+        self.running = True
+        self.game_over = False
+        # How the game ended (results.SOLVED or LOST), None while it is being played
+        self.outcome = None
+        self.rolls = 0
+        # When the intro was closed and play started (time.monotonic())
+        self.started_at = None
+        self.intro_active = True
+        self.instructions_active = False
+        self.note_sheet_active = False
+        self.dice_visible = True
+        self.roll_result = None
+        self.spaces_left_to_move = 0
+        self.current_room = None
+        self.last_room = None
+        self.hints_gathered = []
+        self.suggestions_made = []
+        self.room_weapons = {}
+        self.suggestion_active = False
+        self.suggestion_phase = 0
+        self.selected_character = 0
+        self.selected_weapon = 0
+        # Hints, room images, feedback and the victory screen are shown as timed overlays
+        self.overlays = OverlayQueue()
+        # Distances between cells, for highlighting where a move can end and click-to-move
+        self.reach = reachability_for(board)
+        self.click_path = []
+        # Solutions still possible given the clues found so far
+        self.deduction = Deduction()
+        # Full-screen pages, composed once and redrawn only when what they show changes
+        self.intro_screen = IntroScreen()
+        self.instructions_screen = InstructionsScreen()
+        self.note_sheet = NoteSheetScreen()
+        self.suggestion_screen = SuggestionScreen()
+        self.shown_screen = None
+        # Something on screen changed since the last frame was drawn
+        self.dirty = True
+
+        self.frames = 0
+        self.last_state = self.state
+        self.transitions = Counter()
+
+    @property
+    def state(self):
+        if self.intro_active:
+            return "intro"
+        if self.overlays.active:
+            return "overlay"
+        if self.game_over:
+            return "over"
+        if self.instructions_active:
+            return "instructions"
+        if self.note_sheet_active:
+            return "note_sheet"
+        if self.suggestion_active:
+            return "pick_weapon" if self.suggestion_phase else "pick_character"
+        if self.spaces_left_to_move > 0:
+            return "move"
+        return "roll_in_room" if self.current_room else "roll"
+
+    # Run one frame: handle the events, update the game and draw it. now is the time in
+    # milliseconds used for overlays (defaults to pygame's clock). Returns False once the
+    # game has ended.
+    def step(self, events, now=None):
+        if self.game_over and not self.overlays.active:
+            self.running = False
+        if not self.running:
+            return False
+        profiler.begin_frame()
+
+        for event in events:
+            if self.game_over:
                 break
-        else:
-            current_room = None
+            # Only the pointer moving changes nothing on screen
+            if event.type != pygame.MOUSEMOTION:
+                self.dirty = True
+            self.handle_event(event)
+
+        if self.click_path and self.spaces_left_to_move > 0 and not self.overlays.active:
+            next_row, next_col = self.click_path.pop(0)
+            self.take_step((next_row - self.player.position[0], next_col - self.player.position[1]))
+            self.dirty = True
+        profiler.mark("events")
+
+        if not self.intro_active:
+            self.update(now)
+        # Frames where nothing changed leave the display as it is
+        if self.dirty or profiler.show_overlay:
+            self.render()
+            self.dirty = False
+        profiler.mark("render")
+
+        if profiler.show_overlay:
+            pygame.display.update(profiler.draw_overlay(self.screen, self.screen_width))
+            profiler.mark("profiler")
+
+        state = self.state
+        if state != self.last_state:
+            self.transitions[self.last_state, state] += 1
+            self.last_state = state
+        self.frames += 1
+        return self.running
+
+    def handle_event(self, event):
+        if event.type == pygame.QUIT:
+            self.running = False
+        elif event.type in (pygame.WINDOWEXPOSED, pygame.VIDEOEXPOSE):
+            # The window was uncovered or restored, so everything is put back on the display
+            self.board_view.invalidate()
+            self.shown_screen = None
+        elif event.type == OPPONENTS_READY:
+            if self.waiting_for_opponents and self.opponents.ready():
+                self.waiting_for_opponents = False
+                self.play_opponents()
+                if not self.game_over:
+                    self.roll()
+        elif self.intro_active:
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_RETURN:
+                self.intro_active = False
+                self.started_at = time.monotonic()
+        elif profiler.enabled and event.type == pygame.KEYDOWN and event.key in (pygame.K_F3, pygame.K_F4):
+            # F3 toggles the profiler overlay, F4 saves the recorded frames
+            if event.key == pygame.K_F3:
+                profiler.show_overlay = not profiler.show_overlay
+                self.board_view.invalidate()
+            else:
+                profiler.export_csv("frame_profile.csv")
+                profiler.export_json("frame_profile.json")
+        elif self.overlays.handle_event(event):
+            return
+        elif event.type == pygame.KEYDOWN:
+            self.handle_key(event.key)
+        elif event.type == pygame.MOUSEWHEEL and self.note_sheet_active and not self.instructions_active:
+            self.note_sheet.scroll_by(-event.y)
+        elif (event.type == pygame.MOUSEBUTTONDOWN and event.button == 1 and self.spaces_left_to_move > 0
+              and not self.instructions_active and not self.note_sheet_active and not self.suggestion_active
+              and self.board_view.camera):
+            # Click a cell within reach to walk there, one space per frame. Only the cells
+            # within the spaces left are searched, so a click costs the same on any board.
+            cell = self.board_view.camera.screen_to_cell(*event.pos)
+            path = self.reach.path_within(self.player.position, cell, self.spaces_left_to_move) if cell else None
+            if path:
+                self.click_path = path
+
+    def handle_key(self, key):
+        if key == pygame.K_ESCAPE:
+            self.running = False
+        elif key == pygame.K_i:
+            self.instructions_active = not self.instructions_active
+        elif key == pygame.K_l:
+            self.note_sheet_active = not self.note_sheet_active
+        elif self.note_sheet_active and not self.instructions_active:
+            self.note_sheet.handle_key(key)
+        elif self.instructions_active:
+            return
+        # While choosing a suggestion the keys only drive the menu
+        elif self.suggestion_active:
+            self.handle_suggestion_key(key)
+        elif key == pygame.K_SPACE and self.dice_visible and not self.waiting_for_opponents:
+            if self.opponents is not None and self.opponents.round_started:
+                # The opponents move first; the roll happens on OPPONENTS_READY
+                self.waiting_for_opponents = True
+            else:
+                self.roll()
+        elif self.spaces_left_to_move > 0:
+            direction_map = {
+                pygame.K_UP: (-1, 0),
+                pygame.K_DOWN: (1, 0),
+                pygame.K_LEFT: (0, -1),
+                pygame.K_RIGHT: (0, 1),
+            }
+            self.click_path = []
+            self.take_step(direction_map.get(key))
+        elif self.spaces_left_to_move == 0 and self.current_room and key == pygame.K_s and not self.waiting_for_opponents:
+            self.suggestion_active = True
+            self.suggestion_phase = 0
+            self.selected_character = 0
+            self.selected_weapon = 0
+
+    def handle_suggestion_key(self, key):
+        if self.suggestion_phase == 0:
+            if key == pygame.K_UP:
+                self.selected_character = (self.selected_character - 1) % len(CHARACTERS)
+            elif key == pygame.K_DOWN:
+                self.selected_character = (self.selected_character + 1) % len(CHARACTERS)
+            elif key == pygame.K_RETURN:
+                self.suggestion_phase = 1
+        elif self.suggestion_phase == 1:
+            if key == pygame.K_UP:
+                self.selected_weapon = (self.selected_weapon - 1) % len(WEAPONS)
+            elif key == pygame.K_DOWN:
+                self.selected_weapon = (self.selected_weapon + 1) % len(WEAPONS)
+            elif key == pygame.K_RETURN:
+                character, weapon = CHARACTERS[self.selected_character], WEAPONS[self.selected_weapon]
+                self.suggestions_made.append(f"{character} with {weapon} in {self.current_room}")
+                self.suggestion_active = False
+
+                # Check if the suggestion is correct
+                if self.game.make_suggestion(character, weapon, self.current_room):
+                    # Display victory message, then exit
+                    self.overlays.push(render_victory, 5000)
+                    self.game_over = True
+                    self.outcome = SOLVED
+                    return
+
+                self.deduction.failed_suggestion(character, weapon, self.current_room)
+                self.overlays.push(partial(render_feedback, self.game), 3000, on_close=self.game.reset_feedback)
+
+    # The OPPONENTS_READY event, once the detective is waiting to roll and every opponent's
+    # turn has come back from the planner. Never waits. The driver passes it to step() with
+    # the input events, so a recorded game replays with the opponents moving on the same frame.
+    def opponent_events(self):
+        if self.waiting_for_opponents and self.opponents.ready():
+            return [pygame.event.Event(OPPONENTS_READY)]
+        return []
+
+    def roll(self):
+        self.rolls += 1
+        self.roll_result = roll_dice(self.rng)
+        self.spaces_left_to_move = self.roll_result
+        self.dice_visible = False
+        if self.opponents is not None:
+            # The opponents plan their next turns while the detective takes this one
+            self.opponents.start_round()
+
+    # Play the opponents' planned turns. Their wrong suggestions go on the note sheet and
+    # rule those solutions out for the detective too; a right one ends the game.
+    def play_opponents(self):
+        self.opponent_news = []
+        for name, murderer, weapon, room, correct in self.opponents.finish_round(self.game.solution):
+            suggestion = f"{murderer} with {weapon} in {room}"
+            if correct:
+                self.overlays.push(partial(render_defeat, name, suggestion), 5000)
+                self.game_over = True
+                self.outcome = LOST
+                return
+            self.opponent_news.append(f"{name} suggested {suggestion}: wrong")
+            self.suggestions_made.append(f"{name}: {suggestion}")
+            self.deduction.failed_suggestion(murderer, weapon, room)
+
+    # The results.GameRecord of this game: solved, lost, or abandoned if it is still going.
+    def result(self):
+        solution = self.game.solution
+        seconds = time.monotonic() - self.started_at if self.started_at is not None else 0.0
+        return GameRecord(
+            time.time(), ABANDONED if self.outcome is None else self.outcome,
+            solution["murderer"], solution["weapon"], solution["room"],
+            layout_key(self.board), self.board.rows, self.board.cols, self.rolls, seconds,
+            len(self.opponents.players) if self.opponents is not None else 0,
+            list(self.suggestions_made), list(self.hints_gathered),
+        )
+
+    # Move one space and, after the last space, pick up any hint on that square.
+    def take_step(self, direction):
+        if direction and self.player.move(direction, self.board):
+            self.spaces_left_to_move -= 1
+            if self.game.events is not None:
+                self.game.events.emit(MOVED, self.game.game_id, *self.player.position)
+        if self.spaces_left_to_move == 0:
+            self.dice_visible = True
+            # Check for hints
+            hint = self.board.get_hint(self.player.position)
+            if hint and hint not in self.hints_gathered:
+                self.hints_gathered.append(hint)
+                self.deduction.hint(hint)
+                if self.game.events is not None:
+                    self.game.events.emit(HINT_FOUND, self.game.game_id, hint)
+                self.overlays.push(partial(render_hint, hint), 3000)
+
+    def update(self, now=None):
+        # Update the current room based on the player's position
+        self.current_room = self.board.room_at(self.player.position)
+        profiler.mark("room_lookup")
 
         # Render room image when entering a new room
-        if current_room and current_room != last_room and spaces_left_to_move == 0:
-            last_room = current_room
-            weapon_in_room = board.rooms[current_room]["weapon"]
-            room_weapons[current_room] = weapon_in_room
-            render_room_image(screen, current_room, weapon_in_room, board, screen_width, screen_height)
-        
-        # Render feedback
-        if game.feedback_message:    
-            feedback_message, feedback_color = game.get_feedback()
-            screen.fill((0, 0, 0))
-            font = pygame.font.Font(None, 40)  # Use a smaller font size
-            feedback_text = font.render(feedback_message, True, feedback_color)
-            feedback_rect = feedback_text.get_rect(center=(screen_width // 2, screen_height // 2))
-            screen.blit(feedback_text, feedback_rect)
-            pygame.display.flip()
-
-            # Clear feedback after 3 seconds
-            if pygame.time.get_ticks() - feedback_timer > 3000:
-                game.reset_feedback()
-        elif instructions_active:
-            render_instructions(screen, screen_width, screen_height)
-        elif note_sheet_active:
-            render_note_sheet(screen, suggestions_made, room_weapons, hints_gathered, screen_width, screen_height)
-        elif suggestion_active:
-            render_suggestions(
-                screen, font, suggestion_font, suggestion_phase,
-                selected_character, selected_weapon,
-                characters, weapons, screen_width, screen_height
-            )
+        if self.current_room and self.current_room != self.last_room and self.spaces_left_to_move == 0:
+            self.last_room = self.current_room
+            weapon_in_room = self.board.rooms[self.current_room]["weapon"]
+            self.room_weapons[self.current_room] = weapon_in_room
+            self.deduction.room_weapon(self.current_room, weapon_in_room)
+            if self.game.events is not None:
+                self.game.events.emit(ROOM_ENTERED, self.game.game_id, self.current_room, weapon_in_room)
+            self.overlays.push(partial(render_room_image, self.current_room, weapon_in_room, self.board), 3000)
+            self.dirty = True
+        if self.overlays.update(now):
+            self.dirty = True
+
+    # Milliseconds until the game changes without any input, for FrameScheduler: 0 while
+    # something moves every frame, the time left on the overlay being shown, or None when
+    # only input can change what is on screen.
+    def wake_after(self, now=None):
+        if self.dirty or self.waiting_for_opponents or profiler.show_overlay:
+            return 0
+        if self.overlays.active:
+            return self.overlays.time_left(now)
+        if self.click_path and self.spaces_left_to_move > 0:
+            return 0
+        return None
+
+    def render(self):
+        screen, screen_width, screen_height = self.screen, self.screen_width, self.screen_height
+        if self.intro_active:
+            page = self.intro_screen
+        elif self.overlays.active:
+            page = None
+        elif self.instructions_active:
+            page = self.instructions_screen
+        elif self.note_sheet_active:
+            page = self.note_sheet
+            self.note_sheet.update(self.suggestions_made, self.room_weapons, self.hints_gathered, self.deduction)
+        elif self.suggestion_active:
+            page = self.suggestion_screen
+            self.suggestion_screen.phase = self.suggestion_phase
+            self.suggestion_screen.selected_character = self.selected_character
+            self.suggestion_screen.selected_weapon = self.selected_weapon
         else:
-            # Main game screen
-            screen.fill((0, 0, 0))
-            board.render(screen, screen_width, screen_height)
-            board.render_labels(screen, screen_width, screen_height)
-            player.render(screen, screen_width, screen_height)
-
-            note_sheet_text = small_font.render("Press L to see The Detective's Note Sheet", True, (0, 0, 0))
-            instructions_text = small_font.render("Press I for Game Instructions", True, (0, 0, 0))
-            screen.blit(note_sheet_text, (10, 10))
-            screen.blit(instructions_text, (10, 40))
-
-            if dice_visible:
-                dice_label = font.render("Press SPACE to roll dice", True, (0, 0, 0))
-                screen.blit(dice_label, (screen_width // 2 - 200, screen_height - 120))
-            if spaces_left_to_move > 0:
-                move_text = small_font.render(f"Spaces left: {spaces_left_to_move}", True, (0, 0, 0))
-                screen.blit(move_text, (screen_width // 2 - 100, screen_height - 100))
-            elif spaces_left_to_move == 0 and current_room:
-                suggestion_text = font.render("Press S to make a suggestion", True, (0, 0, 0))
-                screen.blit(suggestion_text, (screen_width // 2 - 200, screen_height - 50))
-
+            page = None
+        # A page has to be put back on the display if anything else was drawn since it was shown
+        if page is not None and page is not self.shown_screen:
+            page.invalidate()
+        self.shown_screen = page
+
+        if self.overlays.active:
+            # Overlays (hints, room images, feedback) go over everything else
+            self.overlays.draw(screen, screen_width, screen_height)
             pygame.display.flip()
-            clock.tick(30)
-
-    pygame.quit()
-
+            self.board_view.invalidate()
+        elif page is not None:
+            page.draw(screen, screen_width, screen_height)
+            self.board_view.invalidate()
+        else:
+            # Main game screen: cached board, then the token and HUD text on top
+            hud = [
+                ("Press L to see The Detective's Note Sheet", 28, (0, 0, 0), (10, 10)),
+                ("Press I for Game Instructions", 28, (0, 0, 0), (10, 40)),
+            ]
+            for i, news in enumerate(self.opponent_news):
+                hud.append((news, 24, (0, 0, 0), (10, 80 + i * 25)))
+            if self.waiting_for_opponents:
+                hud.append(("Waiting for the other players...", 50, (0, 0, 0), (screen_width // 2 - 200, screen_height - 120)))
+            elif self.dice_visible:
+                hud.append(("Press SPACE to roll dice", 50, (0, 0, 0), (screen_width // 2 - 200, screen_height - 120)))
+            if self.spaces_left_to_move > 0:
+                hud.append((f"Spaces left: {self.spaces_left_to_move}", 28, (0, 0, 0), (screen_width // 2 - 100, screen_height - 100)))
+            elif self.spaces_left_to_move == 0 and self.current_room:
+                hud.append(("Press S to make a suggestion", 50, (0, 0, 0), (screen_width // 2 - 200, screen_height - 50)))
+
+            if self.spaces_left_to_move > 0:
+                highlights = self.reach.exactly(self.player.position, self.spaces_left_to_move)
+            else:
+                highlights = ()
+            others = self.opponents.players if self.opponents is not None else ()
+            self.backend.draw(self.board, self.player, hud, highlights, others)
+
+
+# The computer-played suspects of a game. Their dice and plans have their own random
+# source, seeded from the game's seed, so they do not change the detective's rolls.
+def new_opponents(board, count, seed=None, mode="process"):
+    from opponents import Opponents, TurnPlanner
+
+    rng = random.Random(None if seed is None else f"opponents {seed}")
+    return Opponents(board, count, rng, TurnPlanner(mode))
+
+
+# record: optional file to save every input event to, for replaying with ui_driver.py;
+# seed makes the game (and so the recording) reproducible. opponents: how many of the
+# other suspects the computer plays (0-5, none unless asked for). fps and idle_fps cap the frame rate while the
+# game is moving and while it waits for input (see FrameScheduler). layouts: optional
+# layout library to play a generated mansion from.
+def main(rows=7, cols=9, catalogue=None, difficulty="medium", record=None, seed=None, opponents=0,
+         fps=FPS, idle_fps=IDLE_FPS, layouts=None):
+    backend = PygameBackend()
+    backend.open()
+    pygame.display.set_caption("Cluedo Game")
+    scheduler = FrameScheduler(fps, idle_fps)
+
+    rng = random.Random(seed) if seed is not None else None
+    event_log = EventLog.from_environment()
+    results = ResultsStore.from_environment()
+    board, player, game = new_game(rows, cols, catalogue, difficulty, rng=rng, events=event_log, layouts=layouts)
+    rivals = new_opponents(board, opponents, seed) if opponents else None
+    loop = GameLoop(backend, board, player, game, rng=rng or random, opponents=rivals)
+
+    recorder = None
+    if record:
+        from ui_driver import InputRecorder
+
+        recorder = InputRecorder(record, seed=seed, rows=loop.board.rows, cols=loop.board.cols,
+                                 catalogue=catalogue, difficulty=difficulty, opponents=opponents, layouts=layouts)
+    while loop.running:
+        events = scheduler.events(loop.wake_after()) + loop.opponent_events()
+        profiler.mark("idle")
+        # Frames are not evenly spaced while the game sleeps, so the clock is recorded too
+        now = pygame.time.get_ticks()
+        if recorder:
+            recorder.record(loop.frames, events, now)
+        loop.step(events, now)
+
+    if recorder:
+        recorder.close()
+    if results is not None:
+        results.record(loop.result())
+        results.close()
+    if rivals is not None:
+        rivals.close()
+    if event_log is not None:
+        event_log.close()
+    backend.close()
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    import argparse
+
+    from puzzles import DIFFICULTY_BANDS
+
+    parser = argparse.ArgumentParser(description="Play Cluedo.")
+    parser.add_argument("--size", default="7x9", help="Mansion size as ROWSxCOLS, e.g. 200x300.")
+    parser.add_argument("--catalogue", help="Play a pre-generated puzzle from this catalogue (see puzzles.py).")
+    parser.add_argument("--difficulty", default="medium", choices=DIFFICULTY_BANDS,
+                        help="Difficulty band to pick the puzzle from.")
+    parser.add_argument("--layouts", help="Play a generated mansion from this layout library (see layouts.py).")
+    parser.add_argument("--seed", type=int, help="Seed for the game and dice, to make a game reproducible.")
+    parser.add_argument("--record", help="Save the input events to this file (replay with ui_driver.py).")
+    parser.add_argument("--opponents", type=int, default=0, choices=range(6),
+                        help="Suspects played by the computer (default none).")
+    parser.add_argument("--fps", type=int, default=FPS, help="Most frames a second while the game is moving.")
+    parser.add_argument("--idle-fps", type=float, default=IDLE_FPS,
+                        help="Frames a second while waiting for input (0: only on input).")
+    args = parser.parse_args()
+    if args.fps < 1:
+        parser.error("--fps must be at least 1")
+    if args.idle_fps < 0:
+        parser.error("--idle-fps cannot be negative")
+    rows, cols = (int(n) for n in args.size.lower().split("x"))
+    main(rows, cols, args.catalogue, args.difficulty, args.record, args.seed, args.opponents, args.fps, args.idle_fps,
+         args.layouts)
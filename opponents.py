@@ -0,0 +1,243 @@
+import queue
+import random
+from collections import namedtuple
+
+from board import NO_WEAPON, ROOM_NAMES, WEAPON_NAMES
+from characters import characters as CHARACTERS
+from deduction import Deduction
+from player import Player
+from reachability import Reachability
+
+# Everything a worker needs to plan one opponent's turn. The board is sent as its size,
+# walkable map and flat (row * cols + col) cells so a request is small to pickle.
+TurnRequest = namedtuple("TurnRequest", [
+    "name", "position", "roll", "seed", "candidates", "visited",
+    "rows", "cols", "walkable", "room_cells", "room_weapons", "hint_cells", "hints",
+])
+# A planned turn: the cells walked, what the opponent knows afterwards (candidates and the
+# room it ended in, if any) and its suggestion as (murderer, weapon), or None.
+Turn = namedtuple("Turn", ["name", "path", "candidates", "room", "suggestion"])
+
+# The Reachability of each layout a worker has planned on, by walkable map.
+_reachability = {}
+
+
+def _reachability_for(rows, cols, walkable):
+    reach = _reachability.get(walkable)
+    if reach is None:
+        if len(_reachability) >= 16:
+            del _reachability[next(iter(_reachability))]
+        reach = _reachability[walkable] = Reachability(rows, cols, walkable)
+    return reach
+
+
+# The cells of a move of exactly steps steps towards target. Like the detective (see
+# GameLoop.take_step), an opponent has to use its whole roll and can step back and forth,
+# so it only ends on target when target is at most steps away by a path of the same
+# parity; otherwise it ends on the way there or next to it. Returns [] if it cannot move.
+def _walk(reach, position, target, steps):
+    path = reach.path(position, target)
+    if len(path) >= steps:
+        return path[:steps]
+    if path:
+        back = path[-2] if len(path) > 1 else position
+    else:
+        neighbours = reach.within(position, 1)[1:]
+        if not neighbours:
+            return []
+        back = neighbours[0]
+    return path + [back if i % 2 == 0 else target for i in range(steps - len(path))]
+
+
+# Plan one turn: walk towards the nearest room not visited yet (then the nearest room the
+# clues have not ruled out), entering it only with the exact roll, learn its weapon and any
+# hint on the last cell, and suggest a murderer and weapon still possible for that room.
+# Runs in a worker, so it only uses what is in the request.
+def plan_turn(request):
+    rows, cols = request.rows, request.cols
+    reach = _reachability_for(rows, cols, request.walkable)
+    rng = random.Random(request.seed)
+    deduction = Deduction()
+    deduction.candidates = request.candidates
+    rooms = {ROOM_NAMES[code]: divmod(cell, cols) for code, cell in enumerate(request.room_cells)}
+
+    targets = [room for room in rooms if room not in request.visited]
+    if not targets:
+        possible_rooms = deduction.marginals()["rooms"]
+        targets = [room for room in rooms if possible_rooms[room]] or list(rooms)
+    position = request.position
+    distances = {room: reach.distance(position, rooms[room]) for room in targets}
+    targets = [room for room in targets if distances[room] >= 0]
+    if not targets:
+        # No room can be reached from here, so the opponent sits the turn out
+        return Turn(request.name, [], deduction.candidates, None, None)
+    target = min(targets, key=lambda room: (distances[room], rng.random()))
+    path = _walk(reach, position, rooms[target], request.roll)
+    end = path[-1] if path else position
+
+    cell = end[0] * cols + end[1]
+    if cell in request.hint_cells:
+        deduction.hint(request.hints[request.hint_cells.index(cell)])
+    room = ROOM_NAMES[request.room_cells.index(cell)] if cell in request.room_cells else None
+    suggestion = None
+    if room is not None:
+        weapon = request.room_weapons[ROOM_NAMES.index(room)]
+        deduction.room_weapon(room, None if weapon == NO_WEAPON else WEAPON_NAMES[weapon])
+        remaining = deduction.remaining(room)
+        if remaining:
+            suggestion = rng.choice(remaining)[:2]
+    return Turn(request.name, path, deduction.candidates, room, suggestion)
+
+
+class Opponent(Player):
+    # A computer-controlled suspect: its token, and what it has found out so far.
+    __slots__ = ("color", "deduction", "visited")
+
+    def __init__(self, name, start_position, color):
+        super().__init__(name, start_position)
+        self.color = color
+        self.deduction = Deduction()
+        self.visited = set()
+
+    # The suspect's token, with an outline so it stands out from the detective's.
+    def render(self, screen, camera):
+        import pygame
+
+        center = camera.cell_center(*self.position)
+        radius = min(camera.cell_width, camera.cell_height) // 5
+        pygame.draw.circle(screen, (0, 0, 0), center, radius + 2)
+        return pygame.draw.circle(screen, self.color, center, radius)
+
+
+class TurnPlanner:
+    """
+    Plans opponents' turns off the main loop. submit() hands a TurnRequest to a worker
+    and returns straight away; finished turns are put on a queue that poll() empties
+    without waiting, so however long planning takes the main loop keeps its frame rate.
+    mode is "process" (a worker process, which does not hold up the main loop even when
+    planning is slow), "thread" or "inline" (planned by the first poll(), for headless
+    runs and benchmarks that have to play out the same way every time).
+    """
+
+    def __init__(self, mode="process"):
+        self.mode = mode
+        self.results = queue.Queue()
+        self.executor = None
+        if mode == "process":
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+
+            # Spawned, not forked: the main process has pygame and writer threads running
+            self.executor = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+        elif mode == "thread":
+            from concurrent.futures import ThreadPoolExecutor
+
+            self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="turn-planner")
+        elif mode != "inline":
+            raise ValueError(f"Unknown planner mode {mode!r}; expected process, thread or inline")
+
+    def submit(self, request):
+        if self.executor is None:
+            self.results.put((request, None))
+        else:
+            future = self.executor.submit(plan_turn, request)
+            future.add_done_callback(lambda future: self.results.put((request, future)))
+
+    # The turns finished since the last call. A turn whose worker failed (e.g. the process
+    # was killed) is planned here instead, so the game never waits for it forever.
+    def poll(self):
+        turns = []
+        while True:
+            try:
+                request, future = self.results.get_nowait()
+            except queue.Empty:
+                return turns
+            if future is None or future.cancelled() or future.exception() is not None:
+                turns.append(plan_turn(request))
+            else:
+                turns.append(future.result())
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class Opponents:
+    """
+    The suspects the computer plays. Each round they all plan a turn while the detective
+    takes theirs (start_round), and the turns are played out before the detective's next
+    roll (finish_round), once ready() says every plan has come back.
+    """
+
+    def __init__(self, board, count=5, rng=None, planner=None):
+        """
+        Args:
+            board: The MansionBoard being played on.
+            count: Number of opponents, taken in characters.py order.
+            rng: Random source for their dice and plans (defaults to the random module).
+            planner: TurnPlanner to plan with (defaults to one with a worker process).
+        """
+        self.board = board
+        self.rng = rng or random
+        self.planner = planner or TurnPlanner()
+        self.players = []
+        for name, info in list(CHARACTERS.items())[:count]:
+            # Starting squares are for the standard 7x9 mansion; scale them to this one.
+            row, col = info["start"]
+            start = (row * board.rows // 7, col * board.cols // 9)
+            if not board.is_walkable(*start):
+                start = board.start_position
+            self.players.append(Opponent(name, start, info["color"]))
+        self.pending = {}
+        self.round_started = False
+
+    # Send every opponent's next turn off to be planned.
+    def start_round(self):
+        board = self.board
+        room_cells, hint_cells = tuple(board.room_cells), tuple(board.hint_cells)
+        room_weapons, hints = bytes(board.room_weapons), tuple(board.generated_hints)
+        self.pending = {}
+        for opponent in self.players:
+            self.planner.submit(TurnRequest(
+                opponent.name, opponent.position, self.rng.randint(1, 6), self.rng.getrandbits(32),
+                opponent.deduction.candidates, tuple(opponent.visited),
+                board.rows, board.cols, board.walkable, room_cells, room_weapons, hint_cells, hints,
+            ))
+        self.round_started = True
+
+    # True once every turn of the round has been planned. Never waits.
+    def ready(self):
+        for turn in self.planner.poll():
+            self.pending[turn.name] = turn
+        return len(self.pending) == len(self.players)
+
+    def finish_round(self, solution):
+        """
+        Plays out the planned turns in order and returns the suggestions made, as a list
+        of (name, murderer, weapon, room, correct). Play stops at a correct one.
+        Args:
+            solution: The game's solution dict, to check the suggestions against.
+        """
+        suggestions = []
+        for opponent in self.players:
+            turn = self.pending[opponent.name]
+            if turn.path:
+                opponent.position = turn.path[-1]
+            opponent.deduction.candidates = turn.candidates
+            if turn.room is None:
+                continue
+            opponent.visited.add(turn.room)
+            if turn.suggestion is None:
+                continue
+            murderer, weapon = turn.suggestion
+            correct = (murderer, weapon, turn.room) == (solution["murderer"], solution["weapon"], solution["room"])
+            suggestions.append((opponent.name, murderer, weapon, turn.room, correct))
+            if correct:
+                break
+            opponent.deduction.failed_suggestion(murderer, weapon, turn.room)
+        self.pending = {}
+        self.round_started = False
+        return suggestions
+
+    def close(self):
+        self.planner.close()
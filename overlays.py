@@ -0,0 +1,85 @@
+from collections import deque
+
+import pygame
+
+
+class Overlay:
+    # A full-screen message drawn over the game for a while.
+    def __init__(self, draw, duration, dismiss_on_key=True, on_close=None):
+        """
+        Args:
+            draw: Function(screen, screen_width, screen_height) that draws the overlay.
+            duration: Milliseconds to show the overlay once it becomes visible.
+            dismiss_on_key: Close early when any key except ESC is pressed.
+            on_close: Optional function called when the overlay closes.
+        """
+        self.draw = draw
+        self.duration = duration
+        self.dismiss_on_key = dismiss_on_key
+        self.on_close = on_close
+        self.shown_at = None
+
+
+class OverlayQueue:
+    """
+    Timed overlays shown one after another without blocking the event loop.
+    An overlay's timer starts when it reaches the front of the queue, so a hint and a
+    room image triggered together are each shown for their full duration.
+    """
+
+    def __init__(self):
+        self.overlays = deque()
+
+    def push(self, draw, duration, dismiss_on_key=True, on_close=None):
+        overlay = Overlay(draw, duration, dismiss_on_key, on_close)
+        self.overlays.append(overlay)
+        return overlay
+
+    @property
+    def active(self):
+        return bool(self.overlays)
+
+    # Close the front overlay once its time is up. Call once per frame. Returns True if
+    # an overlay closed, so what is on screen has to be drawn again.
+    def update(self, now=None):
+        if not self.overlays:
+            return False
+        now = pygame.time.get_ticks() if now is None else now
+        overlay = self.overlays[0]
+        if overlay.shown_at is None:
+            overlay.shown_at = now
+        elif now - overlay.shown_at >= overlay.duration:
+            self.close()
+            return True
+        return False
+
+    # Milliseconds until the front overlay closes: 0 if it has not started its timer yet,
+    # None if there is no overlay.
+    def time_left(self, now=None):
+        if not self.overlays:
+            return None
+        overlay = self.overlays[0]
+        if overlay.shown_at is None:
+            return 0
+        now = pygame.time.get_ticks() if now is None else now
+        return max(0, overlay.shown_at + overlay.duration - now)
+
+    # Returns True if the event was used to dismiss an overlay.
+    def handle_event(self, event):
+        if not self.overlays or event.type != pygame.KEYDOWN or event.key == pygame.K_ESCAPE:
+            return False
+        if self.overlays[0].dismiss_on_key:
+            self.close()
+        return True
+
+    def close(self):
+        overlay = self.overlays.popleft()
+        if overlay.on_close:
+            overlay.on_close()
+        # The next overlay's timer starts from the next update.
+        if self.overlays:
+            self.overlays[0].shown_at = None
+
+    def draw(self, screen, screen_width, screen_height):
+        if self.overlays:
+            self.overlays[0].draw(screen, screen_width, screen_height)
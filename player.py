@@ -1,32 +1,28 @@
-import pygame
-
 class Player:
+    __slots__ = ("name", "position")
+
+    # Every player token is drawn in this colour.
+    color = (255, 0, 0)
+
     # Start position for the player
     def __init__(self, name, start_position):
         self.name = name
         self.position = start_position 
-        self.color = (255, 0, 0)  
-
-    def render(self, screen, screen_width, screen_height):
-        rows = 7  
-        cols = 9  
-        cell_width = screen_width // cols
-        cell_height = screen_height // rows
 
-        x = self.position[1] * cell_width + cell_width // 2
-        y = self.position[0] * cell_height + cell_height // 2
+    # Draw the player's token where the camera shows its cell. Returns the rect drawn.
+    def render(self, screen, camera):
+        import pygame
 
-        pygame.draw.circle(screen, self.color, (x, y), min(cell_width, cell_height) // 4)
+        center = camera.cell_center(*self.position)
+        return pygame.draw.circle(screen, self.color, center, min(camera.cell_width, camera.cell_height) // 4)
 
     def move(self, direction, board):
         
-        #Move the player if the move is valid.
-        rows = len(board.grid)
-        cols = len(board.grid[0])
+        #Move the player if the move is valid (inside the board and not a wall).
         new_row = self.position[0] + direction[0]
         new_col = self.position[1] + direction[1]
 
-        if 0 <= new_row < rows and 0 <= new_col < cols and board.grid[new_row][new_col] != 'W':
+        if 0 <= new_row < board.rows and 0 <= new_col < board.cols and board.walkable[new_row * board.cols + new_col]:
             self.position = (new_row, new_col)
             return True  
-        return False  
+        return False
@@ -0,0 +1,103 @@
+import csv
+import json
+import os
+from collections import deque
+from time import perf_counter_ns
+
+# Turn profiling on with CLUEDO_PROFILE=1. When off every call returns straight away.
+PROFILE_ENABLED = os.environ.get("CLUEDO_PROFILE") == "1"
+
+
+class FrameProfiler:
+    """
+    Per-phase frame timings for the main loop.
+    Call begin_frame() at the top of the loop and mark(name) after each phase; a mark
+    records the time since the previous mark. The last max_frames frames are kept.
+    """
+
+    def __init__(self, enabled=False, max_frames=600):
+        self.enabled = enabled
+        self.show_overlay = False
+        self.frames = deque(maxlen=max_frames)
+        self.phase_names = []
+        self._phases = {}
+        self._frame_start = 0
+        self._last = 0
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        now = perf_counter_ns()
+        if self._frame_start:
+            self.frames.append((now - self._frame_start, self._phases))
+        self._phases = {}
+        self._frame_start = self._last = now
+
+    def mark(self, name):
+        if not self.enabled:
+            return
+        now = perf_counter_ns()
+        phases = self._phases
+        if name not in phases:
+            phases[name] = 0
+            if name not in self.phase_names:
+                self.phase_names.append(name)
+        phases[name] += now - self._last
+        self._last = now
+
+    def stats(self):
+        if not self.frames:
+            return {"frames": 0, "fps": 0.0, "p50_ms": 0.0, "p99_ms": 0.0, "phases_ms": {}}
+        totals = sorted(total for total, _ in self.frames)
+        count = len(totals)
+        phases_ms = {
+            name: sum(phases.get(name, 0) for _, phases in self.frames) / count / 1e6
+            for name in self.phase_names
+        }
+        return {
+            "frames": count,
+            "fps": count / (sum(totals) / 1e9),
+            "p50_ms": totals[count // 2] / 1e6,
+            "p99_ms": totals[min(count - 1, int(count * 0.99))] / 1e6,
+            "phases_ms": phases_ms,
+        }
+
+    # One row per frame: total and per-phase times in milliseconds.
+    def samples(self):
+        return [
+            dict({"frame_ms": total / 1e6}, **{name: phases.get(name, 0) / 1e6 for name in self.phase_names})
+            for total, phases in self.frames
+        ]
+
+    def export_csv(self, path):
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=["frame_ms"] + self.phase_names)
+            writer.writeheader()
+            writer.writerows(self.samples())
+
+    def export_json(self, path):
+        with open(path, "w") as f:
+            json.dump({"stats": self.stats(), "samples": self.samples()}, f, indent=2)
+
+    # Draw FPS, frame time percentiles and the phase breakdown in the top right corner.
+    # Returns the rect drawn so the caller can push it to the display.
+    def draw_overlay(self, screen, screen_width):
+        import pygame
+        from fonts import render_text
+
+        stats = self.stats()
+        lines = [
+            f"FPS {stats['fps']:.1f}",
+            f"p50 {stats['p50_ms']:.2f} ms  p99 {stats['p99_ms']:.2f} ms",
+        ] + [f"{name}: {ms:.3f} ms" for name, ms in stats["phases_ms"].items()]
+
+        width = 320
+        rect = pygame.Rect(screen_width - width - 10, 10, width, 10 + 22 * len(lines))
+        pygame.draw.rect(screen, (0, 0, 0), rect)
+        for i, line in enumerate(lines):
+            screen.blit(render_text(line, 24, (0, 255, 0)), (rect.x + 8, rect.y + 6 + i * 22))
+        return rect
+
+
+# Shared by the main loop and the render code.
+profiler = FrameProfiler(enabled=PROFILE_ENABLED)
@@ -0,0 +1,246 @@
+import mmap
+import os
+import random
+import struct
+import time
+from collections import namedtuple
+
+from board import make_layout
+from characters import weapons as WEAPONS, rooms as ROOMS
+from deduction import CHARACTERS, CHARACTER_INDEX, WEAPON_INDEX, ROOM_INDEX, Hint, parse_hint
+from engine import GameSession
+from simulation import deductive_suggestion, play_game, room_seeker
+
+# Everything that makes one game different from another. Rooms are listed in
+# characters.rooms order; hints and hint spots are in placement order.
+Puzzle = namedtuple("Puzzle", ["solution", "room_positions", "room_weapons", "hints", "hint_spots", "difficulty"])
+
+DIFFICULTY_BANDS = ["very easy", "easy", "medium", "hard", "very hard"]
+HINTS_PER_PUZZLE = 4
+# Stands for "no weapon" or an unused hint field in one-byte fields.
+NONE = 255
+
+# Catalogue file layout (little endian):
+#   header: magic, version, rows, cols, number of puzzles, number of bands
+#   one band record per band: first puzzle, number of puzzles, hardest difficulty in the band
+#   the puzzles, sorted from easiest to hardest, as fixed-size records: solution,
+#   room cells and weapons, hints, hint cells (cells as row * cols + col) and difficulty
+#   (average turns a deductive player needs). Cells are two bytes, so a catalogue's
+#   mansions have at most MAX_CELLS cells.
+CATALOGUE_MAGIC = b"CLUP"
+CATALOGUE_VERSION = 1
+CATALOGUE_HEADER = struct.Struct("<4sBHHIB")
+BAND_RECORD = struct.Struct("<IIf")
+PUZZLE_RECORD = struct.Struct(f"<3B{len(ROOMS)}H{len(ROOMS)}B{HINTS_PER_PUZZLE * 4}B{HINTS_PER_PUZZLE}Hf")
+MAX_CELLS = 0xFFFF
+
+
+class CatalogueError(ValueError):
+    pass
+
+
+# The puzzle a freshly generated session is playing.
+def puzzle_from_session(session, difficulty=0.0):
+    board = session.board
+    return Puzzle(
+        dict(session.game.solution),
+        tuple(board.rooms[room]["position"] for room in ROOMS),
+        tuple(board.rooms[room]["weapon"] for room in ROOMS),
+        tuple(parse_hint(text) for text in board.generated_hints),
+        tuple(board.hint_spots),
+        difficulty,
+    )
+
+
+def _index_or_none(index, name):
+    return NONE if name is None else index[name]
+
+
+def encode_puzzle(puzzle, cols):
+    solution = puzzle.solution
+    fields = [CHARACTER_INDEX[solution["murderer"]], WEAPON_INDEX[solution["weapon"]], ROOM_INDEX[solution["room"]]]
+    fields += [row * cols + col for row, col in puzzle.room_positions]
+    fields += [_index_or_none(WEAPON_INDEX, weapon) for weapon in puzzle.room_weapons]
+    for hint in puzzle.hints:
+        fields += [hint.kind, _index_or_none(CHARACTER_INDEX, hint.character),
+                   _index_or_none(ROOM_INDEX, hint.room), _index_or_none(CHARACTER_INDEX, hint.partner)]
+    fields += [row * cols + col for row, col in puzzle.hint_spots]
+    fields.append(puzzle.difficulty)
+    return PUZZLE_RECORD.pack(*fields)
+
+
+def decode_puzzle(data, offset, cols):
+    fields = PUZZLE_RECORD.unpack_from(data, offset)
+    murderer, weapon, room = fields[:3]
+    rooms_end = 3 + len(ROOMS)
+    weapons_end = rooms_end + len(ROOMS)
+    hints_end = weapons_end + HINTS_PER_PUZZLE * 4
+    hints = []
+    for i in range(weapons_end, hints_end, 4):
+        kind, character, hint_room, partner = fields[i:i + 4]
+        hints.append(Hint(
+            kind,
+            None if character == NONE else CHARACTERS[character],
+            None if hint_room == NONE else ROOMS[hint_room],
+            None if partner == NONE else CHARACTERS[partner],
+        ))
+    return Puzzle(
+        {"murderer": CHARACTERS[murderer], "weapon": WEAPONS[weapon], "room": ROOMS[room]},
+        tuple(divmod(cell, cols) for cell in fields[3:rooms_end]),
+        tuple(None if weapon == NONE else WEAPONS[weapon] for weapon in fields[rooms_end:weapons_end]),
+        tuple(hints),
+        tuple(divmod(cell, cols) for cell in fields[hints_end:hints_end + HINTS_PER_PUZZLE]),
+        fields[-1],
+    )
+
+
+# Average turns a deductive player (room_seeker + deductive_suggestion) needs to solve
+# the puzzle over several plays; unsolved plays count as max_turns.
+def rate_puzzle(puzzle, rng, plays=16, max_turns=200, layout=None):
+    total = 0
+    for _ in range(plays):
+        result = play_game(random.Random(rng.getrandbits(64)), room_seeker, deductive_suggestion,
+                           max_turns, puzzle=puzzle, layout=layout)
+        total += result.turns if result.solved else max_turns
+    return total / plays
+
+
+# Generate and rate one chunk of puzzles; each chunk has its own RNG stream like simulation.py.
+def _build_chunk(args):
+    seed, chunk_index, count, rows, cols, plays = args
+    rng = random.Random(f"{seed}:{chunk_index}")
+    layout = make_layout(rows, cols)
+    puzzles = []
+    for _ in range(count):
+        session = GameSession(rng=random.Random(rng.getrandbits(64)), layout=layout)
+        if len(session.board.hint_spots) != HINTS_PER_PUZZLE:
+            raise CatalogueError(f"A {rows}x{cols} mansion has no room for {HINTS_PER_PUZZLE} hint spots")
+        puzzle = puzzle_from_session(session)
+        puzzle = puzzle._replace(difficulty=rate_puzzle(puzzle, rng, plays, layout=layout))
+        puzzles.append(puzzle)
+    return puzzles
+
+
+def build_catalogue(path, count, seed=0, rows=7, cols=9, plays=16, workers=None, bands=len(DIFFICULTY_BANDS),
+                    chunk_size=100):
+    """
+    Generates count puzzles, rates each by simulated play and writes them to a catalogue file.
+    Args:
+        path: File to write.
+        count: Number of puzzles (at least one per band).
+        seed: Base seed; the same seed always gives the same catalogue.
+        rows, cols: Mansion size the puzzles are for.
+        plays: Simulated games per puzzle used to rate its difficulty.
+        workers: Number of processes (defaults to the CPU count, 1 runs in this process).
+        bands: Number of difficulty bands; each gets an equal share of the puzzles.
+    """
+    if count < bands:
+        raise CatalogueError(f"Need at least {bands} puzzles for {bands} bands")
+    if rows * cols > MAX_CELLS:
+        raise CatalogueError(f"A {rows}x{cols} mansion is too large for a catalogue (at most {MAX_CELLS} cells)")
+    chunks = [
+        (seed, index, min(chunk_size, count - start), rows, cols, plays)
+        for index, start in enumerate(range(0, count, chunk_size))
+    ]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        chunk_results = list(map(_build_chunk, chunks))
+    else:
+        from multiprocessing import Pool
+
+        with Pool(workers) as pool:
+            chunk_results = pool.map(_build_chunk, chunks)
+    puzzles = sorted((puzzle for chunk in chunk_results for puzzle in chunk), key=lambda puzzle: puzzle.difficulty)
+
+    band_records = []
+    for band in range(bands):
+        start, end = count * band // bands, count * (band + 1) // bands
+        band_records.append(BAND_RECORD.pack(start, end - start, puzzles[end - 1].difficulty))
+    with open(path, "wb") as f:
+        f.write(CATALOGUE_HEADER.pack(CATALOGUE_MAGIC, CATALOGUE_VERSION, rows, cols, count, bands))
+        f.writelines(band_records)
+        f.writelines(encode_puzzle(puzzle, cols) for puzzle in puzzles)
+    return puzzles
+
+
+class Catalogue:
+    """
+    A catalogue file mapped into memory. Picking a puzzle reads one fixed-size record,
+    so it costs the same however large the catalogue is.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            # An empty file cannot be mapped
+            if os.fstat(f.fileno()).st_size < CATALOGUE_HEADER.size:
+                raise CatalogueError(f"{path} is not a puzzle catalogue")
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.rows, self.cols, self.count, band_count = CATALOGUE_HEADER.unpack_from(self.data)
+        if magic != CATALOGUE_MAGIC:
+            raise CatalogueError(f"{path} is not a puzzle catalogue")
+        if version != CATALOGUE_VERSION:
+            raise CatalogueError(f"{path} has unsupported catalogue version {version}")
+        # (first puzzle, number of puzzles, hardest difficulty) per band
+        self.bands = [
+            BAND_RECORD.unpack_from(self.data, CATALOGUE_HEADER.size + band * BAND_RECORD.size)
+            for band in range(band_count)
+        ]
+        self.records_start = CATALOGUE_HEADER.size + band_count * BAND_RECORD.size
+        if len(self.data) != self.records_start + self.count * PUZZLE_RECORD.size:
+            raise CatalogueError(f"{path} is truncated")
+
+    def __len__(self):
+        return self.count
+
+    def puzzle(self, index):
+        return decode_puzzle(self.data, self.records_start + index * PUZZLE_RECORD.size, self.cols)
+
+    # A random puzzle from a difficulty band, given by index or by name when there are
+    # as many bands as DIFFICULTY_BANDS.
+    def pick(self, band, rng=random):
+        if isinstance(band, str):
+            if band not in DIFFICULTY_BANDS:
+                raise CatalogueError(f"Unknown difficulty {band!r}; expected one of {', '.join(DIFFICULTY_BANDS)}")
+            band = DIFFICULTY_BANDS.index(band)
+        if not 0 <= band < len(self.bands):
+            raise CatalogueError(f"The catalogue has no difficulty band {band}")
+        start, count, _ = self.bands[band]
+        return self.puzzle(start + rng.randrange(count))
+
+    # A GameSession ready to play a random puzzle from a band.
+    def new_session(self, band, rng=None, **kwargs):
+        puzzle = self.pick(band, rng or random)
+        return GameSession(rng=rng, layout=make_layout(self.rows, self.cols), puzzle=puzzle, **kwargs)
+
+    def close(self):
+        self.data.close()
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build a catalogue of Cluedo puzzles rated by difficulty.")
+    parser.add_argument("output", help="Catalogue file to write.")
+    parser.add_argument("--puzzles", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--size", default="7x9", help="Mansion size as ROWSxCOLS.")
+    parser.add_argument("--plays", type=int, default=16, help="Simulated games used to rate each puzzle.")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+    rows, cols = (int(n) for n in args.size.lower().split("x"))
+
+    start = time.perf_counter()
+    build_catalogue(args.output, args.puzzles, args.seed, rows, cols, args.plays, args.workers)
+    elapsed = time.perf_counter() - start
+
+    catalogue = Catalogue(args.output)
+    print(f"{len(catalogue)} puzzles in {os.path.getsize(args.output)} bytes, built in {elapsed:.1f}s")
+    previous = 0.0
+    for name, (first, count, hardest) in zip(DIFFICULTY_BANDS, catalogue.bands):
+        print(f"  {name:10s} {count:6d} puzzles, {previous:5.1f}-{hardest:5.1f} turns")
+        previous = hardest
+    catalogue.close()
+
+
+if __name__ == "__main__":
+    main()
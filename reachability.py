@@ -0,0 +1,226 @@
+from array import array
+from collections import OrderedDict, deque
+
+# Layouts with at most this many cells keep the full BFS from every cell once it has been
+# asked for; larger ones search only as far as a query needs, and keep the distances from
+# the most recently used cells, up to this many bytes.
+ALL_PAIRS_LIMIT = 400
+LAZY_BYTES_BUDGET = 64 * 1024 * 1024
+
+
+class _Source:
+    # BFS results from one cell: distance to every cell (-1 if unreachable), the reachable
+    # cells in BFS order (so nearest first), and how many of them are within each distance.
+    __slots__ = ("dist", "order", "level_end", "even", "even_end", "odd", "odd_end", "can_move")
+
+    def __init__(self, dist, order, level_end, even, even_end, odd, odd_end, can_move):
+        self.dist = dist
+        self.order = order
+        self.level_end = level_end
+        self.even = even
+        self.even_end = even_end
+        self.odd = odd
+        self.odd_end = odd_end
+        self.can_move = can_move
+
+
+class Reachability:
+    """
+    Shortest-path distances between the walkable cells of a layout.
+    Small layouts keep the BFS from each cell the first time it is used. Larger layouts answer "within k steps"
+    queries and paths of at most k steps with a search limited to k steps, and compute the
+    distances from a cell to the whole board only for distance() and path(), keeping the most
+    recently used ones. Each query is then a table lookup or a list slice.
+    """
+
+    def __init__(self, rows, cols, walkable):
+        self.rows = rows
+        self.cols = cols
+        self.walkable = walkable
+        self.sources = {}
+        # Large layouts: distance arrays by cell, least recently used first, and their size
+        self.distances = OrderedDict()
+        self.distance_bytes = 0
+        self.all_pairs = rows * cols <= ALL_PAIRS_LIMIT
+
+    # Breadth-first search from a flat cell index. With a limit the search stops at that
+    # distance and keeps distances in a dict, so it costs O(limit^2) on any board size.
+    # Without levels only the distances are returned, not a _Source.
+    def _bfs(self, start, limit=None, levels=True):
+        rows, cols, walkable = self.rows, self.cols, self.walkable
+        if limit is None:
+            dist = array('i', [-1]) * (rows * cols)
+            dist[start] = 0
+            lookup = dist.__getitem__
+        else:
+            dist = {start: 0}
+            lookup = lambda i: dist.get(i, -1)
+        order = [start] if levels else None
+        queue = deque([start])
+        while queue:
+            index = queue.popleft()
+            next_dist = dist[index] + 1
+            if limit is not None and next_dist > limit:
+                continue
+            col = index % cols
+            for neighbor in (
+                index - cols if index >= cols else -1,
+                index + cols if index + cols < rows * cols else -1,
+                index - 1 if col > 0 else -1,
+                index + 1 if col < cols - 1 else -1,
+            ):
+                if neighbor >= 0 and walkable[neighbor] and lookup(neighbor) < 0:
+                    dist[neighbor] = next_dist
+                    if order is not None:
+                        order.append(neighbor)
+                    queue.append(neighbor)
+        if order is None:
+            return dist
+
+        # BFS order is already sorted by distance; record where each distance ends.
+        positions = [divmod(index, cols) for index in order]
+        level_end, even, even_end, odd, odd_end = [], [], [], [], []
+        for index, position in zip(order, positions):
+            d = dist[index]
+            while len(level_end) <= d:
+                level_end.append(level_end[-1] if level_end else 0)
+                even_end.append(len(even))
+                odd_end.append(len(odd))
+            level_end[d] += 1
+            if d % 2 == 0:
+                even.append(position)
+                even_end[d] = len(even)
+            else:
+                odd.append(position)
+                odd_end[d] = len(odd)
+        return _Source(dist, positions, level_end, even, even_end, odd, odd_end, len(order) > 1)
+
+    def _walkable_index(self, position):
+        index = position[0] * self.cols + position[1]
+        if not self.walkable[index]:
+            raise ValueError(f"{position} is not a walkable cell")
+        return index
+
+    # The full BFS from a cell of a small layout, done on first use.
+    def _source(self, position):
+        index = position[0] * self.cols + position[1]
+        source = self.sources.get(index)
+        if source is None:
+            source = self.sources[index] = self._bfs(self._walkable_index(position))
+        return source
+
+    # Distances from a cell to every cell (-1 if unreachable). On large layouts they take
+    # a whole-board BFS, so the most recent ones are kept while they fit LAZY_BYTES_BUDGET.
+    def _distances(self, position):
+        if self.all_pairs:
+            return self._source(position).dist
+        index = position[0] * self.cols + position[1]
+        dist = self.distances.get(index)
+        if dist is not None:
+            self.distances.move_to_end(index)
+            return dist
+        dist = self._bfs(self._walkable_index(position), levels=False)
+        size = len(dist) * dist.itemsize
+        if size <= LAZY_BYTES_BUDGET:
+            self.distances[index] = dist
+            self.distance_bytes += size
+            while self.distance_bytes > LAZY_BYTES_BUDGET:
+                _, evicted = self.distances.popitem(last=False)
+                self.distance_bytes -= len(evicted) * evicted.itemsize
+        return dist
+
+    # BFS results that cover at least k steps from a cell. Large layouts do a fresh search
+    # limited to k steps instead of a whole-board BFS.
+    def _nearby(self, position, k):
+        if self.all_pairs:
+            return self._source(position)
+        return self._bfs(self._walkable_index(position), limit=k)
+
+    # The cells met walking from position to a neighbour one closer each time, steps times.
+    # lookup gives the distance of a flat cell index from where the walk should end.
+    def _descend(self, lookup, position, steps):
+        rows, cols = self.rows, self.cols
+        cells = []
+        row, col = position
+        while steps > 0:
+            for d_row, d_col in ((-1, 0), (1, 0), (0, -1), (0, 1)):
+                next_row, next_col = row + d_row, col + d_col
+                if 0 <= next_row < rows and 0 <= next_col < cols and lookup(next_row * cols + next_col) == steps - 1:
+                    row, col = next_row, next_col
+                    break
+            cells.append((row, col))
+            steps -= 1
+        return cells
+
+    # Fewest steps between two cells, or -1 if there is no path. Steps are the same both
+    # ways, so the distances from end are used: paths to the same rooms reuse them.
+    def distance(self, start, end):
+        if not self.walkable[end[0] * self.cols + end[1]]:
+            return -1
+        return self._distances(end)[start[0] * self.cols + start[1]]
+
+    # Cells at most k steps away (including the start), nearest first.
+    def within(self, start, k):
+        source = self._nearby(start, k)
+        return source.order[:source.level_end[min(k, len(source.level_end) - 1)]]
+
+    # Cells where a move of exactly k steps can end. Steps may go back and forth, so
+    # these are the cells within k steps whose distance has the same parity as k.
+    def exactly(self, start, k):
+        source = self._nearby(start, k)
+        if k > 0 and not source.can_move:
+            return []
+        last = min(k, len(source.level_end) - 1)
+        if k % 2 == 0:
+            return source.even[:source.even_end[last]]
+        return source.odd[:source.odd_end[last]]
+
+    # Shortest list of cells from start to end (excluding start), or None if unreachable.
+    def path(self, start, end):
+        dist = self._distances(end)
+        steps = dist[start[0] * self.cols + start[1]]
+        if steps < 0:
+            return None
+        return self._descend(dist.__getitem__, start, steps)
+
+    # Shortest path from start to end as in path(), or None if it takes more than k steps.
+    # Large layouts only search the cells within k steps of start, so this is cheap enough
+    # to answer a click on any board size.
+    def path_within(self, start, end, k):
+        if self.all_pairs:
+            lookup = self._distances(start).__getitem__
+        else:
+            dist = self._bfs(self._walkable_index(start), limit=k, levels=False)
+            lookup = lambda i: dist.get(i, -1)
+        steps = lookup(end[0] * self.cols + end[1])
+        if steps < 0 or steps > k:
+            return None
+        # Walk back from end to start, then turn the walk round
+        cells = self._descend(lookup, end, steps)
+        return cells[-2::-1] + [tuple(end)] if cells else []
+
+    # Shortest path from start into the named room of a board.
+    def path_to_room(self, start, board, room_name):
+        return self.path(start, board.room_position(room_name))
+
+    # The first step of a shortest path, as a (d_row, d_col) direction, or None.
+    def direction_towards(self, start, end):
+        path = self.path(start, end)
+        if not path:
+            return None
+        return path[0][0] - start[0], path[0][1] - start[1]
+
+
+_cache = {}
+
+
+# The Reachability tables for a board's layout, shared by every board with the same layout.
+def reachability_for(board):
+    cached = _cache.get(id(board.walkable))
+    if cached is not None and cached[0] is board.walkable:
+        return cached[1]
+    reachability = Reachability(board.rows, board.cols, board.walkable)
+    if len(_cache) >= 16:
+        del _cache[next(iter(_cache))]
+    _cache[id(board.walkable)] = (board.walkable, reachability)
+    return reachability
@@ -0,0 +1,267 @@
+import hashlib
+import json
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from collections import namedtuple
+
+from board import ROOM_CODES, ROOM_NAMES, WEAPON_CODES, WEAPON_NAMES
+from deduction import CHARACTER_INDEX, CHARACTERS
+
+# Where finished games are saved. Nothing is saved unless CLUEDO_RESULTS names a file.
+RESULTS_FILE = os.environ.get("CLUEDO_RESULTS")
+
+# How a game ended, as stored in the games table.
+SOLVED = 0
+LOST = 1
+ABANDONED = 2
+OUTCOME_NAMES = ("solved", "lost", "abandoned")
+
+# One finished or abandoned game. layout identifies the mansion (see layout_key);
+# suggestions and hints are the texts from the note sheet, in the order they were made.
+GameRecord = namedtuple("GameRecord", [
+    "finished_at", "outcome", "murderer", "weapon", "room", "layout", "rows", "cols",
+    "rolls", "seconds", "opponents", "suggestions", "hints",
+])
+
+# Every game is a row of games, indexed for the leaderboard. solution_stats and layout_stats
+# keep running totals, updated in the same transaction as the rows they count, so statistics
+# over any number of games are a lookup rather than a scan; layout_stats is indexed in
+# layout_difficulty's order. rolls and seconds in them are totals over solved games.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    finished_at REAL NOT NULL,
+    outcome INTEGER NOT NULL,
+    murderer INTEGER NOT NULL,
+    weapon INTEGER NOT NULL,
+    room INTEGER NOT NULL,
+    layout TEXT NOT NULL,
+    rows INTEGER NOT NULL,
+    cols INTEGER NOT NULL,
+    rolls INTEGER NOT NULL,
+    seconds REAL NOT NULL,
+    opponents INTEGER NOT NULL,
+    suggestions TEXT NOT NULL,
+    hints TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS games_leaderboard ON games (outcome, seconds, rolls);
+CREATE TABLE IF NOT EXISTS solution_stats (
+    murderer INTEGER NOT NULL,
+    weapon INTEGER NOT NULL,
+    room INTEGER NOT NULL,
+    games INTEGER NOT NULL,
+    solved INTEGER NOT NULL,
+    rolls INTEGER NOT NULL,
+    seconds REAL NOT NULL,
+    PRIMARY KEY (murderer, weapon, room)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS layout_stats (
+    layout TEXT PRIMARY KEY,
+    rows INTEGER NOT NULL,
+    cols INTEGER NOT NULL,
+    games INTEGER NOT NULL,
+    solved INTEGER NOT NULL,
+    rolls INTEGER NOT NULL
+) WITHOUT ROWID;
+DROP INDEX IF EXISTS games_solution;
+DROP INDEX IF EXISTS games_layout;
+CREATE INDEX IF NOT EXISTS layout_stats_difficulty
+    ON layout_stats (CAST(solved AS REAL) / games, CAST(rolls AS REAL) / MAX(solved, 1) DESC);
+"""
+
+INSERT_GAME = "INSERT INTO games VALUES (NULL, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+UPDATE_SOLUTION_STATS = """
+INSERT INTO solution_stats VALUES (?, ?, ?, 1, ?, ?, ?)
+ON CONFLICT DO UPDATE SET games = games + 1, solved = solved + excluded.solved,
+    rolls = rolls + excluded.rolls, seconds = seconds + excluded.seconds
+"""
+UPDATE_LAYOUT_STATS = """
+INSERT INTO layout_stats VALUES (?, ?, ?, 1, ?, ?)
+ON CONFLICT DO UPDATE SET games = games + 1, solved = solved + excluded.solved, rolls = rolls + excluded.rolls
+"""
+
+
+# A short id for a board's mansion layout: the same for every game on the same layout.
+def layout_key(board):
+    return hashlib.blake2b(board.cells, digest_size=8).hexdigest()
+
+
+def connect(path):
+    connection = sqlite3.connect(path, timeout=30)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.executescript(SCHEMA)
+    return connection
+
+
+class ResultsStore:
+    """
+    Saves game results to an SQLite database. record() only checks the result and puts
+    it on a queue; a background thread writes whatever has queued up in one transaction,
+    so saving a result never holds up the game loop. The database is in WAL mode, so the
+    queries below (and other processes) can read while the writer writes. A batch that
+    cannot be written is reported on stderr and counted in failed, and the writer goes on.
+    """
+
+    def __init__(self, path, batch_size=256, flush_interval=1.0):
+        """
+        Args:
+            path: The database file; created if it does not exist.
+            batch_size: Most results written in one transaction.
+            flush_interval: Seconds the writer waits for more results before writing.
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.pending = queue.Queue()
+        # Results that could not be written
+        self.failed = 0
+        # Create the tables before the writer starts, so a bad path fails here
+        connect(path).close()
+        self.writer = threading.Thread(target=self.run, name="results-writer", daemon=True)
+        self.writer.start()
+
+    # A ResultsStore saving to CLUEDO_RESULTS, or None when it is not set.
+    @classmethod
+    def from_environment(cls):
+        if not RESULTS_FILE:
+            return None
+        return cls(RESULTS_FILE)
+
+    # Queue a GameRecord to be saved. Never waits. Raises ValueError for a result the
+    # database cannot store, so it fails here rather than in the writer.
+    def record(self, result):
+        if (result.murderer not in CHARACTER_INDEX or result.weapon not in WEAPON_CODES
+                or result.room not in ROOM_CODES or result.outcome not in (SOLVED, LOST, ABANDONED)):
+            raise ValueError(f"cannot save a game of {result.murderer} with {result.weapon} in {result.room}"
+                             f" and outcome {result.outcome!r}")
+        self.pending.put(result)
+
+    def run(self):
+        connection = connect(self.path)
+        closing = False
+        while not closing:
+            batch = [self.pending.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.pending.get(timeout=max(0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            if None in batch:
+                closing = True
+                batch = [result for result in batch if result is not None]
+            try:
+                self.write(connection, batch)
+            except (sqlite3.Error, TypeError, ValueError) as error:
+                self.failed += len(batch)
+                print(f"Error: could not save {len(batch)} game results: {error}", file=sys.stderr)
+        connection.close()
+
+    def write(self, connection, batch):
+        games, solutions, layouts = [], [], []
+        for result in batch:
+            murderer, weapon, room = CHARACTER_INDEX[result.murderer], WEAPON_CODES[result.weapon], ROOM_CODES[result.room]
+            solved = result.outcome == SOLVED
+            games.append((
+                result.finished_at, result.outcome, murderer, weapon, room, result.layout, result.rows, result.cols,
+                result.rolls, result.seconds, result.opponents, json.dumps(result.suggestions), json.dumps(result.hints),
+            ))
+            solutions.append((murderer, weapon, room, solved, result.rolls * solved, result.seconds * solved))
+            layouts.append((result.layout, result.rows, result.cols, solved, result.rolls * solved))
+        with connection:
+            connection.executemany(INSERT_GAME, games)
+            connection.executemany(UPDATE_SOLUTION_STATS, solutions)
+            connection.executemany(UPDATE_LAYOUT_STATS, layouts)
+
+    # Write out what is queued and stop the writer. Check failed afterwards to see whether
+    # everything was saved.
+    def close(self):
+        self.pending.put(None)
+        self.writer.join()
+
+
+class ResultsQueries:
+    # Read-only questions about the saved games.
+    def __init__(self, path):
+        self.connection = connect(path)
+
+    # The fastest solved games, as (seconds, rolls, solution, finished_at).
+    def leaderboard(self, limit=10):
+        rows = self.connection.execute(
+            "SELECT seconds, rolls, murderer, weapon, room, finished_at FROM games"
+            " WHERE outcome = ? ORDER BY seconds, rolls LIMIT ?", (SOLVED, limit),
+        )
+        return [
+            (seconds, rolls, f"{CHARACTERS[murderer]} with {WEAPON_NAMES[weapon]} in {ROOM_NAMES[room]}", finished_at)
+            for seconds, rolls, murderer, weapon, room, finished_at in rows
+        ]
+
+    # Games, solve rate and average rolls to solve for each solution played, or for one.
+    def solution_stats(self, murderer=None, weapon=None, room=None):
+        query = "SELECT murderer, weapon, room, games, solved, rolls FROM solution_stats"
+        params = ()
+        if murderer is not None:
+            query += " WHERE murderer = ? AND weapon = ? AND room = ?"
+            params = (CHARACTER_INDEX[murderer], WEAPON_CODES[weapon], ROOM_CODES[room])
+        return [
+            (CHARACTERS[m], WEAPON_NAMES[w], ROOM_NAMES[r], games, solved / games, rolls / solved if solved else None)
+            for m, w, r, games, solved, rolls in self.connection.execute(query, params)
+        ]
+
+    # The hardest layouts with at least min_games games: lowest solve rate, then most rolls
+    # to solve, as (layout, rows, cols, games, solve rate, average rolls). The ORDER BY has to
+    # match the layout_stats_difficulty index exactly for the index to be used.
+    def layout_difficulty(self, limit=10, min_games=1):
+        rows = self.connection.execute(
+            "SELECT layout, rows, cols, games, solved, rolls FROM layout_stats WHERE games >= ?"
+            " ORDER BY CAST(solved AS REAL) / games, CAST(rolls AS REAL) / MAX(solved, 1) DESC LIMIT ?",
+            (min_games, limit),
+        )
+        return [
+            (layout, rows_, cols, games, solved / games, rolls / solved if solved else None)
+            for layout, rows_, cols, games, solved, rolls in rows
+        ]
+
+    # Number of games saved, from the running totals.
+    def count(self):
+        return self.connection.execute("SELECT COALESCE(SUM(games), 0) FROM layout_stats").fetchone()[0]
+
+    def close(self):
+        self.connection.close()
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Show statistics of the saved Cluedo games.")
+    parser.add_argument("report", choices=("leaderboard", "solutions", "layouts"))
+    parser.add_argument("--db", default=RESULTS_FILE or "cluedo_results.db", help="Results database.")
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    results = ResultsQueries(args.db)
+    start = time.perf_counter()
+    if args.report == "leaderboard":
+        lines = [f"{seconds:8.1f}s {rolls:4d} rolls  {solution}"
+                 for seconds, rolls, solution, _ in results.leaderboard(args.limit)]
+    elif args.report == "solutions":
+        stats = sorted(results.solution_stats(), key=lambda row: row[4])[:args.limit]
+        lines = [f"{murderer} with {weapon} in {room}: {games} games, {rate:.0%} solved"
+                 for murderer, weapon, room, games, rate, _ in stats]
+    else:
+        lines = [f"{layout} ({rows}x{cols}): {games} games, {rate:.0%} solved, "
+                 + (f"{rolls:.1f} rolls to solve" if rolls is not None else "never solved")
+                 for layout, rows, cols, games, rate, rolls in results.layout_difficulty(args.limit)]
+    elapsed = time.perf_counter() - start
+    print("\n".join(lines))
+    print(f"({results.count()} games, query took {elapsed * 1000:.1f} ms)")
+    results.close()
+
+
+if __name__ == "__main__":
+    main()
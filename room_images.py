@@ -0,0 +1,88 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import pygame
+
+
+class RoomImageCache:
+    """
+    Room images decoded and scaled on background threads.
+    Images are keyed by (room, size) and kept in a bounded least-recently-used cache.
+    get() never blocks: until an image is ready it returns a plain placeholder surface.
+    """
+
+    def __init__(self, max_entries=36, workers=4):
+        self.max_entries = max_entries
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="room-images")
+        self.images = OrderedDict()
+        self.pending = {}
+        self.placeholders = {}
+        self.lock = threading.Lock()
+
+    # Start loading every room image at this size (call at startup and when the resolution changes).
+    def preload(self, room_images, size):
+        for room_name, path in room_images.items():
+            self.request(room_name, path, size)
+
+    def request(self, room_name, path, size):
+        key = (room_name, tuple(size))
+        with self.lock:
+            if key in self.images or key in self.pending:
+                return
+            self.pending[key] = self.executor.submit(_load_scaled, path, key[1])
+
+    # The image for this room and size, or a placeholder while it is still loading.
+    def get(self, room_name, path, size):
+        key = (room_name, tuple(size))
+        with self.lock:
+            image = self.images.get(key)
+            if image is not None:
+                self.images.move_to_end(key)
+                return image
+            future = self.pending.get(key)
+            if future is not None and future.done():
+                del self.pending[key]
+                image = future.result()
+                self.images[key] = image
+                while len(self.images) > self.max_entries:
+                    self.images.popitem(last=False)
+                return image
+
+        if future is None:
+            self.request(room_name, path, size)
+        return self.placeholder(key[1])
+
+    def is_ready(self, room_name, size):
+        key = (room_name, tuple(size))
+        with self.lock:
+            return key in self.images or (key in self.pending and self.pending[key].done())
+
+    def placeholder(self, size):
+        surface = self.placeholders.get(size)
+        if surface is None:
+            surface = pygame.Surface(size)
+            surface.fill((40, 40, 40))
+            self.placeholders[size] = surface
+        return surface
+
+    def clear(self):
+        with self.lock:
+            self.images.clear()
+            self.pending.clear()
+
+
+# Runs on a worker thread: decode and scale one image, red square if it cannot be loaded.
+def _load_scaled(path, size):
+    try:
+        image = pygame.image.load(path)
+        return pygame.transform.scale(image, size)
+    except (FileNotFoundError, pygame.error):
+        print(f"Error: Image file {path} not found.")
+        image = pygame.Surface(size)
+        image.fill((255, 0, 0))
+        return image
+
+
+# Shared by every board and game in the process.
+room_image_cache = RoomImageCache()
@@ -0,0 +1,57 @@
+import pygame
+
+# Video drivers whose event wait sleeps until an event arrives. On the others SDL checks
+# for events every millisecond while waiting, so the scheduler sleeps a frame at a time.
+BLOCKING_DRIVERS = {"x11", "wayland", "windows", "cocoa"}
+
+
+class FrameScheduler:
+    """
+    Decides when the main loop runs its next frame. While something is moving (a walk,
+    an overlay about to close) frames run at up to active_fps; otherwise the loop sleeps
+    until an input event arrives, waking idle_fps times a second, so a game nobody is
+    playing uses next to no CPU. Create it once the display is open.
+    """
+
+    def __init__(self, active_fps=30, idle_fps=1):
+        """
+        Args:
+            active_fps: Most frames a second, whatever is happening.
+            idle_fps: Frames a second while waiting for input with nothing to animate.
+                0 waits for input however long it takes.
+        """
+        if active_fps <= 0:
+            raise ValueError(f"active_fps must be at least 1, got {active_fps}")
+        self.active_fps = active_fps
+        self.idle_ms = round(1000 / idle_fps) if idle_fps > 0 else 0
+        self.frame_ms = 1000 // active_fps
+        self.clock = pygame.time.Clock()
+        self.blocking = pygame.display.get_driver() in BLOCKING_DRIVERS
+
+    def events(self, wake_after=None):
+        """
+        Waits for the next frame and returns its input events.
+        Args:
+            wake_after: Milliseconds until the game next changes on its own (see
+                GameLoop.wake_after): 0 for the next frame, None if only input changes it.
+        """
+        self.clock.tick(self.active_fps)
+        events = pygame.event.get()
+        if events or wake_after == 0:
+            return events
+        timeout = self.idle_ms if wake_after is None else min(wake_after, self.idle_ms or wake_after)
+        return self.wait(timeout)
+
+    # The input events once there are some, or [] after timeout milliseconds (0: no timeout).
+    def wait(self, timeout):
+        if self.blocking:
+            event = pygame.event.wait(timeout)
+            if event.type == pygame.NOEVENT:
+                return []
+            return [event] + pygame.event.get()
+        deadline = pygame.time.get_ticks() + timeout if timeout else None
+        while True:
+            pygame.time.wait(min(self.frame_ms, timeout) if timeout else self.frame_ms)
+            events = pygame.event.get()
+            if events or deadline is not None and pygame.time.get_ticks() >= deadline:
+                return events
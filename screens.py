@@ -0,0 +1,293 @@
+import pygame
+
+from board import CHARACTER_NAMES as CHARACTERS, ROOM_NAMES as ROOMS, WEAPON_NAMES as WEAPONS
+from fonts import render_text
+
+WHITE = (255, 255, 255)
+GREY = (100, 100, 100)
+YELLOW = (255, 255, 0)
+
+
+class CachedScreen:
+    """
+    A full-screen page that is composed once into a surface and put on the display only
+    when it changes. Subclasses return everything the page depends on from state() and
+    draw it in compose(); while the state stays the same a frame costs one comparison.
+    Call invalidate() when something else has been drawn over the display.
+    """
+
+    def __init__(self):
+        self.surface = None
+        self.key = None
+        self.on_display = False
+
+    def state(self):
+        return None
+
+    def compose(self, surface, screen_width, screen_height):
+        raise NotImplementedError
+
+    # Bring the surface up to date after the state changed from previous. Screens that can
+    # redraw just the part that changed override this.
+    def recompose(self, surface, screen_width, screen_height, previous):
+        surface.fill((0, 0, 0))
+        self.compose(surface, screen_width, screen_height)
+
+    def invalidate(self):
+        self.on_display = False
+
+    # Returns True if the display was updated.
+    def draw(self, screen, screen_width, screen_height):
+        state = self.state()
+        if self.surface is None or self.surface.get_size() != (screen_width, screen_height):
+            # Same pixel format as the display, so putting it on screen is a plain copy
+            self.surface = pygame.Surface((screen_width, screen_height), 0, screen)
+            self.compose(self.surface, screen_width, screen_height)
+            self.key = state
+            self.on_display = False
+        elif state != self.key:
+            self.recompose(self.surface, screen_width, screen_height, self.key)
+            self.key = state
+            self.on_display = False
+        if self.on_display:
+            return False
+        screen.blit(self.surface, (0, 0))
+        pygame.display.flip()
+        self.on_display = True
+        return True
+
+
+class IntroScreen(CachedScreen):
+    INTRO = [
+        "Welcome to Cluedo! The murder mystery game...",
+        "A murder has been committed in the mansion.",
+        "Your task: Find out who the murderer is, where the crime took place, and the weapon used.",
+        "But be careful - TIME IS RUNNING OUT!",
+    ]
+
+    def compose(self, surface, screen_width, screen_height):
+        for i, line in enumerate(self.INTRO):
+            text = render_text(line, 40, (254, 254, 254))
+            surface.blit(text, text.get_rect(center=(screen_width // 2, screen_height // 2 - 100 + i * 60)))
+        hint_text = render_text("Press ENTER to begin", 28, WHITE)
+        surface.blit(hint_text, hint_text.get_rect(center=(screen_width // 2, screen_height - 100)))
+
+
+class InstructionsScreen(CachedScreen):
+    INSTRUCTIONS = [
+        "1. Roll the dice to move around the mansion.",
+        "2. Move using Arrow Keys on keyboard.",
+        "3. Investigate rooms to gather clues.",
+        "\t\t Clues are given when you land on a Question Mark tile and when you enter a room.",
+        "4. Make suggestions to narrow down suspects, weapons, and locations.",
+        "\t\t You may only make suggestions once you enter a room about that room specifically.",
+        "5. Use the Detective's Note Sheet to track your deductions.",
+        "6. Solve the mystery before time runs out!",
+    ]
+
+    def compose(self, surface, screen_width, screen_height):
+        surface.blit(render_text("Game Instructions", 50, WHITE), (screen_width // 2 - 150, 50))
+        for i, instruction in enumerate(self.INSTRUCTIONS):
+            surface.blit(render_text(instruction, 28, WHITE), (100, 150 + i * 40))
+        surface.blit(render_text("Press I to return to the game", 28, WHITE), (screen_width // 2 - 150, screen_height - 50))
+
+
+class SuggestionScreen(CachedScreen):
+    # The suggestion menu: pick a character (phase 0), then a weapon (phase 1).
+    def __init__(self, characters=CHARACTERS, weapons=WEAPONS):
+        super().__init__()
+        self.characters = characters
+        self.weapons = weapons
+        self.phase = 0
+        self.selected_character = 0
+        self.selected_weapon = 0
+
+    def state(self):
+        return self.phase, self.selected_character, self.selected_weapon
+
+    def compose(self, surface, screen_width, screen_height):
+        if self.phase == 0:
+            title, options, selected = "Select Character", self.characters, self.selected_character
+        else:
+            title, options, selected = "Select Weapon", self.weapons, self.selected_weapon
+        surface.blit(render_text(title, 50, WHITE), (screen_width // 2 - 150, screen_height // 2 - 200))
+        for i, option in enumerate(options):
+            color = WHITE if i == selected else GREY
+            surface.blit(render_text(option, 36, color), (screen_width // 2 - 100, screen_height // 2 - 150 + i * 40))
+
+
+class TextList:
+    # Lines of text that only ever grow; each line is rendered once, when it is added.
+    def __init__(self, size=28, color=WHITE):
+        self.size = size
+        self.color = color
+        self.lines = []
+
+    # Render any entries of texts added since the last sync. Returns True if lines were added.
+    def sync(self, texts):
+        if len(texts) == len(self.lines):
+            return False
+        for text in texts[len(self.lines):]:
+            self.lines.append(render_text(text, self.size, self.color))
+        return True
+
+    def __len__(self):
+        return len(self.lines)
+
+
+class NoteSheetScreen(CachedScreen):
+    """
+    The Detective's Note Sheet. The reference column only changes when the deduction does.
+    Suggestions and hints are rendered once each as they are added, and the list column
+    scrolls, drawing only the rows that fit on screen, so a frame costs the same however
+    long the lists get.
+    """
+
+    LINE_HEIGHT = 30
+    LIST_TOP = 120
+
+    def __init__(self):
+        super().__init__()
+        self.suggestions = TextList()
+        self.room_hints = TextList()
+        self.spot_hints = TextList()
+        self.section_titles = {
+            "suggestions": render_text("Suggestions Made:", 28, WHITE),
+            "hints": render_text("Hints Gathered:", 28, WHITE),
+        }
+        self.empty_lines = {
+            "suggestions": render_text("No suggestions made yet.", 28, WHITE),
+            "hints": render_text("No hints gathered yet.", 28, WHITE),
+        }
+        self.scroll = 0
+        self.visible_rows = 1
+        self.candidates = None
+        self.remaining = None
+        self.reference = None
+        self.versions = 0
+
+    # Bring the lists up to date with the game. Cheap when nothing has changed.
+    def update(self, suggestions_made, room_weapons, hints_gathered, deduction=None):
+        changed = self.suggestions.sync(suggestions_made)
+        if len(room_weapons) != len(self.room_hints):
+            room_hints = [f"The {weapon} is in the {room}." for room, weapon in room_weapons.items()]
+            changed = self.room_hints.sync(room_hints) or changed
+        changed = self.spot_hints.sync(hints_gathered) or changed
+        if changed:
+            self.versions += 1
+        if deduction is not None and deduction.candidates != self.candidates:
+            self.candidates = deduction.candidates
+            self.remaining = deduction.marginals(), deduction.count()
+            self.reference = None
+
+    # Rows of the list column: section title, entries (or the empty message), a blank row.
+    def row_count(self):
+        return 2 + max(1, len(self.suggestions)) + 1 + max(1, len(self.room_hints) + len(self.spot_hints))
+
+    def row(self, index):
+        suggestion_rows = max(1, len(self.suggestions))
+        if index == 0:
+            return self.section_titles["suggestions"]
+        index -= 1
+        if index < suggestion_rows:
+            return self.suggestions.lines[index] if self.suggestions.lines else self.empty_lines["suggestions"]
+        index -= suggestion_rows
+        if index == 0:
+            return None
+        if index == 1:
+            return self.section_titles["hints"]
+        index -= 2
+        if index < len(self.room_hints):
+            return self.room_hints.lines[index]
+        index -= len(self.room_hints)
+        if index < len(self.spot_hints):
+            return self.spot_hints.lines[index]
+        return self.empty_lines["hints"] if index == 0 and not len(self.room_hints) else None
+
+    def max_scroll(self):
+        return max(0, self.row_count() - self.visible_rows)
+
+    def scroll_by(self, rows):
+        self.scroll = min(max(self.scroll + rows, 0), self.max_scroll())
+
+    # Scroll keys while the sheet is open. Returns True if the key was used.
+    def handle_key(self, key):
+        page = max(1, self.visible_rows - 1)
+        steps = {pygame.K_UP: -1, pygame.K_DOWN: 1, pygame.K_PAGEUP: -page, pygame.K_PAGEDOWN: page}
+        if key == pygame.K_HOME:
+            self.scroll = 0
+        elif key == pygame.K_END:
+            self.scroll = self.max_scroll()
+        elif key in steps:
+            self.scroll_by(steps[key])
+        else:
+            return False
+        return True
+
+    def state(self):
+        return self.versions, self.scroll, self.candidates
+
+    def compose(self, surface, screen_width, screen_height):
+        self.visible_rows = max(1, (screen_height - 80 - self.LIST_TOP) // self.LINE_HEIGHT)
+        surface.blit(render_text("Detective's Note Sheet", 50, WHITE), (screen_width // 2 - 200, 50))
+        surface.blit(self.reference_surface(), (100, 120))
+        self.compose_list(surface, screen_width, screen_height)
+        surface.blit(render_text("Press L to return to the game", 28, WHITE), (screen_width // 2 - 150, screen_height - 50))
+
+    # Scrolling or a new entry only draws the list column again. A new clue changes the
+    # reference column as well, which is rare enough to draw the whole sheet.
+    def recompose(self, surface, screen_width, screen_height, previous):
+        if previous[2] != self.candidates:
+            super().recompose(surface, screen_width, screen_height, previous)
+        else:
+            self.compose_list(surface, screen_width, screen_height)
+
+    # The rows of the list column that fit on screen, and where they are in the list. The
+    # column is drawn on a new surface: it starts out black, which is quicker than clearing
+    # part of the screen surface with fill().
+    def compose_list(self, surface, screen_width, screen_height):
+        self.scroll = min(self.scroll, self.max_scroll())
+        x = screen_width // 2 + 50
+        size = (screen_width - x, screen_height - 50 - self.LIST_TOP)
+        column = pygame.Surface(size, 0, surface)
+        for i in range(self.scroll, min(self.row_count(), self.scroll + self.visible_rows)):
+            line = self.row(i)
+            if line is not None:
+                column.blit(line, (0, (i - self.scroll) * self.LINE_HEIGHT))
+        if self.max_scroll():
+            more = f"Rows {self.scroll + 1}-{self.scroll + self.visible_rows} of {self.row_count()} (UP/DOWN to scroll)"
+            column.blit(render_text(more, 24, YELLOW), (0, size[1] - 30))
+        surface.blit(column, (x, self.LIST_TOP))
+
+    def reference_surface(self):
+        if self.reference is None:
+            self.reference = self.compose_reference()
+        return self.reference
+
+    # Reference list; names the clues have ruled out are greyed out. Kept as its own
+    # surface so scrolling or a new hint does not draw it again.
+    def compose_reference(self):
+        marginals, count = self.remaining if self.remaining else (None, None)
+        surface = pygame.Surface((360, 860))
+
+        def entry_color(group, name):
+            if marginals and marginals[group][name] == 0:
+                return GREY
+            return WHITE
+
+        surface.blit(render_text("Reference:", 28, WHITE), (0, 0))
+        y_offset = 30
+        for heading, group, names in (
+            ("Characters:", "characters", CHARACTERS),
+            ("Weapons:", "weapons", WEAPONS),
+            ("Locations:", "rooms", ROOMS),
+        ):
+            surface.blit(render_text(heading, 28, WHITE), (0, y_offset))
+            for name in names:
+                surface.blit(render_text(name, 28, entry_color(group, name)), (20, y_offset + 30))
+                y_offset += 30
+            y_offset += 40
+
+        if count is not None:
+            surface.blit(render_text(f"Possible solutions left: {count}", 28, YELLOW), (0, y_offset + 20))
+        return surface
@@ -0,0 +1,253 @@
+import argparse
+import asyncio
+import base64
+import hmac
+import itertools
+import json
+import os
+import random
+import time
+from collections import deque
+
+from characters import characters as CHARACTERS, weapons as WEAPONS
+from engine import GameSession
+from event_log import EventLog
+from session_memory import bytes_per_session
+from snapshot import SnapshotError, dumps, loads
+
+DIRECTIONS = {"up": (-1, 0), "down": (1, 0), "left": (0, -1), "right": (0, 1)}
+# Latency samples kept per action for the stats report.
+LATENCY_SAMPLES = 10000
+
+
+class GameError(Exception):
+    # A request that cannot be carried out; sent back to the client as an error message.
+    pass
+
+
+def session_state(session):
+    return {
+        "position": list(session.player.position),
+        "spaces_left": session.spaces_left_to_move,
+        "current_room": session.current_room,
+        "rolls": session.rolls,
+        "solved": session.solved,
+    }
+
+
+class GameServer:
+    """
+    Hosts many independent game sessions behind a line-delimited JSON protocol.
+    Every request is one JSON object per line with an "action" and, apart from "new" and
+    "stats", the "session" id it applies to. Every reply is one JSON object per line with
+    "ok" and either the result or an "error". An optional "id" is echoed back.
+
+    Actions: new [seed], roll, move direction, suggest murderer weapon, notes, state, close, stats,
+    snapshot (the session as a base64 snapshot) and restore snapshot (a new session from one),
+    which lets a game move between server processes. A snapshot holds the solution and the
+    dice generator's state, so snapshot and restore are only for other servers: they need
+    the server's admin token, and are turned off when it has none.
+    """
+
+    # events: optional event_log.EventLog the games' events are logged to.
+    # admin_token: the "token" snapshot and restore requests have to give, or None.
+    def __init__(self, max_sessions=100000, events=None, admin_token=None):
+        self.max_sessions = max_sessions
+        self.events = events
+        self.admin_token = admin_token
+        self.sessions = {}
+        self.session_ids = itertools.count(1)
+        self.latencies = {}
+        self.bytes_per_session = None
+
+    def handle(self, request):
+        action = request.get("action")
+        handler = getattr(self, f"do_{action}", None) if isinstance(action, str) else None
+        if handler is None:
+            raise GameError(f"unknown action {action!r}")
+
+        start = time.perf_counter_ns()
+        result = handler(request)
+        samples = self.latencies.get(action)
+        if samples is None:
+            samples = self.latencies[action] = deque(maxlen=LATENCY_SAMPLES)
+        samples.append(time.perf_counter_ns() - start)
+        return result
+
+    def get_session(self, request):
+        session_id = request.get("session")
+        # Session ids are ints; anything else (e.g. a list, which cannot be looked up) is unknown
+        session = self.sessions.get(session_id) if type(session_id) is int else None
+        if session is None:
+            raise GameError("no such session")
+        return session
+
+    def do_new(self, request):
+        if len(self.sessions) >= self.max_sessions:
+            raise GameError("server is full")
+        seed = request.get("seed")
+        if seed is not None and type(seed) not in (int, str):
+            raise GameError("seed must be an integer or a string")
+        session_id = next(self.session_ids)
+        # Every session has its own generator, so one game's actions never change another's dice
+        self.sessions[session_id] = GameSession(rng=random.Random(seed), events=self.events)
+        return {"session": session_id, "state": session_state(self.sessions[session_id])}
+
+    def do_roll(self, request):
+        session = self.get_session(request)
+        roll = session.roll()
+        if not roll:
+            raise GameError("finish moving before rolling again")
+        return {"roll": roll, "state": session_state(session)}
+
+    def do_move(self, request):
+        session = self.get_session(request)
+        direction = request.get("direction")
+        direction = DIRECTIONS.get(direction) if isinstance(direction, str) else None
+        if direction is None:
+            raise GameError("direction must be up, down, left or right")
+        hints_before = len(session.hints_gathered)
+        rooms_before = len(session.room_weapons)
+
+        result = {"moved": session.move(direction), "state": session_state(session)}
+        if len(session.hints_gathered) > hints_before:
+            result["hint"] = session.hints_gathered[-1]
+        if len(session.room_weapons) > rooms_before:
+            result["room_weapon"] = session.room_weapons[session.current_room]
+        return result
+
+    def do_suggest(self, request):
+        session = self.get_session(request)
+        murderer, weapon = request.get("murderer"), request.get("weapon")
+        if not isinstance(murderer, str) or murderer not in CHARACTERS or weapon not in WEAPONS:
+            raise GameError("unknown murderer or weapon")
+        if not session.can_suggest():
+            raise GameError("you can only make a suggestion in a room after moving")
+        return {"correct": session.suggest(murderer, weapon), "state": session_state(session)}
+
+    def do_notes(self, request):
+        session = self.get_session(request)
+        return {
+            "suggestions": session.suggestions_made,
+            "hints": session.hints_gathered,
+            "room_weapons": session.room_weapons,
+            "possible_solutions": session.deduction.count(),
+        }
+
+    def do_state(self, request):
+        return {"state": session_state(self.get_session(request))}
+
+    def check_admin(self, request):
+        token = request.get("token")
+        if self.admin_token is None:
+            raise GameError("snapshots are turned off on this server")
+        if not isinstance(token, str) or not hmac.compare_digest(token.encode(), self.admin_token.encode()):
+            raise GameError("snapshot and restore need the admin token")
+
+    def do_snapshot(self, request):
+        self.check_admin(request)
+        session = self.get_session(request)
+        return {"snapshot": base64.b64encode(dumps(session, include_rng=True)).decode()}
+
+    def do_restore(self, request):
+        self.check_admin(request)
+        if len(self.sessions) >= self.max_sessions:
+            raise GameError("server is full")
+        snapshot = request.get("snapshot")
+        if not isinstance(snapshot, str):
+            raise GameError("snapshot must be a base64 string")
+        try:
+            session = loads(base64.b64decode(snapshot))
+        except (SnapshotError, ValueError) as error:
+            raise GameError(f"bad snapshot: {error}") from None
+        session_id = next(self.session_ids)
+        self.sessions[session_id] = session
+        return {"session": session_id, "state": session_state(session)}
+
+    def do_close(self, request):
+        self.get_session(request)
+        del self.sessions[request["session"]]
+        return {}
+
+    def do_stats(self, request):
+        latency_us = {}
+        for action, samples in self.latencies.items():
+            ordered = sorted(samples)
+            latency_us[action] = {
+                "count": len(ordered),
+                "p50": ordered[len(ordered) // 2] / 1000,
+                "p99": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] / 1000,
+            }
+        return {
+            "sessions": len(self.sessions),
+            "bytes_per_session": self.bytes_per_session,
+            "latency_us": latency_us,
+        }
+
+    # Estimate memory per session by creating sample sessions under tracemalloc
+    # (see session_memory.py for a full report).
+    def measure_session_memory(self, samples=1000):
+        self.bytes_per_session = int(bytes_per_session(samples)[0])
+        return self.bytes_per_session
+
+    async def serve_client(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                request = {}
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise GameError("request must be a JSON object")
+                    reply = dict(self.handle(request), ok=True)
+                except (GameError, TypeError, ValueError) as error:
+                    # Bad requests get an error reply; the connection stays open
+                    reply = {"ok": False, "error": str(error)}
+                if isinstance(request, dict) and "id" in request:
+                    reply["id"] = request["id"]
+                writer.write(json.dumps(reply).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(server, host="127.0.0.1", port=8765, unix_path=None):
+    if unix_path:
+        listener = await asyncio.start_unix_server(server.serve_client, path=unix_path)
+        print(f"Serving on {unix_path}")
+    else:
+        listener = await asyncio.start_server(server.serve_client, host, port)
+        print(f"Serving on {host}:{port}")
+    async with listener:
+        await listener.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Host many Cluedo games over line-delimited JSON.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="Listen on this Unix socket path instead of TCP.")
+    parser.add_argument("--max-sessions", type=int, default=100000)
+    parser.add_argument("--admin-token", default=os.environ.get("CLUEDO_ADMIN_TOKEN"),
+                        help="Token for the snapshot and restore actions (default $CLUEDO_ADMIN_TOKEN; "
+                             "without one they are turned off).")
+    args = parser.parse_args()
+
+    server = GameServer(max_sessions=args.max_sessions, events=EventLog.from_environment(),
+                        admin_token=args.admin_token)
+    print(f"About {server.measure_session_memory()} bytes per session")
+    try:
+        asyncio.run(serve(server, args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if server.events is not None:
+            server.events.close()
+
+
+if __name__ == "__main__":
+    main()
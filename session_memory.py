@@ -0,0 +1,54 @@
+import gc
+import random
+import tracemalloc
+
+from engine import GameSession
+
+
+# Bytes of memory each live session takes, measured with tracemalloc over count sessions.
+# Returns (bytes per session, the sessions' biggest allocation sites as (file:line, bytes per session)).
+def bytes_per_session(count=1000, shared_rng=False, top=0):
+    """
+    Args:
+        count: Number of sessions to create and keep alive while measuring.
+        shared_rng: Let the sessions share one generator, as simulations can. Otherwise every
+            session has its own random.Random, as on the server.
+        top: Number of allocation sites to return, biggest first.
+    """
+    rng = random.Random(0)
+    GameSession(rng=rng)  # Warm up the shared layout and hint tables
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot() if top else None
+    start = tracemalloc.get_traced_memory()[0]
+    sessions = [GameSession(rng=rng if shared_rng else random.Random(i)) for i in range(count)]
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0] - start
+    sites = []
+    if top:
+        for stat in tracemalloc.take_snapshot().compare_to(before, "lineno")[:top]:
+            frame = stat.traceback[0]
+            sites.append((f"{frame.filename}:{frame.lineno}", stat.size_diff / count))
+    tracemalloc.stop()
+    del sessions
+    return size / count, sites
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Report how much memory each live game session takes.")
+    parser.add_argument("--sessions", type=int, default=100000, help="Number of idle sessions to keep alive.")
+    parser.add_argument("--shared-rng", action="store_true", help="Let the sessions share one random generator.")
+    parser.add_argument("--top", type=int, default=10, help="Show this many of the biggest allocation sites.")
+    args = parser.parse_args()
+
+    per_session, sites = bytes_per_session(args.sessions, args.shared_rng, args.top)
+    print(f"{args.sessions} sessions: {per_session:,.0f} bytes per session, "
+          f"{per_session * args.sessions / 2**20:,.1f} MiB in total")
+    for site, size in sites:
+        print(f"  {size:8.1f} bytes  {site}")
+
+
+if __name__ == "__main__":
+    main()
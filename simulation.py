@@ -0,0 +1,164 @@
+import os
+import random
+import time
+from collections import namedtuple
+
+from characters import characters as CHARACTERS, weapons as WEAPONS
+from engine import GameSession
+from reachability import reachability_for
+
+DIRECTIONS = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+
+GameResult = namedtuple("GameResult", ["solved", "turns", "moves", "suggestions", "hints"])
+
+
+# Movement policy: step in a random direction that is not a wall.
+def random_walk(session):
+    board = session.board
+    row, col = session.player.position
+    options = [(d_row, d_col) for d_row, d_col in DIRECTIONS if board.is_walkable(row + d_row, col + d_col)]
+    return session.rng.choice(options)
+
+
+# Movement policy: head for the nearest room that has not been visited yet, then for
+# the nearest room the clues have not ruled out, stepping off it if spaces are left.
+def room_seeker(session):
+    board = session.board
+    position = session.player.position
+    reach = reachability_for(board)
+    targets = [room for room in board.room_names if room not in session.room_weapons]
+    if not targets:
+        possible_rooms = session.deduction.marginals()["rooms"]
+        targets = [room for room in board.room_names if possible_rooms[room]] or board.room_names
+    target = min(targets, key=lambda room: reach.distance(position, board.room_position(room)))
+    return reach.direction_towards(position, board.room_position(target)) or random_walk(session)
+
+
+# Suggestion policy: guess any suspect and weapon not already suggested for this room.
+def random_suggestion(session):
+    tried = set(session.suggestions_made)
+    options = [
+        (character, weapon)
+        for character in CHARACTERS
+        for weapon in WEAPONS
+        if f"{character} with {weapon} in {session.current_room}" not in tried
+    ]
+    if not options:
+        return None
+    return session.rng.choice(options)
+
+
+# Suggestion policy: pick one of the solutions for this room that the clues have not ruled out.
+def deductive_suggestion(session):
+    options = session.deduction.remaining(session.current_room)
+    if not options:
+        return None
+    murderer, weapon, _ = session.rng.choice(options)
+    return murderer, weapon
+
+
+MOVE_POLICIES = {"random_walk": random_walk, "room_seeker": room_seeker}
+SUGGESTION_POLICIES = {"random_suggestion": random_suggestion, "deductive_suggestion": deductive_suggestion}
+
+
+# Play one game to the end (or until max_turns dice rolls) and return its result.
+def play_game(rng, move_policy=random_walk, suggestion_policy=random_suggestion, max_turns=500, hint_bits=None,
+              puzzle=None, layout=None):
+    session = GameSession(rng=rng, layout=layout, hint_bits=hint_bits, puzzle=puzzle)
+    while not session.solved and session.rolls < max_turns:
+        session.roll()
+        while session.spaces_left_to_move > 0:
+            session.move(move_policy(session))
+        if session.can_suggest():
+            suggestion = suggestion_policy(session)
+            if suggestion:
+                session.suggest(*suggestion)
+
+    return GameResult(
+        session.solved,
+        session.rolls,
+        session.moves,
+        len(session.suggestions_made),
+        len(session.hints_gathered),
+    )
+
+
+# Each chunk gets its own RNG stream derived from the seed and the chunk number,
+# so results do not depend on how many workers are used.
+def _run_chunk(args):
+    seed, chunk_index, n_games, move_policy, suggestion_policy, max_turns, hint_bits = args
+    rng = random.Random(f"{seed}:{chunk_index}")
+    return [play_game(rng, move_policy, suggestion_policy, max_turns, hint_bits) for _ in range(n_games)]
+
+
+def simulate(n_games, seed=0, workers=None, move_policy=random_walk,
+             suggestion_policy=random_suggestion, max_turns=500, chunk_size=1000, hint_bits=None):
+    """
+    Runs n_games complete games across a process pool.
+    Args:
+        n_games: Number of games to play.
+        seed: Base seed; the same seed always gives the same results.
+        workers: Number of processes (defaults to the CPU count, 1 runs in this process).
+        move_policy: Function(session) -> direction for each step.
+        suggestion_policy: Function(session) -> (murderer, weapon) or None when in a room.
+        max_turns: Dice rolls after which an unsolved game is abandoned.
+        chunk_size: Games handed to a worker at a time.
+        hint_bits: Generate hints that together give about this many bits of information.
+    Returns:
+        A list of GameResult, one per game, in chunk order.
+    """
+    chunks = [
+        (seed, index, min(chunk_size, n_games - start), move_policy, suggestion_policy, max_turns, hint_bits)
+        for index, start in enumerate(range(0, n_games, chunk_size))
+    ]
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1:
+        chunk_results = map(_run_chunk, chunks)
+        return [result for chunk in chunk_results for result in chunk]
+
+    from multiprocessing import Pool
+
+    with Pool(workers) as pool:
+        chunk_results = pool.map(_run_chunk, chunks)
+    return [result for chunk in chunk_results for result in chunk]
+
+
+def summarize(results):
+    solved = [result for result in results if result.solved]
+    return {
+        "games": len(results),
+        "solved": len(solved),
+        "solve_rate": len(solved) / len(results) if results else 0.0,
+        "avg_turns_to_solve": sum(r.turns for r in solved) / len(solved) if solved else 0.0,
+        "avg_suggestions": sum(r.suggestions for r in results) / len(results) if results else 0.0,
+        "avg_hints": sum(r.hints for r in results) / len(results) if results else 0.0,
+    }
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run headless Cluedo games.")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--max-turns", type=int, default=500)
+    parser.add_argument("--move-policy", choices=sorted(MOVE_POLICIES), default="random_walk")
+    parser.add_argument("--suggestion-policy", choices=sorted(SUGGESTION_POLICIES), default="random_suggestion")
+    parser.add_argument("--hint-bits", type=float, help="Pick hints that rule out about this many bits.")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    results = simulate(args.games, args.seed, args.workers, move_policy=MOVE_POLICIES[args.move_policy],
+                       suggestion_policy=SUGGESTION_POLICIES[args.suggestion_policy], max_turns=args.max_turns,
+                       hint_bits=args.hint_bits)
+    elapsed = time.perf_counter() - start
+
+    for key, value in summarize(results).items():
+        print(f"{key}: {value}")
+    print(f"elapsed: {elapsed:.2f}s ({args.games / elapsed:.0f} games/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+import math
+import random
+import struct
+import time
+
+from board import make_layout
+from characters import weapons as WEAPONS, rooms as ROOMS
+from deduction import CHARACTERS, CHARACTER_INDEX, WEAPON_INDEX, ROOM_INDEX, NUM_CANDIDATES
+from engine import GameSession
+
+DIRECTIONS = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+DIRECTION_INDEX = {direction: i for i, direction in enumerate(DIRECTIONS)}
+SUGGESTION_INDEX = {
+    f"{c} with {w} in {r}": (ci, wi, ri)
+    for ci, c in enumerate(CHARACTERS) for wi, w in enumerate(WEAPONS) for ri, r in enumerate(ROOMS)
+}
+# Stands for "no room" or "no weapon" in one-byte fields.
+NONE = 255
+
+# Snapshot layout (little endian). Bump SNAPSHOT_VERSION whenever a record changes.
+#   header: magic, version, rows, cols, solution murderer, weapon and room
+#   one room record per room, in characters.rooms order: position and weapon
+#   state: player position, spaces left, current room, last room, rolls, moves, solved
+#   the deduction bitset, then counted lists of hints, hint spots, hints gathered,
+#   room weapons seen and suggestions made, then the random generator state if saved.
+SNAPSHOT_MAGIC = b"CLUS"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_HEADER = struct.Struct("<4sBHHBBB")
+ROOM_RECORD = struct.Struct("<HHB")
+STATE_RECORD = struct.Struct("<HHBBBIIB")
+DEDUCTION_BYTES = (NUM_CANDIDATES + 7) // 8
+POSITION = struct.Struct("<HH")
+PAIR = struct.Struct("<BB")
+TRIPLE = struct.Struct("<BBB")
+COUNT = struct.Struct("<H")
+RNG_STATE = struct.Struct("<625I")
+GAUSS = struct.Struct("<d")
+
+# Action log layout: a header with the seed, board size and hint_bits (NaN for none), then
+# one two-byte record (action, argument) per roll, move or suggestion. Records are only
+# ever appended.
+LOG_MAGIC = b"CLUL"
+LOG_VERSION = 2
+LOG_HEADER = struct.Struct("<4sBqHHd")
+LOG_RECORD = PAIR
+ACTION_ROLL = 0
+ACTION_MOVE = 1
+ACTION_SUGGEST = 2
+
+
+class SnapshotError(ValueError):
+    pass
+
+
+def _room_byte(room):
+    return NONE if room is None else ROOM_INDEX[room]
+
+
+def _weapon_byte(weapon):
+    return NONE if weapon is None else WEAPON_INDEX[weapon]
+
+
+# Encode a GameSession as a compact binary snapshot. With include_rng the random generator
+# state is saved too (about 2.5 KB), so a restored session rolls the same dice as the original.
+# A snapshot holds the solution, and the generator state predicts every later roll and any
+# other game drawing from the same generator, so never hand one to a player.
+# Only sessions on the standard mansions (make_layout) can be saved, as only the size is stored.
+# Snapshots are of headless GameSessions (the server, simulations and replays): the pygame
+# main loop keeps its own state, so games played in the window cannot be saved.
+def dumps(session, include_rng=False):
+    board, game = session.board, session.game
+    if board.layout is not make_layout(board.rows, board.cols):
+        raise SnapshotError("only games on the standard mansion layouts can be saved")
+    solution = game.solution
+    parts = [SNAPSHOT_HEADER.pack(
+        SNAPSHOT_MAGIC, SNAPSHOT_VERSION, board.rows, board.cols,
+        CHARACTER_INDEX[solution["murderer"]], WEAPON_INDEX[solution["weapon"]], ROOM_INDEX[solution["room"]],
+    )]
+    # The board keeps rooms and weapons as the same codes a snapshot uses (NONE for no weapon)
+    for cell, weapon in zip(board.room_cells, board.room_weapons):
+        parts.append(ROOM_RECORD.pack(*divmod(cell, board.cols), weapon))
+    parts.append(STATE_RECORD.pack(
+        *session.player.position, session.spaces_left_to_move,
+        _room_byte(session.current_room), _room_byte(session.last_room),
+        session.rolls, session.moves, session.solved,
+    ))
+    parts.append(session.deduction.candidates.to_bytes(DEDUCTION_BYTES, "little"))
+
+    parts.append(bytes([len(board.generated_hints)]))
+    for hint in board.generated_hints:
+        text = hint.encode()
+        parts.append(bytes([len(text)]) + text)
+    parts.append(bytes([len(board.hint_cells)]))
+    parts.extend(POSITION.pack(*divmod(cell, board.cols)) for cell in board.hint_cells)
+    parts.append(bytes([len(session.hints_gathered)]))
+    parts.append(bytes(board.generated_hints.index(hint) for hint in session.hints_gathered))
+    parts.append(bytes([len(session.room_weapons)]))
+    parts.extend(PAIR.pack(ROOM_INDEX[room], _weapon_byte(weapon)) for room, weapon in session.room_weapons.items())
+    parts.append(COUNT.pack(len(session.suggestions_made)))
+    parts.extend(TRIPLE.pack(*SUGGESTION_INDEX[text]) for text in session.suggestions_made)
+
+    if include_rng:
+        _, state, gauss = session.rng.getstate()
+        parts.append(bytes([1 if gauss is None else 2]))
+        parts.append(RNG_STATE.pack(*state))
+        if gauss is not None:
+            parts.append(GAUSS.pack(gauss))
+    else:
+        parts.append(bytes([0]))
+    return b"".join(parts)
+
+
+# Rebuild a GameSession from dumps() output. Without a saved generator state the session
+# continues with rng (or a fresh random.Random()). The whole snapshot is decoded and
+# checked before anything is built, so corrupt data fails fast with a SnapshotError.
+def loads(data, rng=None):
+    offset = 0
+
+    def read(record):
+        nonlocal offset
+        values = record.unpack_from(data, offset)
+        offset += record.size
+        return values
+
+    def read_byte():
+        nonlocal offset
+        offset += 1
+        return data[offset - 1]
+
+    try:
+        magic, version, rows, cols, murderer, weapon, room = read(SNAPSHOT_HEADER)
+        if magic != SNAPSHOT_MAGIC:
+            raise SnapshotError("not a game snapshot")
+        if version != SNAPSHOT_VERSION:
+            raise SnapshotError(f"unsupported snapshot version {version}")
+        solution = {"murderer": CHARACTERS[murderer], "weapon": WEAPONS[weapon], "room": ROOMS[room]}
+        rooms = {}
+        for name in ROOMS:
+            row, col, weapon = read(ROOM_RECORD)
+            rooms[name] = {"position": (row, col), "weapon": None if weapon == NONE else WEAPONS[weapon]}
+        row, col, spaces_left, current_room, last_room, rolls, moves, solved = read(STATE_RECORD)
+        current_room = None if current_room == NONE else ROOMS[current_room]
+        last_room = None if last_room == NONE else ROOMS[last_room]
+        candidates = int.from_bytes(data[offset:offset + DEDUCTION_BYTES], "little")
+        offset += DEDUCTION_BYTES
+
+        hints = []
+        for _ in range(read_byte()):
+            length = read_byte()
+            hints.append(bytes(data[offset:offset + length]).decode())
+            offset += length
+        hint_spots = [read(POSITION) for _ in range(read_byte())]
+        hints_gathered = [hints[read_byte()] for _ in range(read_byte())]
+        room_weapons = {}
+        for _ in range(read_byte()):
+            seen_room, seen_weapon = read(PAIR)
+            room_weapons[ROOMS[seen_room]] = None if seen_weapon == NONE else WEAPONS[seen_weapon]
+        suggestions = [
+            f"{CHARACTERS[c]} with {WEAPONS[w]} in {ROOMS[r]}" for c, w, r in (read(TRIPLE) for _ in range(read(COUNT)[0]))
+        ]
+
+        rng_kind = read_byte()
+        if rng_kind:
+            state = read(RNG_STATE)
+            gauss = read(GAUSS)[0] if rng_kind == 2 else None
+            rng = random.Random()
+            rng.setstate((3, state, gauss))
+    except (struct.error, IndexError, UnicodeDecodeError) as error:
+        raise SnapshotError(f"corrupt snapshot: {error}") from None
+
+    positions = [info["position"] for info in rooms.values()] + hint_spots + [(row, col)]
+    if offset != len(data) or any(r >= rows or c >= cols for r, c in positions):
+        raise SnapshotError("corrupt snapshot")
+
+    # Build the session with a throwaway generator, then overwrite everything it randomized.
+    session = GameSession(rng=random.Random(0), layout=make_layout(rows, cols))
+    board, game = session.board, session.game
+    game.solution = solution
+    for room, info in rooms.items():
+        board.rooms[room]["position"] = info["position"]
+        board.rooms[room]["weapon"] = info["weapon"]
+    board.setup_rooms()
+    board.place_hints(hints, hint_spots)
+
+    session.player.position = (row, col)
+    session.spaces_left_to_move = spaces_left
+    session.current_room, session.last_room = current_room, last_room
+    session.rolls, session.moves, session.solved = rolls, moves, bool(solved)
+    session.deduction.candidates = candidates
+    session.hints_gathered = hints_gathered
+    session.room_weapons = room_weapons
+    session.suggestions_made = suggestions
+    session.rng = board.rng = game.rng = rng or random.Random()
+    return session
+
+
+class ActionLog:
+    """
+    Append-only record of everything the player did in one game. Together with the seed,
+    board size and hint_bits it is enough to rebuild the game at any turn, see replay().
+    Pass it as GameSession(log=...) (or use new_session) and every successful roll, move
+    and suggestion is recorded. With a path, records are also appended to that file as they happen.
+    Only games on the standard mansions (make_layout) without a catalogue puzzle can be
+    logged, as nothing else about the setup is stored.
+    """
+
+    def __init__(self, seed, rows=7, cols=9, records=b"", path=None, hint_bits=None):
+        if not isinstance(seed, int):
+            raise TypeError("Action logs need an integer seed")
+        self.seed = seed
+        self.rows = rows
+        self.cols = cols
+        self.hint_bits = hint_bits
+        self.records = bytearray(records)
+        self.file = None
+        if path is not None:
+            self.file = open(path, "wb")
+            self.file.write(self.header() + self.records)
+            self.file.flush()
+
+    def header(self):
+        hint_bits = float("nan") if self.hint_bits is None else self.hint_bits
+        return LOG_HEADER.pack(LOG_MAGIC, LOG_VERSION, self.seed, self.rows, self.cols, hint_bits)
+
+    # A fresh session for this log's seed, board size and hint_bits that records into this log.
+    def new_session(self):
+        return GameSession(rng=random.Random(self.seed), layout=make_layout(self.rows, self.cols), log=self,
+                           hint_bits=self.hint_bits)
+
+    # Called by a GameSession logging into this log. Raises SnapshotError if replay() could
+    # not rebuild the session from what the log stores.
+    def check_session(self, board, hint_bits, puzzle):
+        if puzzle is not None:
+            raise SnapshotError("catalogue puzzles cannot be logged")
+        if (board.rows, board.cols) != (self.rows, self.cols) or board.layout is not make_layout(self.rows, self.cols):
+            raise SnapshotError(f"only games on the standard {self.rows}x{self.cols} mansion can be logged here")
+        if hint_bits != self.hint_bits:
+            raise SnapshotError(f"the session has hint_bits {hint_bits}, the log {self.hint_bits}")
+
+    def append(self, action, argument):
+        record = LOG_RECORD.pack(action, argument)
+        self.records += record
+        if self.file is not None:
+            self.file.write(record)
+            self.file.flush()
+
+    def record_roll(self, roll):
+        self.append(ACTION_ROLL, roll)
+
+    def record_move(self, direction):
+        self.append(ACTION_MOVE, DIRECTION_INDEX[direction])
+
+    def record_suggestion(self, murderer, weapon):
+        self.append(ACTION_SUGGEST, CHARACTER_INDEX[murderer] * len(WEAPONS) + WEAPON_INDEX[weapon])
+
+    def __len__(self):
+        return len(self.records) // LOG_RECORD.size
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def to_bytes(self):
+        return self.header() + bytes(self.records)
+
+    @classmethod
+    def from_bytes(cls, data):
+        try:
+            magic, version, seed, rows, cols, hint_bits = LOG_HEADER.unpack_from(data)
+        except struct.error:
+            raise SnapshotError("truncated action log") from None
+        if magic != LOG_MAGIC:
+            raise SnapshotError("not an action log")
+        if version != LOG_VERSION:
+            raise SnapshotError(f"unsupported action log version {version}")
+        # A crash can leave half a record at the end; drop it.
+        end = LOG_HEADER.size + (len(data) - LOG_HEADER.size) // LOG_RECORD.size * LOG_RECORD.size
+        return cls(seed, rows, cols, data[LOG_HEADER.size:end], hint_bits=None if math.isnan(hint_bits) else hint_bits)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+
+# Rebuild the game from its seed, hint_bits and action log. With turn, stop after that many rolls
+# (and everything done during them); otherwise replay the whole log. Dice results come
+# from the log, so the replayed session's generator is left where setup finished with it;
+# use a snapshot to carry on with the original dice.
+def replay(log, turn=None):
+    session = GameSession(rng=random.Random(log.seed), layout=make_layout(log.rows, log.cols),
+                          hint_bits=log.hint_bits)
+    records = log.records
+    for offset in range(0, len(records) - 1, LOG_RECORD.size):
+        action, argument = records[offset], records[offset + 1]
+        if action == ACTION_ROLL:
+            if turn is not None and session.rolls == turn:
+                break
+            if not session.roll(argument):
+                raise SnapshotError(f"replay diverged at record {offset // LOG_RECORD.size}")
+        elif action == ACTION_MOVE:
+            session.move(DIRECTIONS[argument])
+        elif action == ACTION_SUGGEST:
+            murderer, weapon = divmod(argument, len(WEAPONS))
+            session.suggest(CHARACTERS[murderer], WEAPONS[weapon])
+        else:
+            raise SnapshotError(f"unknown action {action} in log")
+    return session
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inspect and replay saved Cluedo games.")
+    parser.add_argument("log", help="Action log file to replay.")
+    parser.add_argument("--turn", type=int, help="Stop after this many turns.")
+    parser.add_argument("--snapshot", help="Write a snapshot of the replayed game to this file.")
+    args = parser.parse_args()
+
+    log = ActionLog.load(args.log)
+    start = time.perf_counter()
+    session = replay(log, args.turn)
+    elapsed = time.perf_counter() - start
+    print(f"Replayed a {len(log)}-action log in {elapsed * 1000:.2f} ms (seed {log.seed}, {log.rows}x{log.cols})")
+    print(f"Turn {session.rolls}: at {session.player.position}, {session.spaces_left_to_move} spaces left, "
+          f"room {session.current_room}, {session.deduction.count()} solutions possible, solved {session.solved}")
+
+    if args.snapshot:
+        data = dumps(session, include_rng=True)
+        with open(args.snapshot, "wb") as f:
+            f.write(data)
+        print(f"Wrote {len(data)} byte snapshot to {args.snapshot}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import random
+
+import pytest
+
+from board import CELL_DOOR, CELL_PATH, CELL_ROOM, CELL_WALL, ROOM_NAMES, layout_tables
+from layouts import (
+    LIBRARY_HEADER, MIN_HINT_SPOTS, DisjointSet, LayoutError, LayoutLibrary, build_library, generate_layout,
+    is_connected, layout_from_cells,
+)
+
+
+def neighbours(cell, rows, cols):
+    row, col = divmod(cell, cols)
+    return [
+        (row + d_row) * cols + col + d_col
+        for d_row, d_col in ((-1, 0), (1, 0), (0, -1), (0, 1))
+        if 0 <= row + d_row < rows and 0 <= col + d_col < cols
+    ]
+
+
+def test_disjoint_set_joins_sets_once():
+    sets = DisjointSet(4)
+    assert sets.union(0, 1)
+    assert sets.union(2, 3)
+    assert not sets.union(1, 0)
+    assert sets.union(1, 3)
+    assert len({sets.find(item) for item in range(4)}) == 1
+
+
+def test_is_connected():
+    wall, path = CELL_WALL, CELL_PATH
+    assert is_connected(bytes([path, path, wall, wall, path, wall]), 3)
+    assert not is_connected(bytes([path, wall, path, wall, wall, wall]), 3)
+    # Cells at the end of one row are not next to the start of the next
+    assert not is_connected(bytes([wall, wall, path, path, wall, wall]), 3)
+
+
+@pytest.mark.parametrize("rows, cols", [(11, 11), (21, 21), (15, 30)])
+def test_generated_layouts_are_valid(rows, cols):
+    rng = random.Random(rows * cols)
+    for _ in range(5):
+        cells = generate_layout(rows, cols, rng)
+        assert len(cells) == rows * cols
+        assert cells.count(CELL_ROOM) == len(ROOM_NAMES)
+        assert cells.count(CELL_DOOR) == len(ROOM_NAMES)
+        assert cells.count(CELL_PATH) >= MIN_HINT_SPOTS
+        assert is_connected(cells, cols)
+        # The outer walls are whole
+        for cell in range(rows * cols):
+            row, col = divmod(cell, cols)
+            if row in (0, rows - 1) or col in (0, cols - 1):
+                assert cells[cell] == CELL_WALL
+        # Every room has its door next to it, and the start is a pathway
+        for cell in range(rows * cols):
+            if cells[cell] == CELL_ROOM:
+                assert any(cells[n] == CELL_DOOR for n in neighbours(cell, rows, cols))
+        assert cells[rows // 2 * cols + cols // 2] == CELL_PATH
+
+
+def test_generation_is_reproducible():
+    assert generate_layout(21, 21, random.Random(7)) == generate_layout(21, 21, random.Random(7))
+    assert generate_layout(21, 21, random.Random(7)) != generate_layout(21, 21, random.Random(8))
+
+
+def test_mansions_smaller_than_11x11_are_refused():
+    with pytest.raises(LayoutError):
+        generate_layout(9, 21)
+
+
+def test_layout_from_cells_round_trips():
+    cells = generate_layout(13, 17, random.Random(1))
+    layout = layout_from_cells(cells, 17)
+    assert len(layout) == 13 and all(len(row) == 17 for row in layout)
+    assert layout_tables(layout)[0] == cells
+    with pytest.raises(LayoutError):
+        layout_from_cells(bytes([CELL_PATH]) * (13 * 17), 17)
+
+
+@pytest.fixture(scope="module")
+def library_file(tmp_path_factory):
+    path = tmp_path_factory.mktemp("layouts") / "layouts.lib"
+    build_library(path, 12, seed=3, rows=15, cols=15, workers=1, chunk_size=5)
+    return path
+
+
+def test_library_round_trip(library_file):
+    library = LayoutLibrary(library_file)
+    assert (library.rows, library.cols, len(library)) == (15, 15, 12)
+    # Chunks have their own random streams, so the library can be rebuilt chunk by chunk
+    rng = random.Random("3:1")
+    expected = [generate_layout(15, 15, rng) for _ in range(5)]
+    assert [library.cells(i) for i in range(5, 10)] == expected
+    library.close()
+
+
+def test_library_sessions_play_on_a_library_layout(library_file):
+    library = LayoutLibrary(library_file)
+    session = library.new_session(rng=random.Random(0))
+    assert (session.board.rows, session.board.cols) == (15, 15)
+    assert session.board.cells in {library.cells(i) for i in range(len(library))}
+    assert len(session.board.hint_spots) == MIN_HINT_SPOTS
+    library.close()
+
+
+@pytest.mark.parametrize("contents", [b"", b"CLLY", b"NOPE" + bytes(40)], ids=["empty", "short", "bad magic"])
+def test_files_that_are_not_libraries_are_rejected(tmp_path, contents):
+    path = tmp_path / "bad.lib"
+    path.write_bytes(contents)
+    with pytest.raises(LayoutError):
+        LayoutLibrary(path)
+
+
+def test_truncated_libraries_are_rejected(tmp_path, library_file):
+    path = tmp_path / "truncated.lib"
+    path.write_bytes(library_file.read_bytes()[:LIBRARY_HEADER.size + 100])
+    with pytest.raises(LayoutError):
+        LayoutLibrary(path)
@@ -0,0 +1,85 @@
+import random
+
+import pytest
+
+from engine import GameSession
+from puzzles import (
+    DIFFICULTY_BANDS, PUZZLE_RECORD, Catalogue, CatalogueError, build_catalogue, decode_puzzle, encode_puzzle,
+    puzzle_from_session,
+)
+
+
+@pytest.fixture(scope="module")
+def catalogue_file(tmp_path_factory):
+    path = tmp_path_factory.mktemp("catalogue") / "puzzles.clup"
+    puzzles = build_catalogue(path, 10, seed=1, plays=2, workers=1)
+    return path, puzzles
+
+
+def test_puzzle_records_round_trip():
+    session = GameSession(rng=random.Random(3))
+    puzzle = puzzle_from_session(session, difficulty=12.5)
+    data = encode_puzzle(puzzle, session.board.cols)
+    assert len(data) == PUZZLE_RECORD.size
+    assert decode_puzzle(data, 0, session.board.cols) == puzzle
+
+
+def test_catalogue_round_trip(catalogue_file):
+    path, puzzles = catalogue_file
+    catalogue = Catalogue(path)
+    assert (catalogue.rows, catalogue.cols, len(catalogue)) == (7, 9, 10)
+    assert [catalogue.puzzle(i) for i in range(len(catalogue))] == puzzles
+    catalogue.close()
+
+
+def test_catalogue_is_sorted_into_bands(catalogue_file):
+    path, puzzles = catalogue_file
+    assert [puzzle.difficulty for puzzle in puzzles] == sorted(puzzle.difficulty for puzzle in puzzles)
+    catalogue = Catalogue(path)
+    assert len(catalogue.bands) == len(DIFFICULTY_BANDS)
+    assert sum(count for _, count, _ in catalogue.bands) == len(catalogue)
+    for band, (first, count, hardest) in enumerate(catalogue.bands):
+        picked = catalogue.pick(band, random.Random(band))
+        assert picked in puzzles[first:first + count]
+        assert picked.difficulty <= hardest
+    assert catalogue.pick("very easy", random.Random(0)) in puzzles[:catalogue.bands[0][1]]
+    catalogue.close()
+
+
+def test_new_session_plays_the_picked_puzzle(catalogue_file):
+    path, _ = catalogue_file
+    catalogue = Catalogue(path)
+    puzzle = catalogue.pick("hard", random.Random(5))
+    session = catalogue.new_session("hard", rng=random.Random(5))
+    assert session.game.solution == puzzle.solution
+    assert tuple(session.board.hint_spots) == puzzle.hint_spots
+    catalogue.close()
+
+
+def test_unknown_bands_are_rejected(catalogue_file):
+    catalogue = Catalogue(catalogue_file[0])
+    with pytest.raises(CatalogueError):
+        catalogue.pick("impossible")
+    with pytest.raises(CatalogueError):
+        catalogue.pick(len(DIFFICULTY_BANDS))
+    catalogue.close()
+
+
+@pytest.mark.parametrize("contents", [b"", b"CLUP", b"NOPE" + bytes(60)], ids=["empty", "short", "bad magic"])
+def test_files_that_are_not_catalogues_are_rejected(tmp_path, contents):
+    path = tmp_path / "bad.clup"
+    path.write_bytes(contents)
+    with pytest.raises(CatalogueError):
+        Catalogue(path)
+
+
+def test_truncated_catalogues_are_rejected(tmp_path, catalogue_file):
+    path = tmp_path / "truncated.clup"
+    path.write_bytes(catalogue_file[0].read_bytes()[:-1])
+    with pytest.raises(CatalogueError):
+        Catalogue(path)
+
+
+def test_boards_too_large_for_two_byte_cells_are_refused(tmp_path):
+    with pytest.raises(CatalogueError):
+        build_catalogue(tmp_path / "huge.clup", 5, rows=256, cols=256, workers=1)
@@ -0,0 +1,116 @@
+import random
+
+import pytest
+
+import reachability
+from board import layout_tables, make_layout
+from reachability import Reachability
+
+# A 5x5 mansion with a wall in the middle: paths have to go round it.
+OPEN = [
+    "WWWWW",
+    "WPPPW",
+    "WPWPW",
+    "WPPPW",
+    "WWWWW",
+]
+
+
+def tables(layout):
+    rows, cols = len(layout), len(layout[0])
+    return rows, cols, layout_tables([list(row) for row in layout])[1]
+
+
+def walkable_cells(rows, cols, walkable):
+    return [divmod(index, cols) for index in range(rows * cols) if walkable[index]]
+
+
+@pytest.fixture(params=[True, False], ids=["all_pairs", "lazy"])
+def ring(request, monkeypatch):
+    # The same board through both the small-layout and the large-layout code paths
+    monkeypatch.setattr(reachability, "ALL_PAIRS_LIMIT", 10 ** 9 if request.param else 0)
+    return Reachability(*tables(OPEN))
+
+
+def test_distance_goes_round_walls(ring):
+    assert ring.distance((1, 1), (1, 1)) == 0
+    assert ring.distance((1, 1), (3, 3)) == 4
+    assert ring.distance((1, 2), (3, 2)) == 4
+
+
+def test_distance_to_a_wall_is_unreachable(ring):
+    assert ring.distance((1, 1), (2, 2)) == -1
+    assert ring.path_within((1, 1), (2, 2), 6) is None
+
+
+def test_within_is_nearest_first(ring):
+    cells = ring.within((1, 1), 2)
+    assert cells[0] == (1, 1)
+    assert sorted(cells) == [(1, 1), (1, 2), (1, 3), (2, 1), (3, 1)]
+
+
+def test_exactly_keeps_the_parity_of_the_roll(ring):
+    # Steps may go back and forth, so an even roll can end where the player stands
+    assert sorted(ring.exactly((1, 1), 2)) == [(1, 1), (1, 3), (3, 1)]
+    assert sorted(ring.exactly((1, 1), 1)) == [(1, 2), (2, 1)]
+    assert sorted(ring.exactly((1, 1), 3)) == [(1, 2), (2, 1), (2, 3), (3, 2)]
+
+
+def test_exactly_from_a_cell_with_no_way_out():
+    rows, cols, walkable = tables(["WWW", "WPW", "WWW"])
+    boxed = Reachability(rows, cols, walkable)
+    assert boxed.exactly((1, 1), 0) == [(1, 1)]
+    assert boxed.exactly((1, 1), 2) == []
+
+
+def test_path_within_respects_the_limit(ring):
+    path = ring.path_within((1, 1), (3, 3), 4)
+    assert len(path) == 4 and path[-1] == (3, 3)
+    assert ring.path_within((1, 1), (3, 3), 3) is None
+    assert ring.path_within((1, 1), (1, 1), 0) == []
+
+
+def test_path_within_steps_are_adjacent_and_walkable(ring):
+    previous = (1, 2)
+    for cell in ring.path_within((1, 2), (3, 2), 6):
+        assert abs(cell[0] - previous[0]) + abs(cell[1] - previous[1]) == 1
+        assert ring.walkable[cell[0] * ring.cols + cell[1]]
+        previous = cell
+
+
+@pytest.mark.parametrize("rows, cols", [(7, 9), (25, 30)])
+def test_lazy_tables_agree_with_all_pairs(rows, cols, monkeypatch):
+    layout_rows, layout_cols, walkable = tables(["".join(row) for row in make_layout(rows, cols)])
+    monkeypatch.setattr(reachability, "ALL_PAIRS_LIMIT", 10 ** 9)
+    full = Reachability(layout_rows, layout_cols, walkable)
+    monkeypatch.setattr(reachability, "ALL_PAIRS_LIMIT", 0)
+    lazy = Reachability(layout_rows, layout_cols, walkable)
+
+    rng = random.Random(0)
+    cells = walkable_cells(layout_rows, layout_cols, walkable)
+    for _ in range(200):
+        start, end, k = rng.choice(cells), rng.choice(cells), rng.randint(0, 8)
+        assert lazy.distance(start, end) == full.distance(start, end)
+        assert sorted(lazy.exactly(start, k)) == sorted(full.exactly(start, k))
+        assert sorted(lazy.within(start, k)) == sorted(full.within(start, k))
+        lazy_path, full_path = lazy.path_within(start, end, k), full.path_within(start, end, k)
+        assert (lazy_path is None) == (full_path is None)
+        if lazy_path is not None:
+            assert len(lazy_path) == len(full_path) == full.distance(start, end)
+
+
+def test_small_layouts_build_tables_on_first_use():
+    small = Reachability(*tables(OPEN))
+    assert small.all_pairs and small.sources == {}
+    small.distance((1, 1), (3, 3))
+    assert list(small.sources) == [3 * 5 + 3]
+
+
+def test_large_layouts_keep_distances_within_the_byte_budget(monkeypatch):
+    rows, cols, walkable = tables(["".join(row) for row in make_layout(40, 40)])
+    monkeypatch.setattr(reachability, "LAZY_BYTES_BUDGET", 3 * rows * cols * 4)
+    large = Reachability(rows, cols, walkable)
+    for end in walkable_cells(rows, cols, walkable)[:10]:
+        large.distance((1, 1), end)
+    assert len(large.distances) == 3
+    assert large.distance_bytes <= reachability.LAZY_BYTES_BUDGET
@@ -0,0 +1,127 @@
+import json
+import sqlite3
+
+import pytest
+
+import results
+from engine import GameSession
+from results import ABANDONED, LOST, SOLVED, GameRecord, ResultsQueries, ResultsStore, layout_key
+
+
+def game(outcome=SOLVED, murderer="Mrs. White", weapon="Rope", room="Study", layout="a", rolls=10, seconds=60.0,
+         **fields):
+    return GameRecord(
+        fields.get("finished_at", 1000.0), outcome, murderer, weapon, room, layout, 7, 9, rolls, seconds,
+        fields.get("opponents", 0), fields.get("suggestions", []), fields.get("hints", []),
+    )
+
+
+@pytest.fixture
+def saved(tmp_path):
+    # Saves GameRecords and returns a ResultsQueries over them
+    path = tmp_path / "results.db"
+    queries = []
+
+    def save(*records):
+        store = ResultsStore(path, flush_interval=0.01)
+        for record in records:
+            store.record(record)
+        store.close()
+        assert store.failed == 0
+        queries.append(ResultsQueries(path))
+        return queries[-1]
+    yield save
+    for query in queries:
+        query.close()
+
+
+def test_leaderboard_orders_solved_games_by_time_then_rolls(saved):
+    queries = saved(
+        game(seconds=90, rolls=5), game(seconds=30, rolls=9), game(seconds=30, rolls=4),
+        game(LOST, seconds=1), game(ABANDONED, seconds=2),
+    )
+    assert [(seconds, rolls) for seconds, rolls, _, _ in queries.leaderboard()] == [(30, 4), (30, 9), (90, 5)]
+    assert queries.leaderboard(limit=1)[0][2] == "Mrs. White with Rope in Study"
+    assert queries.count() == 5
+
+
+def test_solution_stats_total_the_games_of_each_solution(saved):
+    queries = saved(
+        game(rolls=10), game(rolls=20), game(LOST, rolls=99),
+        game(murderer="Colonel Mustard", weapon="Dagger", room="Kitchen", rolls=4),
+    )
+    stats = {row[:3]: row[3:] for row in queries.solution_stats()}
+    # Rolls only count for solved games
+    assert stats["Mrs. White", "Rope", "Study"] == (3, 2 / 3, 15.0)
+    assert stats["Colonel Mustard", "Dagger", "Kitchen"] == (1, 1.0, 4.0)
+    assert queries.solution_stats("Colonel Mustard", "Dagger", "Kitchen") == [
+        ("Colonel Mustard", "Dagger", "Kitchen", 1, 1.0, 4.0)
+    ]
+
+
+def test_layout_difficulty_lists_the_hardest_layouts_first(saved):
+    queries = saved(
+        game(layout="easy", rolls=5), game(layout="easy", rolls=7),
+        game(layout="slow", rolls=30), game(layout="slow", rolls=40),
+        game(layout="half", rolls=5), game(LOST, layout="half"),
+        game(LOST, layout="never"),
+    )
+    assert [row[0] for row in queries.layout_difficulty()] == ["never", "half", "slow", "easy"]
+    assert queries.layout_difficulty()[0][3:] == (1, 0.0, None)
+    assert queries.layout_difficulty(limit=2, min_games=2)[0][:6] == ("half", 7, 9, 2, 0.5, 5.0)
+
+
+def test_totals_add_up_over_several_sessions(saved):
+    saved(game(rolls=10))
+    queries = saved(game(rolls=20), game(LOST))
+    assert queries.count() == 3
+    assert queries.solution_stats("Mrs. White", "Rope", "Study")[0][3:] == (3, 2 / 3, 15.0)
+
+
+def test_games_keep_their_note_sheet(saved, tmp_path):
+    saved(game(suggestions=["Mrs. White with Rope in Study"], hints=["A loud noise"], opponents=2))
+    row = sqlite3.connect(tmp_path / "results.db").execute("SELECT opponents, suggestions, hints FROM games").fetchone()
+    assert (row[0], json.loads(row[1]), json.loads(row[2])) == (2, ["Mrs. White with Rope in Study"], ["A loud noise"])
+
+
+def test_layout_difficulty_reads_the_index(saved):
+    queries = saved(game())
+    plan = queries.connection.execute(
+        "EXPLAIN QUERY PLAN SELECT layout, rows, cols, games, solved, rolls FROM layout_stats WHERE games >= ?"
+        " ORDER BY CAST(solved AS REAL) / games, CAST(rolls AS REAL) / MAX(solved, 1) DESC LIMIT ?", (1, 10),
+    ).fetchall()
+    details = " ".join(row[-1] for row in plan)
+    assert "layout_stats_difficulty" in details and "TEMP B-TREE" not in details
+
+
+@pytest.mark.parametrize("field, value", [("weapon", "Spoon"), ("room", "Attic"), ("murderer", "Nobody"),
+                                          ("outcome", 7)])
+def test_results_that_cannot_be_saved_are_refused(tmp_path, field, value):
+    store = ResultsStore(tmp_path / "results.db", flush_interval=0.01)
+    with pytest.raises(ValueError):
+        store.record(game()._replace(**{field: value}))
+    store.close()
+
+
+def test_the_writer_survives_a_batch_it_cannot_write(tmp_path, capsys):
+    store = ResultsStore(tmp_path / "results.db", batch_size=1)
+    # Passes record()'s checks but cannot be stored
+    store.record(game(rolls=object()))
+    store.record(game(rolls=3))
+    store.close()
+    assert store.failed == 1
+    assert "could not save" in capsys.readouterr().err
+    queries = ResultsQueries(tmp_path / "results.db")
+    assert [rolls for _, rolls, _, _ in queries.leaderboard()] == [3]
+    queries.close()
+
+
+def test_saving_is_off_unless_asked_for(monkeypatch):
+    monkeypatch.setattr(results, "RESULTS_FILE", None)
+    assert ResultsStore.from_environment() is None
+
+
+def test_layout_key_is_the_same_for_the_same_mansion():
+    first, second = GameSession(), GameSession()
+    assert layout_key(first.board) == layout_key(second.board)
+    assert len(layout_key(first.board)) == 16
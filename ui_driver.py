@@ -0,0 +1,285 @@
+import os
+import random
+import sys
+import time
+from collections import Counter, namedtuple
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+import pygame
+
+from backends import PygameBackend
+from main import FRAME_MS, OPPONENTS_READY, STATES, TRANSITIONS, GameLoop, new_game, new_opponents
+
+# Input scripts are text files with one event per line, "<frame> <event>", where the event
+# is "key <name>" (a pygame key name such as "space" or "page down"), "click <x> <y>",
+# "wheel <dy>", "quit" or "opponents" (the opponents' turns came back from the planner).
+# Lines "seed N", "size ROWSxCOLS", "catalogue PATH", "difficulty NAME" and "layouts PATH"
+# say which game the script is for, "opponents N" how many suspects the computer plays (none if not
+# given), and "frames N" how many frames it runs for (by default up to its last event).
+# Lines starting with # are comments. Recorded scripts also have a "<frame> time <ms>" line
+# for every frame: the game clock on that frame. The frame rate changes while the game sleeps,
+# so overlays are timed by these on replay; scripts without them get FRAME_MS per frame.
+SETTINGS = ("seed", "size", "catalogue", "difficulty", "layouts", "opponents", "frames")
+EVENTS = ("key", "click", "wheel", "quit", "opponents")
+
+# Keys the fuzzer presses; RETURN is repeated so suggestions get made.
+FUZZ_KEYS = [
+    pygame.K_RETURN, pygame.K_RETURN, pygame.K_SPACE, pygame.K_UP, pygame.K_DOWN, pygame.K_LEFT,
+    pygame.K_RIGHT, pygame.K_s, pygame.K_l, pygame.K_i, pygame.K_PAGEUP, pygame.K_PAGEDOWN,
+]
+
+HarnessResult = namedtuple("HarnessResult", ["games", "frames", "seconds", "states", "transitions"])
+
+
+def format_event(event):
+    if event.type == pygame.KEYDOWN:
+        name = pygame.key.name(event.key)
+        return f"key {name}" if name else None
+    if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+        return f"click {event.pos[0]} {event.pos[1]}"
+    if event.type == pygame.MOUSEWHEEL:
+        return f"wheel {event.y}"
+    if event.type == pygame.QUIT:
+        return "quit"
+    if event.type == OPPONENTS_READY:
+        return "opponents"
+    # Anything else (mouse motion, window events) does not affect the game.
+    return None
+
+
+def parse_event(text):
+    kind, _, args = text.partition(" ")
+    if kind == "key":
+        return pygame.event.Event(pygame.KEYDOWN, key=pygame.key.key_code(args))
+    if kind == "click":
+        x, y = (int(n) for n in args.split())
+        return pygame.event.Event(pygame.MOUSEBUTTONDOWN, button=1, pos=(x, y))
+    if kind == "wheel":
+        return pygame.event.Event(pygame.MOUSEWHEEL, x=0, y=int(args), flipped=False)
+    if kind == "quit":
+        return pygame.event.Event(pygame.QUIT)
+    if kind == "opponents":
+        return pygame.event.Event(OPPONENTS_READY)
+    raise ValueError(f"Unknown input event {text!r}")
+
+
+class ScriptedInput:
+    # Events from a script. events(frame) returns None once the script has run out.
+    # The script says when the opponents' turns came back, so they are not added by the driver.
+    replays_opponents = True
+
+    def __init__(self, frames, settings=None, times=None):
+        """
+        Args:
+            frames: Dict of frame number to the list of events for that frame, as script text.
+            settings: Dict of the script's settings (seed, size, catalogue, difficulty, layouts, opponents,
+                frames).
+            times: Dict of frame number to the game clock in milliseconds on that frame.
+        """
+        self.frames = frames
+        self.times = times or {}
+        self.settings = settings or {}
+        self.last_frame = int(self.settings["frames"]) - 1 if "frames" in self.settings else max(frames, default=-1)
+
+    @classmethod
+    def load(cls, path):
+        frames = {}
+        settings = {}
+        times = {}
+        with open(path) as f:
+            for number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                first, _, rest = line.partition(" ")
+                kind, _, value = rest.partition(" ")
+                if first in SETTINGS:
+                    settings[first] = rest
+                elif first.isdigit() and kind == "time" and value.isdigit():
+                    times[int(first)] = int(value)
+                elif first.isdigit() and kind in EVENTS:
+                    frames.setdefault(int(first), []).append(rest)
+                else:
+                    raise ValueError(f"{path}:{number}: cannot read {line!r}")
+        return cls(frames, settings, times)
+
+    # Events are made as they are needed, once pygame is running (key names need it).
+    def events(self, frame):
+        if frame > self.last_frame:
+            return None
+        return [parse_event(text) for text in self.frames.get(frame, ())]
+
+    # The game clock recorded for a frame, or None.
+    def now(self, frame):
+        return self.times.get(frame)
+
+
+class FuzzInput:
+    # A random event (or none) every frame: key presses, clicks on the board and wheel scrolls.
+    def __init__(self, rng, size, idle=0.3, clicks=0.15, wheel=0.05, keys=FUZZ_KEYS):
+        self.rng = rng
+        self.size = size
+        self.idle = idle
+        self.clicks = clicks
+        self.wheel = wheel
+        self.keys = keys
+
+    def events(self, frame):
+        roll = self.rng.random()
+        if roll < self.idle:
+            return []
+        roll -= self.idle
+        if roll < self.clicks:
+            pos = (self.rng.randrange(self.size[0]), self.rng.randrange(self.size[1]))
+            return [pygame.event.Event(pygame.MOUSEBUTTONDOWN, button=1, pos=pos)]
+        if roll - self.clicks < self.wheel:
+            return [pygame.event.Event(pygame.MOUSEWHEEL, x=0, y=self.rng.choice((-1, 1)), flipped=False)]
+        return [pygame.event.Event(pygame.KEYDOWN, key=self.rng.choice(self.keys))]
+
+
+class InputRecorder:
+    # Writes the events of a game being played to a script that ScriptedInput can replay.
+    def __init__(self, path, seed=None, rows=7, cols=9, catalogue=None, difficulty=None, opponents=0, layouts=None):
+        self.file = open(path, "w")
+        self.file.write("# Cluedo input script, replay with: python ui_driver.py --script " + os.path.basename(path) + "\n")
+        if seed is None:
+            self.file.write("# No seed was given, so the game will differ when replayed.\n")
+        else:
+            self.file.write(f"seed {seed}\n")
+        self.file.write(f"size {rows}x{cols}\n")
+        if catalogue:
+            self.file.write(f"catalogue {catalogue}\ndifficulty {difficulty}\n")
+        if layouts:
+            self.file.write(f"layouts {layouts}\n")
+        self.file.write(f"opponents {opponents}\n")
+        self.frames = 0
+
+    # now: the game clock passed to GameLoop.step for this frame.
+    def record(self, frame, events, now=None):
+        self.frames = frame + 1
+        if now is not None:
+            self.file.write(f"{frame} time {now}\n")
+        for event in events:
+            line = format_event(event)
+            if line:
+                self.file.write(f"{frame} {line}\n")
+
+    def close(self):
+        self.file.write(f"frames {self.frames}\n")
+        self.file.close()
+
+
+def run_headless(source, games=1, frames=None, seed=0, rows=7, cols=9, size=(1024, 768), catalogue=None,
+                 difficulty="medium", game_frames=None, opponents=0, layouts=None):
+    """
+    Plays games through the real main loop and renderer without a window: SDL's dummy
+    video driver, no frame cap, and overlays timed by the script's recorded clock or else by
+    frame count (FRAME_MS per frame).
+    Opponents plan their turns inline, so a run plays out the same way every time.
+    Args:
+        source: Where the input comes from, e.g. ScriptedInput or FuzzInput.
+        games: Number of games to play one after another; game i is seeded with seed + i.
+        frames: Optional limit on the total number of frames.
+        game_frames: Optional limit on the frames of each game; a game still going then is abandoned.
+        seed, rows, cols, catalogue, difficulty, layouts: The games to play (see main.new_game).
+        opponents: Number of suspects the computer plays.
+        size: Screen size in pixels.
+    """
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    backend = PygameBackend()
+    backend.open(*size, fullscreen=False)
+    states = Counter()
+    transitions = Counter()
+    total_frames = played = 0
+    finished = False
+    start = time.perf_counter()
+    while played < games and not finished:
+        rng = random.Random(seed + played)
+        board, player, game = new_game(rows, cols, catalogue, difficulty, rng=rng, layouts=layouts)
+        rivals = new_opponents(board, opponents, seed + played, mode="inline") if opponents else None
+        loop = GameLoop(backend, board, player, game, rng=rng, opponents=rivals)
+        while loop.running:
+            events = None if frames is not None and total_frames + loop.frames >= frames else source.events(loop.frames)
+            if events is None:
+                finished = True
+                break
+            if not getattr(source, "replays_opponents", False):
+                events = events + loop.opponent_events()
+            now = source.now(loop.frames) if hasattr(source, "now") else None
+            loop.step(events, now=loop.frames * FRAME_MS if now is None else now)
+            states[loop.state] += 1
+            if game_frames is not None and loop.frames >= game_frames:
+                break
+        total_frames += loop.frames
+        transitions.update(loop.transitions)
+        played += 1
+    elapsed = time.perf_counter() - start
+    backend.close()
+    return HarnessResult(played, total_frames, elapsed, states, transitions)
+
+
+# Prints speed and coverage; returns the state changes TRANSITIONS does not allow.
+def report(result):
+    print(f"{result.games} games, {result.frames} frames in {result.seconds:.2f}s: "
+          f"{result.frames / result.seconds:,.0f} loops/s")
+
+    print(f"States covered: {len(result.states)}/{len(STATES)}")
+    for state in STATES:
+        print(f"  {state:15s} {result.states[state]:9d} frames")
+
+    edges = [(state, next_state) for state in STATES for next_state in sorted(TRANSITIONS[state])]
+    covered = [edge for edge in edges if result.transitions[edge]]
+    print(f"Transitions covered: {len(covered)}/{len(edges)}")
+    for edge in edges:
+        if not result.transitions[edge]:
+            print(f"  never seen: {edge[0]} -> {edge[1]}")
+    unexpected = sorted(edge for edge in result.transitions if edge not in edges)
+    for edge in unexpected:
+        print(f"  UNEXPECTED: {edge[0]} -> {edge[1]} ({result.transitions[edge]} times)")
+    return unexpected
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Drive the Cluedo main loop headless from a script or a fuzzer.")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--script", help="Replay an input script (record one with main.py --record).")
+    source.add_argument("--fuzz", action="store_true", help="Random input (the default).")
+    parser.add_argument("--games", type=int, default=10)
+    parser.add_argument("--frames", type=int, help="Stop after this many frames in total.")
+    parser.add_argument("--game-frames", type=int, default=5000, help="Give up on a fuzzed game after this many frames.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--size", default="7x9", help="Mansion size as ROWSxCOLS.")
+    parser.add_argument("--catalogue", help="Play puzzles from this catalogue (see puzzles.py).")
+    parser.add_argument("--difficulty", default="medium")
+    parser.add_argument("--layouts", help="Play generated mansions from this layout library (see layouts.py).")
+    parser.add_argument("--opponents", type=int, default=5, help="Suspects played by the computer.")
+    parser.add_argument("--screen", default="1024x768", help="Screen size in pixels as WIDTHxHEIGHT.")
+    args = parser.parse_args()
+    screen_size = tuple(int(n) for n in args.screen.lower().split("x"))
+
+    if args.script:
+        source = ScriptedInput.load(args.script)
+        settings = source.settings
+        games, game_frames = 1, None
+        seed = int(settings.get("seed", args.seed))
+        size = settings.get("size", args.size)
+        catalogue = settings.get("catalogue", args.catalogue)
+        difficulty = settings.get("difficulty", args.difficulty)
+        layouts = settings.get("layouts", args.layouts)
+        opponents = int(settings.get("opponents", 0))
+    else:
+        source = FuzzInput(random.Random(args.seed), screen_size)
+        games, game_frames, seed, size = args.games, args.game_frames, args.seed, args.size
+        catalogue, difficulty, layouts, opponents = args.catalogue, args.difficulty, args.layouts, args.opponents
+    rows, cols = (int(n) for n in size.lower().split("x"))
+
+    result = run_headless(source, games, args.frames, seed, rows, cols, screen_size, catalogue, difficulty,
+                          game_frames, opponents, layouts)
+    if report(result):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()